@@ -1,4 +1,5 @@
 from . import base
+from .base import set_default_dtype, default_dtype
 
 from . import feature
 from . import image
@@ -1,5 +1,6 @@
 import abc
 import os.path
+import numpy as np
 
 # To debug the Copyable interface, simply uncomment lines 11-23 below and the
 # four lines in the copy() method.
@@ -297,3 +298,68 @@ def menpo_src_dir_path():
     """
     from pathlib import Path  # to avoid cluttering the menpo.base namespace
     return Path(os.path.abspath(__file__)).parent
+
+
+# the floating point data type that menpo creates pixels, features and
+# models in unless told otherwise - see set_default_dtype()
+_DEFAULT_DTYPE = np.dtype(np.float64)
+
+
+def set_default_dtype(dtype):
+    r"""Set the floating point data type that menpo creates new floating
+    point data in, such as blank images, normalised imported images and
+    PCA data matrices built from integer data.
+
+    Operations on floating point data always preserve its data type, so
+    setting this to ``np.float32`` gives single precision images, features
+    and models end-to-end (halving their memory).
+
+    Parameters
+    ----------
+    dtype : ``{np.float32, np.float64}``
+        The new default floating point data type.
+
+    Raises
+    ------
+    ValueError
+        If ``dtype`` is not a floating point data type.
+    """
+    global _DEFAULT_DTYPE
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise ValueError('The default dtype must be a floating point type - '
+                         '{} given'.format(dtype))
+    _DEFAULT_DTYPE = dtype
+
+
+def default_dtype():
+    r"""The floating point data type that menpo creates new floating point
+    data in. See :map:`set_default_dtype`.
+
+    Returns
+    -------
+    dtype : ``np.dtype``
+        The default floating point data type.
+    """
+    return _DEFAULT_DTYPE
+
+
+def float_dtype(dtype):
+    r"""The floating point data type that the result of a floating point
+    operation on data of type ``dtype`` is computed in - ``dtype`` itself if
+    it is a floating point type, else the :map:`default_dtype`.
+
+    Parameters
+    ----------
+    dtype : ``np.dtype``
+        The data type of the input to the operation.
+
+    Returns
+    -------
+    dtype : ``np.dtype``
+        The floating point data type of the result.
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.floating):
+        return dtype
+    return _DEFAULT_DTYPE
@@ -47,9 +47,16 @@ HOG::HOG(unsigned int windowHeight, unsigned int windowWidth,
     this->windowHeight = windowHeight;
     this->windowWidth = windowWidth;
     this->numberOfChannels = numberOfChannels;
+    this->sharedImage = NULL;
+    this->gradientMagnitudes = NULL;
+    this->gradientOrientations = NULL;
+    this->gradientStrengths = NULL;
+    this->gradientBins = NULL;
+    this->cellContributions = NULL;
 }
 
 HOG::~HOG() {
+    releaseShared();
 }
 
 
@@ -69,6 +76,604 @@ void HOG::apply(double *windowImage, double *descriptorVector) {
 }
 
 
+// Pixel value of the image, where everything outside the image is zero (as in
+// the padded windows of ImageWindowIterator)
+static inline double paddedPixel(double *image, int imageHeight,
+                                 int imageWidth, int y, int x,
+                                 unsigned int z) {
+    if (y < 0 || y > imageHeight - 1 || x < 0 || x > imageWidth - 1)
+        return 0;
+    return image[y + imageHeight * (x + imageWidth * z)];
+}
+
+
+// The trilinear votes of a pixel into the histograms of the 2x2 cells around
+// it, exactly as computed in DalalTriggsHOGdescriptor. The votes are ordered
+// as [column][row][bin] with offsets {x1, x1+1}, {y1, y1+1}, {bin1, bin2}.
+static inline void dalalTriggsVotes(unsigned int x, unsigned int y,
+                                    float gradientMagnitude,
+                                    float gradientOrientation,
+                                    unsigned int numberOfOrientationBins,
+                                    unsigned int cellHeightAndWidthInPixels,
+                                    double binsSize, int *x1, int *y1,
+                                    int *bin1, unsigned int *bin2,
+                                    double *votes) {
+    float Xc, Yc, Oc;
+
+    *bin1 = (gradientOrientation / binsSize) - 1;
+    *bin2 = *bin1 + 1;
+    *x1   = x / cellHeightAndWidthInPixels;
+    *y1   = y / cellHeightAndWidthInPixels;
+
+    Xc = (*x1 + 1 - 1.5) * cellHeightAndWidthInPixels + 0.5;
+    Yc = (*y1 + 1 - 1.5) * cellHeightAndWidthInPixels + 0.5;
+    Oc = (*bin1 + 1 + 1 - 1.5) * binsSize;
+
+    if (*bin2 == numberOfOrientationBins)
+        *bin2 = 0;
+
+    if (*bin1 < 0)
+        *bin1 = numberOfOrientationBins - 1;
+
+    votes[0] = gradientMagnitude *
+               (1-((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (1-((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (1-((gradientOrientation-Oc)/binsSize));
+    votes[1] = gradientMagnitude *
+               (1-((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (1-((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (((gradientOrientation-Oc)/binsSize));
+    votes[2] = gradientMagnitude *
+               (1-((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (1-((gradientOrientation-Oc)/binsSize));
+    votes[3] = gradientMagnitude *
+               (1-((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (((gradientOrientation-Oc)/binsSize));
+    votes[4] = gradientMagnitude *
+               (((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (1-((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (1-((gradientOrientation-Oc)/binsSize));
+    votes[5] = gradientMagnitude *
+               (((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (1-((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (((gradientOrientation-Oc)/binsSize));
+    votes[6] = gradientMagnitude *
+               (((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (1-((gradientOrientation-Oc)/binsSize));
+    votes[7] = gradientMagnitude *
+               (((x+1-Xc)/cellHeightAndWidthInPixels)) *
+               (((y+1-Yc)/cellHeightAndWidthInPixels)) *
+               (((gradientOrientation-Oc)/binsSize));
+}
+
+
+// Computes the gradients of the whole area covered by the windows once, so
+// that each window only has to vote them into its cells. When the windows are
+// aligned to a common grid of cells (the window steps are multiples of the
+// cell size) the votes of every cell are also summed once and each window
+// only revisits the pixels of the cells on its border.
+bool HOG::prepareShared(double *image, unsigned int imageHeight,
+                        unsigned int imageWidth, int rowFrom, int columnFrom,
+                        unsigned int height, unsigned int width,
+                        unsigned int windowStepVertical,
+                        unsigned int windowStepHorizontal) {
+    unsigned int x, y, cell = cellHeightAndWidthInPixels, numberOfSlots,
+                 numberOfVotes;
+    int x1, y1, bin1;
+    unsigned int bin2, slot, bin;
+    double votes[8];
+
+    releaseShared();
+    this->sharedImage = image;
+    this->sharedImageHeight = imageHeight;
+    this->sharedImageWidth = imageWidth;
+    this->sharedRowFrom = rowFrom;
+    this->sharedColumnFrom = columnFrom;
+    this->sharedHeight = height;
+    this->sharedWidth = width;
+    this->sharedCellsVertically = (height + cell - 1) / cell;
+    this->sharedCellsHorizontally = (width + cell - 1) / cell;
+
+    // Summing the votes per cell only pays off if a cell receives more votes
+    // from its pixels than it has histogram slots to add to a window
+    if (method == 1) {
+        numberOfSlots = 4 * numberOfOrientationBins;
+        numberOfVotes = 8 * cell * cell;
+    }
+    else {
+        numberOfSlots = 9 * 18;
+        numberOfVotes = 4 * cell * cell;
+    }
+    this->sharedCells = windowStepVertical % cell == 0 &&
+                        windowStepHorizontal % cell == 0 &&
+                        numberOfSlots < numberOfVotes;
+    if (sharedCells)
+        cellContributions = (double *)calloc(sharedCellsVertically *
+                                             sharedCellsHorizontally *
+                                             numberOfSlots, sizeof(double));
+
+    if (method == 1) {
+        unsigned int signedOrUnsignedGradients = enableSignedGradients;
+        double binsSize = (1 + (signedOrUnsignedGradients == 1)) *
+                          pi / numberOfOrientationBins;
+        gradientMagnitudes = new float[height * width];
+        gradientOrientations = new float[height * width];
+        for (y = 0; y < height; y++) {
+            for (x = 0; x < width; x++) {
+                unsigned int index = y + height * x;
+                dalalTriggsGradient(rowFrom + y, columnFrom + x, false, false,
+                                    false, false, &gradientMagnitudes[index],
+                                    &gradientOrientations[index]);
+                if (!sharedCells)
+                    continue;
+                dalalTriggsVotes(x, y, gradientMagnitudes[index],
+                                 gradientOrientations[index],
+                                 numberOfOrientationBins, cell, binsSize, &x1,
+                                 &y1, &bin1, &bin2, votes);
+                double *contributions = cellContributions +
+                    (x1 * sharedCellsVertically + y1) * numberOfSlots;
+                for (slot = 0; slot < 4; slot++) {
+                    contributions[slot * numberOfOrientationBins + bin1] +=
+                        votes[2 * slot];
+                    contributions[slot * numberOfOrientationBins + bin2] +=
+                        votes[2 * slot + 1];
+                }
+            }
+        }
+    }
+    else {
+        gradientStrengths = new double[height * width];
+        gradientBins = new int[height * width];
+        for (x = 0; x < width; x++) {
+            for (y = 0; y < height; y++) {
+                unsigned int index = y + height * x;
+                zhuRamananGradient(rowFrom + y, columnFrom + x,
+                                   &gradientStrengths[index],
+                                   &gradientBins[index]);
+                if (!sharedCells)
+                    continue;
+                double v = gradientStrengths[index];
+                double xp = ((double)x + 0.5) / (double)cell - 0.5;
+                double yp = ((double)y + 0.5) / (double)cell - 0.5;
+                int ixp = (int)floor(xp);
+                int iyp = (int)floor(yp);
+                double vx0 = xp - ixp;
+                double vy0 = yp - iyp;
+                double vx1 = 1.0 - vx0;
+                double vy1 = 1.0 - vy0;
+                // slots of the 3x3 neighbouring cells, column-major
+                slot = 3 * (ixp - x / cell + 1) + (iyp - y / cell + 1);
+                bin = gradientBins[index];
+                double *contributions = cellContributions +
+                    ((x / cell) * sharedCellsVertically + y / cell) *
+                    numberOfSlots + bin;
+                contributions[18 * slot] += vx1 * vy1 * v;
+                contributions[18 * (slot + 3)] += vx0 * vy1 * v;
+                contributions[18 * (slot + 1)] += vx1 * vy0 * v;
+                contributions[18 * (slot + 4)] += vx0 * vy0 * v;
+            }
+        }
+    }
+    return true;
+}
+
+
+void HOG::applyShared(int rowFrom, int columnFrom, double *descriptorVector) {
+    if (this->method == 1)
+        dalalTriggsShared(rowFrom, columnFrom, descriptorVector);
+    else
+        zhuRamananShared(rowFrom, columnFrom, descriptorVector);
+}
+
+
+void HOG::releaseShared() {
+    delete[] gradientMagnitudes;
+    delete[] gradientOrientations;
+    delete[] gradientStrengths;
+    delete[] gradientBins;
+    free(cellContributions);
+    sharedImage = NULL;
+    gradientMagnitudes = NULL;
+    gradientOrientations = NULL;
+    gradientStrengths = NULL;
+    gradientBins = NULL;
+    cellContributions = NULL;
+}
+
+
+// The gradient of the dominant channel at pixel (y, x) of the image, as
+// computed by DalalTriggsHOGdescriptor for a window that has the given
+// borders at that pixel
+void HOG::dalalTriggsGradient(int y, int x, bool firstRow, bool lastRow,
+                              bool firstColumn, bool lastColumn,
+                              float *gradientMagnitude,
+                              float *gradientOrientation) {
+    int imageHeight = (int)sharedImageHeight;
+    int imageWidth = (int)sharedImageWidth;
+    unsigned int signedOrUnsignedGradients = enableSignedGradients;
+    float dx, dy, tempMagnitude;
+
+    for (unsigned int z = 0; z < numberOfChannels; z++) {
+        if (firstColumn)
+            dx = paddedPixel(sharedImage, imageHeight, imageWidth, y, x + 1, z);
+        else if (lastColumn)
+            dx = -paddedPixel(sharedImage, imageHeight, imageWidth, y, x - 1,
+                              z);
+        else
+            dx = paddedPixel(sharedImage, imageHeight, imageWidth, y, x + 1,
+                             z) -
+                 paddedPixel(sharedImage, imageHeight, imageWidth, y, x - 1,
+                             z);
+
+        if (firstRow)
+            dy = -paddedPixel(sharedImage, imageHeight, imageWidth, y + 1, x,
+                              z);
+        else if (lastRow)
+            dy = paddedPixel(sharedImage, imageHeight, imageWidth, y - 1, x, z);
+        else
+            dy = -paddedPixel(sharedImage, imageHeight, imageWidth, y + 1, x,
+                              z) +
+                 paddedPixel(sharedImage, imageHeight, imageWidth, y - 1, x,
+                             z);
+
+        // choose dominant channel based on magnitude
+        tempMagnitude = sqrt(dx * dx + dy * dy);
+        if (z == 0 || tempMagnitude > *gradientMagnitude) {
+            *gradientMagnitude = tempMagnitude;
+            *gradientOrientation = atan2(dy, dx);
+        }
+    }
+
+    if (*gradientOrientation < 0)
+        *gradientOrientation += pi + (signedOrUnsignedGradients == 1) * pi;
+}
+
+
+// The gradient strength and orientation bin of the dominant channel at pixel
+// (y, x) of the image, as computed by ZhuRamananHOGdescriptor
+void HOG::zhuRamananGradient(int y, int x, double *gradientStrength,
+                             int *gradientBin) {
+    // unit vectors used to compute gradient orientation
+    double uu[9] = {1.0000, 0.9397, 0.7660, 0.500, 0.1736, -0.1736, -0.5000,
+                    -0.7660, -0.9397};
+    double vv[9] = {0.0000, 0.3420, 0.6428, 0.8660, 0.9848, 0.9848, 0.8660,
+                    0.6428, 0.3420};
+    int imageHeight = (int)sharedImageHeight;
+    int imageWidth = (int)sharedImageWidth;
+
+    double dy = paddedPixel(sharedImage, imageHeight, imageWidth, y + 1, x, 0) -
+                paddedPixel(sharedImage, imageHeight, imageWidth, y - 1, x, 0);
+    double dx = paddedPixel(sharedImage, imageHeight, imageWidth, y, x + 1, 0) -
+                paddedPixel(sharedImage, imageHeight, imageWidth, y, x - 1, 0);
+    double v = dx * dx + dy * dy;
+    for (unsigned int z = 1; z < numberOfChannels; z++) {
+        double dy2 =
+            paddedPixel(sharedImage, imageHeight, imageWidth, y + 1, x, z) -
+            paddedPixel(sharedImage, imageHeight, imageWidth, y - 1, x, z);
+        double dx2 =
+            paddedPixel(sharedImage, imageHeight, imageWidth, y, x + 1, z) -
+            paddedPixel(sharedImage, imageHeight, imageWidth, y, x - 1, z);
+        double v2 = dx2 * dx2 + dy2 * dy2;
+        // pick channel with strongest gradient
+        if (v2 > v) {
+            v = v2;
+            dx = dx2;
+            dy = dy2;
+        }
+    }
+
+    // snap to one of 18 orientations
+    double best_dot = 0;
+    int best_o = 0;
+    for (int o = 0; o < 9; o++) {
+        double dot = uu[o] * dx + vv[o] * dy;
+        if (dot > best_dot) {
+            best_dot = dot;
+            best_o = o;
+        }
+        else if (-dot > best_dot) {
+            best_dot = - dot;
+            best_o = o + 9;
+        }
+    }
+    *gradientStrength = sqrt(v);
+    *gradientBin = best_o;
+}
+
+
+// DalalTriggsHOGdescriptor of the window with top-left corner (rowFrom,
+// columnFrom) computed from the shared gradients
+void HOG::dalalTriggsShared(int rowFrom, int columnFrom,
+                            double *descriptorVector) {
+    unsigned int signedOrUnsignedGradients = enableSignedGradients;
+    unsigned int cell = cellHeightAndWidthInPixels,
+                 block = blockHeightAndWidthInCells,
+                 numberOfBins = numberOfOrientationBins;
+    unsigned int hist1 = 2 + (windowHeight / cell);
+    unsigned int hist2 = 2 + (windowWidth / cell);
+    unsigned int cellsVertically = (windowHeight + cell - 1) / cell;
+    unsigned int cellsHorizontally = (windowWidth + cell - 1) / cell;
+    double binsSize = (1 + (signedOrUnsignedGradients == 1)) *
+                      pi / numberOfOrientationBins;
+    int offsetY = rowFrom - sharedRowFrom;
+    int offsetX = columnFrom - sharedColumnFrom;
+    int x1, y1, bin1;
+    unsigned int x, y, i, j, k, bin2, slot, descriptorIndex = 0;
+    float gradientMagnitude, gradientOrientation, blockNorm;
+    double votes[8];
+
+    double *h = (double *)calloc(hist1 * hist2 * numberOfBins,
+                                 sizeof(double));
+    double *blockValues = (double *)calloc(block * block * numberOfBins,
+                                           sizeof(double));
+
+    for (y = 0; y < windowHeight; y++) {
+        for (x = 0; x < windowWidth; x++) {
+            // the votes of the inner cells are added from the shared cells
+            if (sharedCells && y / cell > 0 && y / cell < cellsVertically - 1 &&
+                x / cell > 0 && x / cell < cellsHorizontally - 1)
+                continue;
+            bool firstRow = y == 0, lastRow = y == windowHeight - 1,
+                 firstColumn = x == 0, lastColumn = x == windowWidth - 1;
+            if (firstRow || lastRow || firstColumn || lastColumn) {
+                // the window's own zero padding changes its border gradients
+                dalalTriggsGradient(rowFrom + y, columnFrom + x, firstRow,
+                                    lastRow, firstColumn, lastColumn,
+                                    &gradientMagnitude, &gradientOrientation);
+            }
+            else {
+                unsigned int index = (offsetY + y) + sharedHeight *
+                                                     (offsetX + x);
+                gradientMagnitude = gradientMagnitudes[index];
+                gradientOrientation = gradientOrientations[index];
+            }
+            dalalTriggsVotes(x, y, gradientMagnitude, gradientOrientation,
+                             numberOfBins, cell, binsSize, &x1, &y1, &bin1,
+                             &bin2, votes);
+            for (slot = 0; slot < 4; slot++) {
+                double *target = h + ((y1 + slot % 2) * hist2 + x1 +
+                                      slot / 2) * numberOfBins;
+                target[bin1] += votes[2 * slot];
+                target[bin2] += votes[2 * slot + 1];
+            }
+        }
+    }
+
+    if (sharedCells) {
+        unsigned int cellY = offsetY / cell, cellX = offsetX / cell;
+        for (x = 1; x + 1 < cellsHorizontally; x++) {
+            for (y = 1; y + 1 < cellsVertically; y++) {
+                double *contributions = cellContributions +
+                    ((cellX + x) * sharedCellsVertically + cellY + y) *
+                    4 * numberOfBins;
+                for (slot = 0; slot < 4; slot++) {
+                    double *target = h + ((y + slot % 2) * hist2 + x +
+                                          slot / 2) * numberOfBins;
+                    for (k = 0; k < numberOfBins; k++)
+                        target[k] += contributions[slot * numberOfBins + k];
+                }
+            }
+        }
+    }
+
+    //Block normalization
+    for(x = 1; x < hist2 - block; x++) {
+        for (y = 1; y < hist1 - block; y++) {
+            blockNorm = 0;
+            for (i = 0; i < block; i++)
+                for(j = 0; j < block; j++)
+                    for(k = 0; k < numberOfBins; k++)
+                        blockNorm += h[((y+i) * hist2 + x+j) * numberOfBins + k] *
+                                     h[((y+i) * hist2 + x+j) * numberOfBins + k];
+
+            blockNorm = sqrt(blockNorm);
+            for (i = 0; i < block; i++) {
+                for(j = 0; j < block; j++) {
+                    for(k = 0; k < numberOfBins; k++) {
+                        double *value = &blockValues[(i * block + j) *
+                                                     numberOfBins + k];
+                        if (blockNorm > 0) {
+                            *value = h[((y+i) * hist2 + x+j) * numberOfBins + k] /
+                                     blockNorm;
+                            if (*value > l2normClipping)
+                                *value = l2normClipping;
+                        }
+                        else {
+                            *value = 0;
+                        }
+                    }
+                }
+            }
+
+            blockNorm = 0;
+            for (i = 0; i < block * block * numberOfBins; i++)
+                blockNorm += blockValues[i] * blockValues[i];
+
+            blockNorm = sqrt(blockNorm);
+            for (i = 0; i < block * block * numberOfBins; i++) {
+                if (blockNorm > 0)
+                    descriptorVector[descriptorIndex] =
+                        blockValues[i] / blockNorm;
+                else
+                    descriptorVector[descriptorIndex] = 0.0;
+                descriptorIndex++;
+            }
+        }
+    }
+    free(h);
+    free(blockValues);
+}
+
+
+// ZhuRamananHOGdescriptor of the window with top-left corner (rowFrom,
+// columnFrom) computed from the shared gradients
+void HOG::zhuRamananShared(int rowFrom, int columnFrom,
+                           double *descriptorMatrix) {
+    int cell = (int)cellHeightAndWidthInPixels;
+    int imageHeight = (int)windowHeight, imageWidth = (int)windowWidth;
+    int offsetY = rowFrom - sharedRowFrom;
+    int offsetX = columnFrom - sharedColumnFrom;
+    int x, y, o;
+    unsigned int slot;
+
+    // memory for caching orientation histograms & their norms
+    int blocks[2];
+    blocks[0] = (int)round((double)imageHeight / (double)cell);
+    blocks[1] = (int)round((double)imageWidth / (double)cell);
+    double *hist = (double *)calloc(blocks[0] * blocks[1] * 18, sizeof(double));
+    double *norm = (double *)calloc(blocks[0] * blocks[1], sizeof(double));
+
+    // memory for HOG features
+    int out[3];
+    out[0] = max(blocks[0]-2, 0);
+    out[1] = max(blocks[1]-2, 0);
+    out[2] = 27+4;
+
+    int visible[2];
+    visible[0] = blocks[0] * cell;
+    visible[1] = blocks[1] * cell;
+
+    for (x = 1; x < visible[1] - 1; x++) {
+        for (y = 1; y < visible[0] - 1; y++) {
+            // the votes of the inner cells are added from the shared cells
+            if (sharedCells && y / cell > 0 && y / cell < blocks[0] - 1 &&
+                x / cell > 0 && x / cell < blocks[1] - 1)
+                continue;
+            unsigned int index = (offsetY + min(y, imageHeight-2)) +
+                                 sharedHeight *
+                                 (offsetX + min(x, imageWidth-2));
+            double v = gradientStrengths[index];
+            int best_o = gradientBins[index];
+
+            // add to 4 histograms around pixel using linear interpolation
+            double xp = ((double)x + 0.5) / (double)cell - 0.5;
+            double yp = ((double)y + 0.5) / (double)cell - 0.5;
+            int ixp = (int)floor(xp);
+            int iyp = (int)floor(yp);
+            double vx0 = xp - ixp;
+            double vy0 = yp - iyp;
+            double vx1 = 1.0 - vx0;
+            double vy1 = 1.0 - vy0;
+
+            if (ixp >= 0 && iyp >= 0)
+                *(hist + ixp*blocks[0] + iyp + best_o*blocks[0]*blocks[1])
+                    += vx1 * vy1 * v;
+
+            if (ixp+1 < blocks[1] && iyp >= 0)
+                *(hist + (ixp+1)*blocks[0] + iyp + best_o*blocks[0]*blocks[1])
+                    += vx0 * vy1 * v;
+
+            if (ixp >= 0 && iyp+1 < blocks[0])
+                *(hist + ixp*blocks[0] + (iyp+1) + best_o*blocks[0]*blocks[1])
+                    += vx1 * vy0 * v;
+
+            if (ixp+1 < blocks[1] && iyp+1 < blocks[0])
+                *(hist + (ixp+1)*blocks[0] + (iyp+1) + best_o*blocks[0]*blocks[1])
+                    += vx0 * vy0 * v;
+        }
+    }
+
+    if (sharedCells) {
+        int cellY = offsetY / cell, cellX = offsetX / cell;
+        for (x = 1; x < blocks[1] - 1; x++) {
+            for (y = 1; y < blocks[0] - 1; y++) {
+                double *contributions = cellContributions +
+                    ((cellX + x) * sharedCellsVertically + cellY + y) * 9 * 18;
+                for (slot = 0; slot < 9; slot++) {
+                    double *target = hist + (x + slot / 3 - 1) * blocks[0] +
+                                     y + slot % 3 - 1;
+                    for (o = 0; o < 18; o++)
+                        target[o * blocks[0] * blocks[1]] +=
+                            contributions[slot * 18 + o];
+                }
+            }
+        }
+    }
+
+    // compute energy in each block by summing over orientations
+    for (int o = 0; o < 9; o++) {
+        double *src1 = hist + o * blocks[0] * blocks[1];
+        double *src2 = hist + (o + 9) * blocks[0] * blocks[1];
+        double *dst = norm;
+        double *end = norm + blocks[1] * blocks[0];
+        while (dst < end) {
+            *(dst++) += (*src1 + *src2) * (*src1 + *src2);
+            src1++;
+            src2++;
+        }
+    }
+
+    // compute features
+    for (x = 0; x < out[1]; x++) {
+        for (y = 0; y < out[0]; y++) {
+            double *dst = descriptorMatrix + x * out[0] + y;
+            double *src, *p, n1, n2, n3, n4;
+
+            p = norm + (x + 1) * blocks[0] + y + 1;
+            n1 = 1.0 / sqrt(*p + *(p + 1) + *(p + blocks[0]) +
+                            *(p + blocks[0] + 1) + eps);
+            p = norm + (x + 1) * blocks[0] + y;
+            n2 = 1.0 / sqrt(*p + *(p + 1) + *(p + blocks[0]) +
+                            *(p + blocks[0] + 1) + eps);
+            p = norm + x * blocks[0] + y + 1;
+            n3 = 1.0 / sqrt(*p + *(p + 1) + *(p + blocks[0]) +
+                            *(p + blocks[0] + 1) + eps);
+            p = norm + x * blocks[0] + y;
+            n4 = 1.0 / sqrt(*p + *(p + 1) + *(p + blocks[0]) +
+                            *(p + blocks[0] + 1) + eps);
+
+            double t1 = 0;
+            double t2 = 0;
+            double t3 = 0;
+            double t4 = 0;
+
+            // contrast-sensitive features
+            src = hist + (x + 1) * blocks[0] + (y + 1);
+            for (int o = 0; o < 18; o++) {
+                double h1 = min(*src * n1, 0.2);
+                double h2 = min(*src * n2, 0.2);
+                double h3 = min(*src * n3, 0.2);
+                double h4 = min(*src * n4, 0.2);
+                *dst = 0.5 * (h1 + h2 + h3 + h4);
+                t1 += h1;
+                t2 += h2;
+                t3 += h3;
+                t4 += h4;
+                dst += out[0] * out[1];
+                src += blocks[0] * blocks[1];
+            }
+
+            // contrast-insensitive features
+            src = hist + (x + 1) * blocks[0] + (y + 1);
+            for (int o = 0; o < 9; o++) {
+                double sum = *src + *(src + 9 * blocks[0] * blocks[1]);
+                double h1 = min(sum * n1, 0.2);
+                double h2 = min(sum * n2, 0.2);
+                double h3 = min(sum * n3, 0.2);
+                double h4 = min(sum * n4, 0.2);
+                *dst = 0.5 * (h1 + h2 + h3 + h4);
+                dst += out[0] * out[1];
+                src += blocks[0] * blocks[1];
+            }
+
+            // texture features
+            *dst = 0.2357 * t1;
+            dst += out[0] * out[1];
+            *dst = 0.2357 * t2;
+            dst += out[0] * out[1];
+            *dst = 0.2357 * t3;
+            dst += out[0] * out[1];
+            *dst = 0.2357 * t4;
+        }
+    }
+    free(hist);
+    free(norm);
+}
+
+
 // ZHU & RAMANAN: Face Detection, Pose Estimation and Landmark Localization
 //                in the Wild
 void ZhuRamananHOGdescriptor(double *inputImage,
@@ -29,6 +29,13 @@ public:
 	    double l2normClipping);
 	virtual ~HOG();
 	void apply(double *windowImage, double *descriptorVector);
+	bool prepareShared(double *image, unsigned int imageHeight,
+	                   unsigned int imageWidth, int rowFrom, int columnFrom,
+	                   unsigned int height, unsigned int width,
+	                   unsigned int windowStepVertical,
+	                   unsigned int windowStepHorizontal);
+	void applyShared(int rowFrom, int columnFrom, double *descriptorVector);
+	void releaseShared();
 	unsigned int descriptorLengthPerBlock, numberOfBlocksPerWindowHorizontally,
 	             numberOfBlocksPerWindowVertically;
 private:
@@ -37,6 +44,26 @@ private:
                  numberOfChannels;
     bool enableSignedGradients;
     double l2normClipping;
+    // state shared between windows (see prepareShared)
+    double *sharedImage;
+    unsigned int sharedImageHeight, sharedImageWidth, sharedHeight,
+                 sharedWidth, sharedCellsVertically, sharedCellsHorizontally;
+    int sharedRowFrom, sharedColumnFrom;
+    bool sharedCells;
+    float *gradientMagnitudes, *gradientOrientations;
+    double *gradientStrengths;
+    int *gradientBins;
+    double *cellContributions;
+    void dalalTriggsGradient(int y, int x, bool firstRow, bool lastRow,
+                             bool firstColumn, bool lastColumn,
+                             float *gradientMagnitude,
+                             float *gradientOrientation);
+    void zhuRamananGradient(int y, int x, double *gradientStrength,
+                            int *gradientBin);
+    void dalalTriggsShared(int rowFrom, int columnFrom,
+                           double *descriptorVector);
+    void zhuRamananShared(int rowFrom, int columnFrom,
+                          double *descriptorMatrix);
 };
 
 void ZhuRamananHOGdescriptor(double *inputImage,
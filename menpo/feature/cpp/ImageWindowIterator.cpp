@@ -35,63 +35,106 @@ ImageWindowIterator::~ImageWindowIterator() {
 }
 
 
-void ImageWindowIterator::apply(double *outputImage, int *windowsCenters, WindowFeature *windowFeature) {
-	int rowCenter, rowFrom, rowTo, columnCenter, columnFrom, columnTo, i, j, k;
-	unsigned int windowIndexHorizontal, windowIndexVertical, d;
-	int imageHeight = (int)_imageHeight;
-	int imageWidth = (int)_imageWidth;
-	int numberOfChannels = (int)_numberOfChannels;
-
-    // Initialize temporary matrices
-	double* windowImage = new double[_windowHeight*_windowWidth*_numberOfChannels];
-	double* descriptorVector = new double[windowFeature->descriptorLengthPerWindow];
-
-    // Main loop
-    for (windowIndexVertical = 0; windowIndexVertical < _numberOfWindowsVertically; windowIndexVertical++) {
-        for (windowIndexHorizontal = 0; windowIndexHorizontal < _numberOfWindowsHorizontally; windowIndexHorizontal++) {
-            // Find window limits
-            if (!_enablePadding) {
-                rowFrom = windowIndexVertical*_windowStepVertical;
-                rowTo = rowFrom + _windowHeight - 1;
-                rowCenter = rowFrom + (int)round((double)_windowHeight / 2.0) - 1;
-                columnFrom = windowIndexHorizontal*_windowStepHorizontal;
-                columnTo = columnFrom + _windowWidth - 1;
-                columnCenter = columnFrom + (int)round((double)_windowWidth / 2.0) - 1;
-            }
-            else {
-                rowCenter = windowIndexVertical*_windowStepVertical;
-                rowFrom = rowCenter - (int)round((double)_windowHeight / 2.0) + 1;
-                rowTo = rowFrom + _windowHeight - 1;
-                columnCenter = windowIndexHorizontal*_windowStepHorizontal;
-                columnFrom = columnCenter - (int)ceil((double)_windowWidth / 2.0) + 1;
-                columnTo = columnFrom + _windowWidth - 1;
-            }
+void ImageWindowIterator::windowLimits(unsigned int windowIndexVertical, unsigned int windowIndexHorizontal,
+        int *rowFrom, int *rowTo, int *rowCenter, int *columnFrom, int *columnTo,
+        int *columnCenter) {
+    if (!_enablePadding) {
+        *rowFrom = windowIndexVertical*_windowStepVertical;
+        *rowTo = *rowFrom + _windowHeight - 1;
+        *rowCenter = *rowFrom + (int)round((double)_windowHeight / 2.0) - 1;
+        *columnFrom = windowIndexHorizontal*_windowStepHorizontal;
+        *columnTo = *columnFrom + _windowWidth - 1;
+        *columnCenter = *columnFrom + (int)round((double)_windowWidth / 2.0) - 1;
+    }
+    else {
+        *rowCenter = windowIndexVertical*_windowStepVertical;
+        *rowFrom = *rowCenter - (int)round((double)_windowHeight / 2.0) + 1;
+        *rowTo = *rowFrom + _windowHeight - 1;
+        *columnCenter = windowIndexHorizontal*_windowStepHorizontal;
+        *columnFrom = *columnCenter - (int)ceil((double)_windowWidth / 2.0) + 1;
+        *columnTo = *columnFrom + _windowWidth - 1;
+    }
+}
+
+
+void ImageWindowIterator::apply(double *outputImage, int *windowsCenters, WindowFeature *windowFeature,
+        bool enableSharedComputation, unsigned int numberOfThreads) {
+	int rowCenter, rowFrom, rowTo, columnCenter, columnFrom, columnTo;
+	int lastRowCenter, lastRowFrom, lastRowTo, lastColumnCenter, lastColumnFrom, lastColumnTo;
+	int numberOfWindowsVertically = (int)_numberOfWindowsVertically;
+	bool shared = false;
+
+    // Let the feature precompute whatever the windows have in common over the
+    // area spanned by the first and last windows
+    if (enableSharedComputation) {
+        windowLimits(0, 0, &rowFrom, &rowTo, &rowCenter, &columnFrom, &columnTo, &columnCenter);
+        windowLimits(_numberOfWindowsVertically - 1, _numberOfWindowsHorizontally - 1,
+                     &lastRowFrom, &lastRowTo, &lastRowCenter, &lastColumnFrom, &lastColumnTo,
+                     &lastColumnCenter);
+        shared = windowFeature->prepareShared(_image, _imageHeight, _imageWidth, rowFrom, columnFrom,
+                                              lastRowTo - rowFrom + 1, lastColumnTo - columnFrom + 1,
+                                              _windowStepVertical, _windowStepHorizontal);
+    }
+
+    // Every window writes to its own part of the output, so the rows of
+    // windows are split between the threads (if compiled with OpenMP)
+    #pragma omp parallel num_threads(numberOfThreads)
+    {
+        int rowCenter, rowFrom, rowTo, columnCenter, columnFrom, columnTo, i, j, k;
+        int windowIndexVertical;
+        unsigned int windowIndexHorizontal, d;
+        int imageHeight = (int)_imageHeight;
+        int imageWidth = (int)_imageWidth;
+        int numberOfChannels = (int)_numberOfChannels;
+
+        // Initialize temporary matrices (one set per thread)
+        double* windowImage = NULL;
+        if (!shared)
+            windowImage = new double[_windowHeight*_windowWidth*_numberOfChannels];
+        double* descriptorVector = new double[windowFeature->descriptorLengthPerWindow];
+
+        // Main loop
+        #pragma omp for schedule(dynamic)
+        for (windowIndexVertical = 0; windowIndexVertical < numberOfWindowsVertically; windowIndexVertical++) {
+            for (windowIndexHorizontal = 0; windowIndexHorizontal < _numberOfWindowsHorizontally; windowIndexHorizontal++) {
+                // Find window limits
+                windowLimits(windowIndexVertical, windowIndexHorizontal, &rowFrom, &rowTo, &rowCenter,
+                             &columnFrom, &columnTo, &columnCenter);
+
+                if (shared) {
+                    // Compute descriptor of window from the shared computation
+                    windowFeature->applyShared(rowFrom, columnFrom, descriptorVector);
+                }
+                else {
+                    // Copy window image
+                    for (i = rowFrom; i <= rowTo; i++) {
+                        for (j = columnFrom; j <= columnTo; j++) {
+                            if (i < 0 || i > imageHeight-1 || j < 0 || j > imageWidth-1)
+                                for (k = 0; k < numberOfChannels; k++)
+                                    windowImage[(i-rowFrom)+_windowHeight*((j-columnFrom)+_windowWidth*k)] = 0;
+                            else
+                                for (k=0; k < numberOfChannels; k++)
+                                    windowImage[(i-rowFrom)+_windowHeight*((j-columnFrom)+_windowWidth*k)] = _image[i+imageHeight*(j+imageWidth*k)];
+                        }
+                    }
 
-            // Copy window image
-			for (i = rowFrom; i <= rowTo; i++) {
-				for (j = columnFrom; j <= columnTo; j++) {
-					if (i < 0 || i > imageHeight-1 || j < 0 || j > imageWidth-1)
-						for (k = 0; k < numberOfChannels; k++)
-							windowImage[(i-rowFrom)+_windowHeight*((j-columnFrom)+_windowWidth*k)] = 0;
-					else
-						for (k=0; k < numberOfChannels; k++)
-							windowImage[(i-rowFrom)+_windowHeight*((j-columnFrom)+_windowWidth*k)] = _image[i+imageHeight*(j+imageWidth*k)];
-				}
-			}
-
-            // Compute descriptor of window
-            windowFeature->apply(windowImage, descriptorVector);
-
-            // Store results
-            for (d = 0; d < windowFeature->descriptorLengthPerWindow; d++)
-            	outputImage[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally*d)] = descriptorVector[d];
-            windowsCenters[windowIndexVertical+_numberOfWindowsVertically*windowIndexHorizontal] = rowCenter;
-            windowsCenters[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally)] = columnCenter;
+                    // Compute descriptor of window
+                    windowFeature->apply(windowImage, descriptorVector);
+                }
+
+                // Store results
+                for (d = 0; d < windowFeature->descriptorLengthPerWindow; d++)
+                    outputImage[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally*d)] = descriptorVector[d];
+                windowsCenters[windowIndexVertical+_numberOfWindowsVertically*windowIndexHorizontal] = rowCenter;
+                windowsCenters[windowIndexVertical+_numberOfWindowsVertically*(windowIndexHorizontal+_numberOfWindowsHorizontally)] = columnCenter;
+            }
         }
+
+        // Free temporary matrices
+        delete[] windowImage;
+        delete[] descriptorVector;
     }
 
-    // Free temporary matrices
-    delete[] windowImage;
-    delete[] descriptorVector;
+    if (shared)
+        windowFeature->releaseShared();
 }
-
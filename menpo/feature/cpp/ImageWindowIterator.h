@@ -12,7 +12,11 @@ public:
 	        unsigned int windowHeight, unsigned int windowWidth, unsigned int windowStepHorizontal,
 			unsigned int windowStepVertical, bool enablePadding);
 	virtual ~ImageWindowIterator();
-	void apply(double *outputImage, int *windowsCenters, WindowFeature *windowFeature);
+	void apply(double *outputImage, int *windowsCenters, WindowFeature *windowFeature,
+	        bool enableSharedComputation, unsigned int numberOfThreads);
+	void windowLimits(unsigned int windowIndexVertical, unsigned int windowIndexHorizontal,
+	        int *rowFrom, int *rowTo, int *rowCenter, int *columnFrom, int *columnTo,
+	        int *columnCenter);
 private:
 	double *_image;
 };
@@ -6,3 +6,21 @@ WindowFeature::WindowFeature() {
 
 WindowFeature::~WindowFeature() {
 }
+
+bool WindowFeature::prepareShared(double *image, unsigned int imageHeight,
+                                  unsigned int imageWidth, int rowFrom,
+                                  int columnFrom, unsigned int height,
+                                  unsigned int width,
+                                  unsigned int windowStepVertical,
+                                  unsigned int windowStepHorizontal) {
+    // by default there is nothing to share, so every window is computed
+    // independently with apply()
+    return false;
+}
+
+void WindowFeature::applyShared(int rowFrom, int columnFrom,
+                                double *descriptorVector) {
+}
+
+void WindowFeature::releaseShared() {
+}
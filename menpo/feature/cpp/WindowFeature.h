@@ -9,5 +9,19 @@ public:
 	WindowFeature();
 	virtual ~WindowFeature();
 	virtual void apply(double *windowImage, double *descriptorVector) = 0;
+	// Optional image-level computation that is shared by all the windows.
+	// A feature that supports it returns true from prepareShared() and then
+	// computes each window with applyShared(), given the window's top-left
+	// corner in image coordinates (which may lie outside the image when
+	// padding is enabled). Pixels outside the image are zero.
+	virtual bool prepareShared(double *image, unsigned int imageHeight,
+	                           unsigned int imageWidth, int rowFrom,
+	                           int columnFrom, unsigned int height,
+	                           unsigned int width,
+	                           unsigned int windowStepVertical,
+	                           unsigned int windowStepHorizontal);
+	virtual void applyShared(int rowFrom, int columnFrom,
+	                         double *descriptorVector);
+	virtual void releaseShared();
 	unsigned int descriptorLengthPerWindow;
 };
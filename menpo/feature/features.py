@@ -2,6 +2,7 @@ import itertools
 import numpy as np
 scipy_gaussian_filter = None  # expensive
 
+from menpo.base import float_dtype
 from .base import ndfeature, winitfeature
 from .windowiterator import WindowIterator
 
@@ -46,7 +47,7 @@ def gaussian_filter(pixels, sigma):
     global scipy_gaussian_filter
     if scipy_gaussian_filter is None:
         from scipy.ndimage import gaussian_filter as scipy_gaussian_filter
-    output = np.empty(pixels.shape)
+    output = np.empty(pixels.shape, dtype=float_dtype(pixels.dtype))
     for dim in range(pixels.shape[2]):
         scipy_gaussian_filter(pixels[..., dim], sigma, output=output[..., dim])
     return output
@@ -57,10 +58,11 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         cell_size=8, block_size=2, signed_gradient=True, l2_norm_clip=0.2,
         window_height=1, window_width=1, window_unit='blocks',
         window_step_vertical=1, window_step_horizontal=1,
-        window_step_unit='pixels', padding=True, verbose=False):
+        window_step_unit='pixels', padding=True, n_threads=1, verbose=False):
     r"""
     Computes a 2-dimensional HOG features image with k number of channels, of
-    size `(M, N, C)` and data type `np.float`.
+    size `(M, N, C)` and the floating point data type of the input (or the
+    :map:`default_dtype` for integer input).
 
     Parameters
     ----------
@@ -136,6 +138,11 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         Flag that if enabled, it constrains landmarks that ended up outside of
         the features image bounds.
 
+    n_threads : int
+        The number of threads between which the rows of windows are split.
+        The GIL is released during the computation. Requires menpo to be
+        built with OpenMP, otherwise a single thread is used.
+
     verbose : bool
         Flag to print HOG related information.
 
@@ -165,6 +172,8 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         Vertical window step must be > 0
     ValueError
         Window step unit must be either pixels or cells
+    ValueError
+        n_threads must be at least 1
     """
     # Parse options
     if mode not in ['dense', 'sparse']:
@@ -179,6 +188,9 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         raise ValueError("Block size (in cells) must be > 0")
     if l2_norm_clip <= 0.0:
         raise ValueError("Value for L2-norm clipping must be > 0.0")
+    if n_threads < 1:
+        raise ValueError('n_threads must be at least 1 - '
+                         '{} given'.format(n_threads))
     if mode == 'dense':
         if window_unit not in ['pixels', 'blocks']:
             raise ValueError("Window unit must be either pixels or blocks")
@@ -202,8 +214,10 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
         if window_step_unit not in ['pixels', 'cells']:
             raise ValueError("Window step unit must be either pixels or cells")
 
-    # Correct input image_data
-    pixels = np.asfortranarray(pixels)
+    # Correct input image_data - the HOG kernel works on a Fortran copy in
+    # double precision, the result is returned in the precision of the input
+    dtype = float_dtype(pixels.dtype)
+    pixels = np.array(pixels, dtype=np.float64, order='F')
     pixels *= 255.
 
     # Dense case
@@ -251,8 +265,10 @@ def hog(pixels, mode='dense', algorithm='dalaltriggs', num_bins=9,
     if verbose:
         print(iterator)
     # Compute HOG
-    return iterator.HOG(algorithm, num_bins, cell_size, block_size,
-                        signed_gradient, l2_norm_clip, verbose)
+    result = iterator.HOG(algorithm, num_bins, cell_size, block_size,
+                          signed_gradient, l2_norm_clip, verbose,
+                          numberOfThreads=n_threads)
+    return result._replace(pixels=result.pixels.astype(dtype, copy=False))
 
     # store parameters
     # hog_image.hog_parameters = {'mode': mode, 'algorithm': algorithm,
@@ -322,7 +338,8 @@ def igo(pixels, double_angles=False, verbose=False):
     grad_orient = np.angle(grad[..., ::2] + 1j * grad[..., 1::2])
     # compute igo image
     igo_pixels = np.empty((pixels.shape[0], pixels.shape[1],
-                           pixels.shape[-1] * feat_channels))
+                           pixels.shape[-1] * feat_channels),
+                          dtype=float_dtype(pixels.dtype))
     igo_pixels[..., ::feat_channels] = np.cos(grad_orient)
     igo_pixels[..., 1::feat_channels] = np.sin(grad_orient)
     if double_angles:
@@ -392,7 +409,8 @@ def es(image_data, verbose=False):
     # compute es image
     grad_abs = grad_abs + np.median(grad_abs)
     es_pixels = np.empty((image_data.shape[0], image_data.shape[1],
-                          image_data.shape[-1] * feat_channels))
+                          image_data.shape[-1] * feat_channels),
+                         dtype=float_dtype(image_data.dtype))
     es_pixels[..., ::feat_channels] = grad[..., ::2] / grad_abs
     es_pixels[..., 1::feat_channels] = grad[..., 1::2] / grad_abs
     # print information
@@ -537,7 +555,7 @@ def daisy(pixels, step=1, radius=15, rings=2, histograms=2, orientations=8,
 @winitfeature
 def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         window_step_vertical=1, window_step_horizontal=1,
-        window_step_unit='pixels', padding=True, verbose=False,
+        window_step_unit='pixels', padding=True, n_threads=1, verbose=False,
         skip_checks=False):
     r"""
     Computes a 2-dimensional LBP features image with N*C number of channels,
@@ -591,6 +609,11 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         ImageWindowIterator object. When padding is enabled, the
         out-of-boundary pixels are set to zero.
 
+    n_threads : `int`, optional
+        The number of threads between which the rows of windows are split.
+        The GIL is released during the computation. Requires menpo to be
+        built with OpenMP, otherwise a single thread is used.
+
     verbose : `bool`, optional
         Flag to print LBP related information.
 
@@ -616,6 +639,8 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         Vertical window step must be > 0
     ValueError
         Window step unit must be either pixels or window
+    ValueError
+        n_threads must be at least 1
     """
     if radius is None:
         radius = range(1, 5)
@@ -657,8 +682,15 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
             raise ValueError("Window step unit must be either pixels or "
                              "window")
 
-    # Correct input image_data
-    pixels = np.asfortranarray(pixels)
+    # always checked, an invalid number of threads reaches the C++ code
+    if n_threads < 1:
+        raise ValueError('n_threads must be at least 1 - '
+                         '{} given'.format(n_threads))
+
+    # Correct input image_data - the LBP kernel works in double precision,
+    # the result is returned in the precision of the input
+    dtype = float_dtype(pixels.dtype)
+    pixels = np.asfortranarray(pixels, dtype=np.float64)
 
     # Parse options
     radius = np.asfortranarray(radius)
@@ -688,7 +720,9 @@ def lbp(pixels, radius=None, samples=None, mapping_type='riu2',
         print(iterator)
 
     # Compute LBP
-    return iterator.LBP(radius, samples, mapping_type, verbose)
+    result = iterator.LBP(radius, samples, mapping_type, verbose,
+                          numberOfThreads=n_threads)
+    return result._replace(pixels=result.pixels.astype(dtype, copy=False))
 
     # # store parameters
     # lbp_image.lbp_parameters = {'radius': radius, 'samples': samples,
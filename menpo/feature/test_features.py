@@ -1,10 +1,12 @@
 import numpy as np
 from numpy.testing import assert_allclose
+from nose.tools import raises
 import random
 import math
 
 from menpo.image import Image, MaskedImage
 from menpo.feature import hog, lbp, es, igo, daisy
+from menpo.feature.windowiterator import WindowIterator
 import menpo.io as mio
 
 
@@ -152,6 +154,43 @@ def test_hog_channels_zhuramanan():
         assert_allclose(hog_img.n_channels, n_channels)
 
 
+def test_hog_shared_computation_matches_per_window():
+    image = np.asfortranarray(np.random.randn(45, 38, 2) * 255)
+    # (algorithm, cell size, window size, window step, padding)
+    cases = [(1, 8, 16, 8, False), (1, 3, 13, 1, True), (1, 4, 24, 4, True),
+             (2, 8, 24, 8, False), (2, 3, 17, 2, True), (2, 4, 20, 4, True)]
+    for algorithm, cell, window, step, padding in cases:
+        iterator = WindowIterator(image, window, window, step, step, padding)
+        per_window = iterator.HOG(algorithm, 9, cell, 2, True, 0.2, False,
+                                  enableSharedComputation=False)
+        shared = iterator.HOG(algorithm, 9, cell, 2, True, 0.2, False)
+        assert_allclose(shared.pixels, per_window.pixels, atol=1e-12)
+        assert_allclose(shared.centres, per_window.centres)
+
+
+def test_hog_n_threads():
+    image = Image(np.random.randn(40, 35, 2))
+    single = hog(image, window_step_vertical=2, window_step_horizontal=3)
+    multi = hog(image, window_step_vertical=2, window_step_horizontal=3,
+                n_threads=3)
+    assert_allclose(multi.pixels, single.pixels)
+
+
+def test_lbp_n_threads():
+    image = Image(np.random.randn(40, 35, 2))
+    assert_allclose(lbp(image, n_threads=3).pixels, lbp(image).pixels)
+
+
+@raises(ValueError)
+def test_hog_n_threads_raises_value_error():
+    hog(Image(np.random.randn(40, 35, 1)), n_threads=0)
+
+
+@raises(ValueError)
+def test_lbp_n_threads_skip_checks_raises_value_error():
+    lbp(Image(np.random.randn(40, 35, 1)), n_threads=0, skip_checks=True)
+
+
 def test_lbp_channels():
     n_cases = 3
     n_combs = np.random.randint(1, 6, [n_cases, 1])
@@ -26,7 +26,8 @@ cdef extern from "cpp/ImageWindowIterator.h":
                             unsigned int windowStepVertical,
                             bool enablePadding)
         void apply(double *outputImage, int *windowsCenters,
-                   WindowFeature *windowFeature)
+                   WindowFeature *windowFeature, bool enableSharedComputation,
+                   unsigned int numberOfThreads) nogil
         unsigned int _numberOfWindowsHorizontally, \
             _numberOfWindowsVertically, _numberOfWindows, _imageWidth, \
             _imageHeight, _numberOfChannels, _windowHeight, _windowWidth, \
@@ -63,6 +64,8 @@ cdef extern from "cpp/LBP.h":
 
 cdef class WindowIterator:
     cdef ImageWindowIterator* iterator
+    # the iterator only holds a pointer to the pixels, so keep them alive
+    cdef np.ndarray image
 
     def __cinit__(self, np.ndarray[np.float64_t, ndim=3] image,
                   unsigned int windowHeight, unsigned int windowWidth,
@@ -70,6 +73,7 @@ cdef class WindowIterator:
                   unsigned int windowStepVertical, bool enablePadding):
         cdef np.ndarray[np.float64_t, ndim=3, mode='fortran'] image_f = \
             np.require(image, requirements='F')
+        self.image = image_f
         self.iterator = new ImageWindowIterator(&image_f[0, 0, 0],
                                                 image.shape[0], image.shape[1],
                                                 image.shape[2], windowHeight,
@@ -82,6 +86,9 @@ cdef class WindowIterator:
             raise ValueError("The window-related options are wrong. "
                              "The number of windows is 0.")
 
+    def __dealloc__(self):
+        del self.iterator
+
     def __str__(self):
         info_str = "Window Iterator:\n" \
                    "  - Input image is {}W x {}H with {} channels.\n" \
@@ -104,7 +111,8 @@ cdef class WindowIterator:
 
     def HOG(self, method, numberOfOrientationBins, cellHeightAndWidthInPixels,
             blockHeightAndWidthInCells, enableSignedGradients,
-            l2normClipping, verbose):
+            l2normClipping, verbose, numberOfThreads=1,
+            enableSharedComputation=True):
         cdef HOG *hog = new HOG(self.iterator._windowHeight,
                                 self.iterator._windowWidth,
                                 self.iterator._numberOfChannels, method,
@@ -167,12 +175,15 @@ cdef class WindowIterator:
                 <int>self.iterator._numberOfWindowsVertically,
                 <int>hog.descriptorLengthPerWindow)
             print info_str
-        self.iterator.apply(&outputImage[0,0,0], &windowsCenters[0,0,0], hog)
+        # gradients and cell histograms are computed once for the whole image
+        # rather than once per window, unless disabled
+        self._apply(&outputImage[0,0,0], &windowsCenters[0,0,0], hog,
+                    enableSharedComputation, numberOfThreads)
         del hog
         return WindowIteratorResult(np.ascontiguousarray(outputImage),
                                     np.ascontiguousarray(windowsCenters))
 
-    def LBP(self, radius, samples, mapping_type, verbose):
+    def LBP(self, radius, samples, mapping_type, verbose, numberOfThreads=1):
         # find unique samples (thus lbp codes mappings)
         uniqueSamples, whichMappingTable = np.unique(samples,
                                                      return_inverse=True)
@@ -239,11 +250,23 @@ cdef class WindowIterator:
                 <int>self.iterator._numberOfWindowsVertically,
                 <int>lbp.descriptorLengthPerWindow)
             print info_str
-        self.iterator.apply(&outputImage[0,0,0], &windowsCenters[0,0,0], lbp)
+        self._apply(&outputImage[0,0,0], &windowsCenters[0,0,0], lbp, False,
+                    numberOfThreads)
         del lbp
         return WindowIteratorResult(np.ascontiguousarray(outputImage),
                                     np.ascontiguousarray(windowsCenters))
 
+    cdef void _apply(self, double *outputImage, int *windowsCenters,
+                     WindowFeature *windowFeature,
+                     bool enableSharedComputation,
+                     unsigned int numberOfThreads):
+        # the windows are computed without the GIL, so that other Python
+        # threads can run while the rows of windows are split between
+        # numberOfThreads threads
+        with nogil:
+            self.iterator.apply(outputImage, windowsCenters, windowFeature,
+                                enableSharedComputation, numberOfThreads)
+
 def _lbp_mapping_table(n_samples, mapping_type='riu2'):
     r"""
     Returns the mapping table for LBP codes in a neighbourhood of n_samples
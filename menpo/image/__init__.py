@@ -1,3 +1,5 @@
 from .base import Image, ImageBoundaryError
 from .boolean import BooleanImage
 from .masked import MaskedImage
+from .compact import CompactImage
+from .interpolation import WarpPlan
@@ -6,12 +6,12 @@ import numpy as np
 import scipy.linalg
 import PIL.Image as PILImage
 
-from menpo.base import Vectorizable
+from menpo.base import Vectorizable, default_dtype, float_dtype
 from menpo.landmark import LandmarkableViewable
-from menpo.transform import (Translation, NonUniformScale,
-                             AlignmentUniformScale, Affine, Rotation)
+from menpo.transform import (Translation, NonUniformScale, Homogeneous,
+                             AlignmentUniformScale, Rotation)
 from menpo.visualize.base import ImageViewer
-from .interpolation import scipy_interpolation, cython_interpolation
+from .interpolation import cython_interpolation, cython_point_interpolation
 from .extract_patches import extract_patches_cython
 
 
@@ -52,6 +52,60 @@ def indices_for_image_of_shape(shape):
     return np.indices(shape).reshape([len(shape), -1]).T
 
 
+def _same_transform(a, b):
+    r"""
+    Whether two transforms are known to be the same - the same object,
+    transforms with equal homogeneous matrices, or transforms of the same
+    type with equal parameters.
+    """
+    if a is b:
+        return True
+    if hasattr(a, 'h_matrix') and hasattr(b, 'h_matrix'):
+        return (a.h_matrix.shape == b.h_matrix.shape and
+                np.array_equal(a.h_matrix, b.h_matrix))
+    if type(a) is type(b) and isinstance(a, Vectorizable):
+        try:
+            a_vector, b_vector = a.as_vector(), b.as_vector()
+        except NotImplementedError:
+            return False
+        return (a_vector.shape == b_vector.shape and
+                np.array_equal(a_vector, b_vector))
+    return False
+
+
+def _validate_plan(plan, image, transform, order, mode, cval,
+                   template_mask=None, template_shape=None):
+    r"""
+    Check that a :map:`WarpPlan` can be used to warp the given image into the
+    given template mask or shape with the given transform and interpolation
+    settings, raising a ValueError if not.
+    """
+    if plan.image_shape != image.shape:
+        raise ValueError(
+            "The warp plan was built for images of shape {}, not {}".format(
+                plan.image_shape, image.shape))
+    if not _same_transform(plan.transform, transform):
+        raise ValueError("The warp plan was built for a different transform")
+    if (plan.order, plan.mode, plan.cval) != (order, mode, cval):
+        raise ValueError(
+            "The warp plan was built for order={}, mode='{}' and cval={}, "
+            "not order={}, mode='{}' and cval={}".format(
+                plan.order, plan.mode, plan.cval, order, mode, cval))
+    if template_mask is not None:
+        if (plan.template_mask is None or
+                plan.template_shape != template_mask.shape or
+                not (plan.template_mask is template_mask or
+                     np.array_equal(plan.template_mask.pixels,
+                                    template_mask.pixels))):
+            raise ValueError("The warp plan was not built for this "
+                             "template mask")
+    elif (plan.template_mask is not None or
+              plan.template_shape != template_shape):
+        raise ValueError("The warp plan was built for a template of shape "
+                         "{}, not {}".format(plan.template_shape,
+                                             template_shape))
+
+
 class Image(Vectorizable, LandmarkableViewable):
     r"""
     An n-dimensional image.
@@ -133,7 +187,7 @@ class Image(Vectorizable, LandmarkableViewable):
         return img
 
     @classmethod
-    def blank(cls, shape, n_channels=1, fill=0, dtype=np.float):
+    def blank(cls, shape, n_channels=1, fill=0, dtype=None):
         r"""
         Returns a blank image.
 
@@ -147,13 +201,16 @@ class Image(Vectorizable, LandmarkableViewable):
         fill : `int`, optional
             The value to fill all pixels with.
         dtype : numpy data type, optional
-            The data type of the image.
+            The data type of the image. If ``None``, the
+            :map:`default_dtype`.
 
         Returns
         -------
         blank_image : :map:`Image`
             A new image of the requested size.
         """
+        if dtype is None:
+            dtype = default_dtype()
         # Ensure that the '+' operator means concatenate tuples
         shape = tuple(np.ceil(shape).astype(np.int))
         if fill == 0:
@@ -373,7 +430,7 @@ class Image(Vectorizable, LandmarkableViewable):
         the operation, in contrast to MaskedImage, where only the masked
         region is used in from_vector{_inplace}() and as_vector().
         """
-        image_data = vector.reshape(self.pixels.shape)
+        image_data = vector.reshape(self.shape + (self.n_channels,))
         if not copy:
             if not image_data.flags.c_contiguous:
                 warn('The copy flag was NOT honoured. A copy HAS been made. '
@@ -579,12 +636,18 @@ class Image(Vectorizable, LandmarkableViewable):
         slices = [slice(int(min_i), int(max_i))
                   for min_i, max_i in
                   zip(list(min_bounded), list(max_bounded))]
-        self.pixels = self.pixels[slices].copy()
+        self._crop_pixels_inplace(slices)
         # update all our landmarks
         lm_translation = Translation(-min_bounded)
         lm_translation.apply_inplace(self.landmarks)
         return self
 
+    def _crop_pixels_inplace(self, slices):
+        r"""
+        Crop the pixels of this image to the given spatial slices.
+        """
+        self.pixels = self.pixels[slices].copy()
+
     def crop(self, min_indices, max_indices,
              constrain_to_boundary=False):
         r"""
@@ -862,7 +925,7 @@ class Image(Vectorizable, LandmarkableViewable):
                                     as_single_array=as_single_array)
 
     def warp_to_mask(self, template_mask, transform, warp_landmarks=False,
-             order=1, mode='constant', cval=0.):
+                     order=1, mode='constant', cval=0., plan=None):
         r"""
         Return a copy of this image warped into a different reference space.
 
@@ -901,6 +964,13 @@ class Image(Vectorizable, LandmarkableViewable):
             Used in conjunction with mode 'constant', the value outside
             the image boundaries.
 
+        plan : :map:`WarpPlan`, optional
+            A plan built for this ``template_mask``, ``transform`` and the
+            shape of this image. If provided, the sample points and
+            interpolation weights are taken from the plan rather than being
+            recomputed. The ``order``, ``mode`` and ``cval`` given must be
+            those of the plan.
+
         Returns
         -------
         warped_image : :map:`MaskedImage`
@@ -911,12 +981,19 @@ class Image(Vectorizable, LandmarkableViewable):
             raise ValueError(
                 "Trying to warp a {}D image with a {}D transform "
                 "(they must match)".format(self.n_dims, transform.n_dims))
-        template_points = template_mask.true_indices()
-        points_to_sample = transform.apply(template_points)
-        # we want to sample each channel in turn, returning a vector of
-        # sampled pixels. Store those in a (n_pixels, n_channels) array.
-        sampled_pixel_values = scipy_interpolation(
-            self.pixels, points_to_sample, order=order, mode=mode, cval=cval)
+        pixels, scale = self._interpolation_pixels()
+        if plan is not None:
+            _validate_plan(plan, self, transform, order, mode, cval,
+                           template_mask=template_mask)
+            sampled_pixel_values = plan.sample(pixels, scale=scale)
+        else:
+            template_points = template_mask.true_indices()
+            points_to_sample = transform.apply(template_points)
+            # sample all channels at once, returning a (n_pixels, n_channels)
+            # array.
+            sampled_pixel_values = cython_point_interpolation(
+                pixels, points_to_sample, order=order, mode=mode,
+                cval=cval, scale=scale)
         # set any nan values to 0
         sampled_pixel_values[np.isnan(sampled_pixel_values)] = 0
         # build a warped version of the image
@@ -929,6 +1006,14 @@ class Image(Vectorizable, LandmarkableViewable):
             warped_image.path = self.path
         return warped_image
 
+    def _interpolation_pixels(self):
+        r"""
+        The pixels that warps sample from, and the factor the samples are
+        multiplied by (``None`` if they are used as they are). Overridden
+        by :map:`CompactImage` to sample its compact pixels directly.
+        """
+        return self.pixels, None
+
     def _build_warped_to_mask(self, template_mask, sampled_pixel_values):
         r"""
         Builds the warped image from the template mask and
@@ -938,12 +1023,13 @@ class Image(Vectorizable, LandmarkableViewable):
         """
         warped_image = MaskedImage.blank(template_mask.shape,
                                          n_channels=self.n_channels,
+                                         dtype=sampled_pixel_values.dtype,
                                          mask=template_mask)
         warped_image.from_vector_inplace(sampled_pixel_values.ravel())
         return warped_image
 
     def warp_to_shape(self, template_shape, transform, warp_landmarks=False,
-                      order=1, mode='constant', cval=0.):
+                      order=1, mode='constant', cval=0., plan=None):
         """
         Return a copy of this image warped into a different reference space.
 
@@ -979,26 +1065,39 @@ class Image(Vectorizable, LandmarkableViewable):
             Used in conjunction with mode 'constant', the value outside
             the image boundaries.
 
+        plan : :map:`WarpPlan`, optional
+            A plan built for this ``template_shape``, ``transform`` and the
+            shape of this image. If provided, the sample points and
+            interpolation weights are taken from the plan rather than being
+            recomputed. The ``order``, ``mode`` and ``cval`` given must be
+            those of the plan.
+
         Returns
         -------
         warped_image : ``type(self)``
             A copy of this image, warped.
 
         """
-        if (isinstance(transform, Affine) and order in range(4) and
-            self.n_dims == 2):
-            # skimage has an optimised Cython interpolation for 2D affine
-            # warps
-            sampled = cython_interpolation(self.pixels, template_shape,
+        template_shape = tuple(template_shape)
+        pixels, scale = self._interpolation_pixels()
+        if plan is not None:
+            _validate_plan(plan, self, transform, order, mode, cval,
+                           template_shape=template_shape)
+            sampled = plan.sample(pixels, scale=scale)
+        elif isinstance(transform, Homogeneous) and self.n_dims == 2:
+            # homogeneous transforms are applied on the fly by the kernel,
+            # saving building the points to sample
+            sampled = cython_interpolation(pixels, template_shape,
                                            transform, order=order,
-                                           mode=mode, cval=cval)
+                                           mode=mode, cval=cval, scale=scale)
         else:
             template_points = indices_for_image_of_shape(template_shape)
             points_to_sample = transform.apply(template_points)
-            # we want to sample each channel in turn, returning a vector of
-            # sampled pixels. Store those in a (n_pixels, n_channels) array.
-            sampled = scipy_interpolation(self.pixels, points_to_sample,
-                                          order=order, mode=mode, cval=cval)
+            # sample all channels at once, returning a (n_pixels, n_channels)
+            # array.
+            sampled = cython_point_interpolation(
+                pixels, points_to_sample, order=order, mode=mode,
+                cval=cval, scale=scale)
         # set any nan values to 0
         sampled[np.isnan(sampled)] = 0
         # build a warped version of the image
@@ -1334,8 +1433,10 @@ class Image(Vectorizable, LandmarkableViewable):
             T = scipy.linalg.inv(np.array([[1.0, 0.956, 0.621],
                                            [1.0, -0.272, -0.647],
                                            [1.0, -1.106, 1.703]]))
-            coef = T[0, :]
-            pixels = np.dot(greyscale.pixels, coef.T)
+            pixels = greyscale.pixels
+            # compute in the precision of the pixels
+            coef = T[0, :].astype(float_dtype(pixels.dtype))
+            pixels = np.dot(pixels, coef.T)
         elif mode == 'average':
             pixels = np.mean(greyscale.pixels, axis=-1)
         elif mode == 'channel':
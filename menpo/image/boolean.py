@@ -290,7 +290,7 @@ class BooleanImage(Image):
 
     # noinspection PyMethodOverriding
     def warp_to_mask(self, template_mask, transform, warp_landmarks=True,
-                     mode='constant', cval=0.):
+                     mode='constant', cval=0., plan=None):
         r"""
         Return a copy of this :map:`BooleanImage` warped into a different
         reference space.
@@ -321,19 +321,26 @@ class BooleanImage(Image):
             Used in conjunction with mode 'constant', the value outside
             the image boundaries.
 
+        plan : :map:`WarpPlan`, optional
+            A plan built for this template, ``transform`` and the shape of
+            this image. Whatever the order of the plan, nearest-neighbour
+            interpolation is used (sharing the plan's sample points).
+
         Returns
         -------
         warped_image : :map:`BooleanImage`
             A copy of this image, warped.
         """
         # enforce the order as 0, for this boolean data, then call super
+        if plan is not None:
+            plan = plan.with_order(0)
         return Image.warp_to_mask(self, template_mask, transform,
                                   warp_landmarks=warp_landmarks,
-                                  order=0, mode=mode, cval=cval)
+                                  order=0, mode=mode, cval=cval, plan=plan)
 
     # noinspection PyMethodOverriding
     def warp_to_shape(self, template_shape, transform, warp_landmarks=True,
-                      mode='constant', cval=0., order=None):
+                      mode='constant', cval=0., order=None, plan=None):
         """
         Return a copy of this :map:`BooleanImage` warped into a different
         reference space.
@@ -365,6 +372,11 @@ class BooleanImage(Image):
             Used in conjunction with mode 'constant', the value outside
             the image boundaries.
 
+        plan : :map:`WarpPlan`, optional
+            A plan built for this template, ``transform`` and the shape of
+            this image. Whatever the order of the plan, nearest-neighbour
+            interpolation is used (sharing the plan's sample points).
+
         Returns
         -------
         warped_image : :map:`BooleanImage`
@@ -373,9 +385,11 @@ class BooleanImage(Image):
         """
         # call the super variant and get ourselves an Image back
         # note that we force the use of order=0 for BooleanImages.
+        if plan is not None:
+            plan = plan.with_order(0)
         warped = Image.warp_to_shape(self, template_shape, transform,
                                      warp_landmarks=warp_landmarks,
-                                     order=0, mode=mode, cval=cval)
+                                     order=0, mode=mode, cval=cval, plan=plan)
         # unfortunately we can't escape copying here, let BooleanImage
         # convert us to np.bool
         boolean_image = BooleanImage(warped.pixels.reshape(template_shape))
@@ -0,0 +1,289 @@
+import numpy as np
+import PIL.Image as PILImage
+
+from menpo.base import float_dtype
+from .base import Image
+from .masked import MaskedImage
+
+
+class CompactImage(Image):
+    r"""
+    An image that keeps its pixels in a compact integer form - typically the
+    ``uint8`` buffer an 8-bit image file decodes to - and normalises them to
+    floating point lazily.
+
+    ``pixels`` returns the normalised pixels (``compact_pixels * scale``, in
+    the :map:`default_dtype`), computed afresh on every access and never
+    stored. As writing to them could never change the image, they are
+    read-only - assign ``pixels`` to change the image. Use :meth:`normalised_pixels` to normalise just a region of the
+    image. Warps (and so rescales, resizes and rotations) sample the compact
+    pixels directly and normalise only the sampled values, and crops slice
+    the compact pixels, so none of these ever hold a normalised copy of the
+    whole image. Everything else sees the normalised pixels through
+    ``pixels``.
+
+    Assigning floating point ``pixels`` to a compact image (as, for
+    instance, :meth:`from_vector_inplace` or the inplace normalisations do)
+    replaces the compact storage by the given floating point pixels, after
+    which the image behaves exactly like an :map:`Image`. Assigning integer
+    ``pixels`` replaces the compact pixels.
+
+    Parameters
+    -----------
+    compact_pixels : ``(M, N ..., Q, C)`` integer `ndarray`
+        Array representing the compact image pixels, with the last axis
+        being channels.
+
+    scale : `float`, optional
+        The factor that normalises the compact pixels.
+
+    copy : `bool`, optional
+        If ``False``, the ``compact_pixels`` will not be copied on
+        assignment. See :map:`Image`.
+
+    Raises
+    ------
+    ValueError
+        If the pixel array is malformed or not of an integer data type.
+    """
+
+    def __init__(self, compact_pixels, scale=1. / 255, copy=True):
+        if not np.issubdtype(compact_pixels.dtype, np.integer):
+            raise ValueError('Compact pixels must be of an integer data '
+                             'type - {} given'.format(compact_pixels.dtype))
+        self.scale = scale
+        self.compact_pixels = None
+        self._pixels = None
+        super(CompactImage, self).__init__(compact_pixels, copy=copy)
+
+    @property
+    def pixels(self):
+        r"""
+        The normalised pixels of this image. Read-only while the image is
+        compact.
+
+        :type: ``(M, N ..., Q, C)`` floating point `ndarray`
+        """
+        if self.compact_pixels is None:
+            return self._pixels
+        return self.normalised_pixels()
+
+    @pixels.setter
+    def pixels(self, pixels):
+        if np.issubdtype(pixels.dtype, np.integer):
+            self.compact_pixels, self._pixels = pixels, None
+        else:
+            self.compact_pixels, self._pixels = None, pixels
+
+    @property
+    def is_compact(self):
+        r"""
+        Whether the pixels of this image are still stored in compact form.
+
+        :type: `bool`
+        """
+        return self.compact_pixels is not None
+
+    def _stored_pixels(self):
+        r"""
+        The pixels as they are stored - compact or floating point.
+        """
+        if self.compact_pixels is None:
+            return self._pixels
+        return self.compact_pixels
+
+    def normalised_pixels(self, slices=None):
+        r"""
+        The normalised pixels of a region of this image. Only the region is
+        normalised, so this is the way to process a large compact image tile
+        by tile.
+
+        Parameters
+        ----------
+        slices : `tuple` of `slice`, optional
+            The index of the region (over the spatial axes and, optionally,
+            the channels). If ``None``, the whole image.
+
+        Returns
+        -------
+        pixels : ``(M, N ..., Q, C)`` floating point `ndarray`
+            The normalised pixels of the region. A new, read-only, array
+            for a compact image, a view for one that is no longer compact.
+        """
+        if self.compact_pixels is None:
+            pixels = self._pixels
+            return pixels if slices is None else pixels[slices]
+        normalised = self._normalise(slices)
+        # writes to a new array would silently be lost
+        normalised.flags.writeable = False
+        return normalised
+
+    def _normalise(self, slices=None):
+        r"""
+        A new (writable) array of the normalised compact pixels of a region.
+        """
+        pixels = self.compact_pixels
+        if slices is not None:
+            pixels = pixels[slices]
+        normalised = pixels.astype(float_dtype(pixels.dtype))
+        # divide (rather than multiply by the scale) so the pixels are
+        # identical to those of an image normalised on import
+        normalised /= 1. / self.scale
+        return normalised
+
+    @property
+    def n_pixels(self):
+        r"""
+        Total number of pixels in the image (``prod(shape)``,)
+
+        :type: `int`
+        """
+        return self._stored_pixels()[..., 0].size
+
+    @property
+    def n_elements(self):
+        r"""
+        Total number of data points in the image
+        (``prod(shape)``, ``n_channels``)
+
+        :type: `int`
+        """
+        return self._stored_pixels().size
+
+    @property
+    def n_channels(self):
+        """
+        The number of channels on each pixel in the image.
+
+        :type: `int`
+        """
+        return self._stored_pixels().shape[-1]
+
+    @property
+    def width(self):
+        r"""
+        The width of the image.
+
+        This is the width according to image semantics, and is thus the size
+        of the **second** dimension.
+
+        :type: `int`
+        """
+        return self._stored_pixels().shape[1]
+
+    @property
+    def height(self):
+        r"""
+        The height of the image.
+
+        This is the height according to image semantics, and is thus the size
+        of the **first** dimension.
+
+        :type: `int`
+        """
+        return self._stored_pixels().shape[0]
+
+    @property
+    def shape(self):
+        r"""
+        The shape of the image
+        (with ``n_channel`` values at each point).
+
+        :type: `tuple`
+        """
+        return self._stored_pixels().shape[:-1]
+
+    def _interpolation_pixels(self):
+        if self.compact_pixels is None:
+            return self._pixels, None
+        return self.compact_pixels, self.scale
+
+    def _crop_pixels_inplace(self, slices):
+        if self.compact_pixels is None:
+            super(CompactImage, self)._crop_pixels_inplace(slices)
+        else:
+            self.compact_pixels = self.compact_pixels[slices].copy()
+
+    def as_masked(self, mask=None, copy=True):
+        r"""
+        Return a copy of this image with an attached mask behavior. The
+        :map:`MaskedImage` holds the normalised pixels, which are never
+        shared with a compact image, whatever the value of ``copy``.
+        See :meth:`Image.as_masked`.
+
+        Parameters
+        ----------
+        mask : `ndarray` with shape of ``self.shape`` or :map:`BooleanImage`
+            A mask to attach to the newly generated masked image.
+        copy : `bool`, optional
+            If ``False``, the produced :map:`MaskedImage` will share pixels
+            with ``self`` if it is no longer compact.
+
+        Returns
+        -------
+        masked_image : :map:`MaskedImage`
+            An image with the same pixels and landmarks as this one, but with
+            a mask.
+        """
+        if not self.is_compact:
+            return super(CompactImage, self).as_masked(mask=mask, copy=copy)
+        # the normalised pixels are a new array, so need no copy
+        img = MaskedImage(self._normalise(), mask=mask, copy=False)
+        img.landmarks = self.landmarks
+        return img
+
+    def extract_channels(self, channels):
+        r"""
+        A copy of this image with only the specified channels. The copy is
+        compact if this image is.
+
+        Parameters
+        ----------
+        channels : `int` or `[int]`
+            The channel index or list of channel indices to retain
+
+        Returns
+        -------
+        image : :map:`CompactImage`
+            A copy of this image with only the channels requested.
+        """
+        copy = self.copy()
+        if not isinstance(channels, list):
+            channels = [channels]  # ensure we don't remove the channel axis
+        copy.pixels = self._stored_pixels()[..., channels]
+        return copy
+
+    def as_PILImage(self):
+        r"""
+        Return a PIL copy of the image. While the image is compact and its
+        pixels are `uint8` bytes normalised by ``1 / 255``, these are handed
+        to PIL as they are, which gives back exactly the decoded image.
+        Otherwise, see :meth:`Image.as_PILImage`.
+
+        Returns
+        -------
+        pil_image : `PILImage`
+            PIL copy of image
+
+        Raises
+        ------
+        ValueError
+            If image is not 2D and 1 channel or 3 channels.
+        """
+        if (not self.is_compact or self.compact_pixels.dtype != np.uint8 or
+                self.scale != 1. / 255):
+            return super(CompactImage, self).as_PILImage()
+        if self.n_dims != 2 or self.n_channels not in [1, 3]:
+            raise ValueError('Can only convert greyscale or RGB 2D images. '
+                             'Received a {} channel {}D image.'.format(
+                                 self.n_channels, self.n_dims))
+        pixels = self.compact_pixels
+        if self.n_channels == 1:
+            pixels = pixels[..., 0]
+        return PILImage.fromarray(pixels)
+
+    def __str__(self):
+        return ('{} {}D {}Image with {} channel{}'.format(
+            self._str_shape, self.n_dims,
+            'Compact ' if self.is_compact else '', self.n_channels,
+            's' * (self.n_channels > 1)))
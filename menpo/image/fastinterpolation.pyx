@@ -0,0 +1,194 @@
+#cython: cdivision=True
+#cython: boundscheck=False
+#cython: nonecheck=False
+#cython: wraparound=False
+import numpy as np
+cimport numpy as np
+from libc.math cimport floor
+
+# the pixel types the kernels read directly - anything else is converted to
+# double before being passed in
+ctypedef fused pixel_t:
+    double
+    float
+    unsigned char
+
+
+cdef inline Py_ssize_t mirror(Py_ssize_t index, Py_ssize_t length) nogil:
+    r"""
+    Map an index outside of [0, length - 1] back inside by mirroring about the
+    first and last sample (the boundary of the SciPy spline prefilter).
+    """
+    cdef Py_ssize_t period = 2 * length - 2
+    if length == 1:
+        return 0
+    if index < 0:
+        index = -index
+    index = index % period
+    if index >= length:
+        index = period - index
+    return index
+
+
+cdef inline int footprint(double coord, Py_ssize_t length, int order,
+                          bint clamp, Py_ssize_t *indices,
+                          double *weights) nogil:
+    r"""
+    The indices and weights of the samples along one axis that contribute to
+    a coordinate, matching SciPy's map_coordinates.
+
+    Returns the number of samples in the footprint, or 0 if the coordinate
+    lies outside of the axis (and clamp is False) or is NaN.
+    """
+    cdef Py_ssize_t lower, k
+    cdef double t, t2, t3
+    if coord != coord:
+        return 0
+    if coord < 0 or coord > length - 1:
+        if not clamp:
+            return 0
+        coord = 0 if coord < 0 else length - 1
+    if order == 0:
+        indices[0] = <Py_ssize_t>floor(coord + 0.5)
+        weights[0] = 1
+        return 1
+    lower = <Py_ssize_t>floor(coord)
+    t = coord - lower
+    if order == 1:
+        indices[0] = lower
+        indices[1] = mirror(lower + 1, length)
+        weights[0] = 1 - t
+        weights[1] = t
+        return 2
+    # cubic B-spline
+    t2 = t * t
+    t3 = t2 * t
+    for k in range(4):
+        indices[k] = mirror(lower - 1 + k, length)
+    weights[0] = (1 - t) * (1 - t) * (1 - t) / 6
+    weights[1] = (3 * t3 - 6 * t2 + 4) / 6
+    weights[2] = (-3 * t3 + 3 * t2 + 3 * t + 1) / 6
+    weights[3] = t3 / 6
+    return 4
+
+
+cdef inline void sample_point(pixel_t[:, :, ::1] pixels, double r, double c,
+                              int order, bint clamp, double cval, double scale,
+                              double[:, ::1] output, Py_ssize_t p) nogil:
+    r"""
+    Interpolate every channel of the image at (r, c) into row p of output,
+    multiplying the interpolated values by scale. The weights are computed
+    once and shared by all the channels.
+    """
+    cdef Py_ssize_t row_indices[4], col_indices[4]
+    cdef double row_weights[4], col_weights[4]
+    cdef int n_rows, n_cols, i, j
+    cdef Py_ssize_t ch, n_channels = pixels.shape[2]
+    cdef double w
+    n_rows = footprint(r, pixels.shape[0], order, clamp, row_indices,
+                       row_weights)
+    n_cols = footprint(c, pixels.shape[1], order, clamp, col_indices,
+                       col_weights)
+    if n_rows == 0 or n_cols == 0:
+        for ch in range(n_channels):
+            output[p, ch] = cval
+        return
+    for ch in range(n_channels):
+        output[p, ch] = 0
+    for i in range(n_rows):
+        for j in range(n_cols):
+            w = row_weights[i] * col_weights[j] * scale
+            for ch in range(n_channels):
+                output[p, ch] += w * pixels[row_indices[i], col_indices[j], ch]
+
+
+def interpolate_points(pixel_t[:, :, ::1] pixels, double[:, ::1] points,
+                       int order=1, bint clamp=False, double cval=0,
+                       double scale=1):
+    r"""
+    Interpolate all the channels of a 2D image at a set of points in a single
+    pass.
+
+    Parameters
+    ----------
+    pixels : (M, N, n_channels) ndarray
+        The image to be sampled from. For order 3 this must already have
+        been spline filtered.
+    points : (n_points, 2) ndarray
+        The points which should be sampled from pixels.
+    order : {0, 1, 3}, optional
+        The order of the spline interpolation.
+    clamp : bool, optional
+        If True, points outside of the image take the value of the nearest
+        edge ('nearest' mode), else they are set to cval ('constant' mode).
+    cval : float, optional
+        The value of points outside of the image if clamp is False.
+    scale : float, optional
+        A factor the interpolated values (but not cval) are multiplied by.
+
+    Returns
+    -------
+    sampled : (n_points, n_channels) ndarray
+        The pixel information sampled at each of the points.
+    """
+    cdef Py_ssize_t p, n_points = points.shape[0]
+    cdef np.ndarray[double, ndim=2] sampled = np.empty(
+        (n_points, pixels.shape[2]))
+    cdef double[:, ::1] output = sampled
+    with nogil:
+        for p in range(n_points):
+            sample_point(pixels, points[p, 0], points[p, 1], order, clamp,
+                         cval, scale, output, p)
+    return sampled
+
+
+def interpolate_homogeneous(pixel_t[:, :, ::1] pixels,
+                            double[:, ::1] h_matrix,
+                            Py_ssize_t n_rows, Py_ssize_t n_cols,
+                            int order=1, bint clamp=False, double cval=0,
+                            double scale=1):
+    r"""
+    Interpolate all the channels of a 2D image at every pixel of a template
+    of shape (n_rows, n_cols) mapped through a homogeneous transform, in a
+    single pass. The sample points are computed on the fly.
+
+    Parameters
+    ----------
+    pixels : (M, N, n_channels) ndarray
+        The image to be sampled from. For order 3 this must already have
+        been spline filtered.
+    h_matrix : (3, 3) ndarray
+        The homogeneous matrix of the transform from the template back to
+        the image.
+    n_rows, n_cols : int
+        The shape of the template.
+    order : {0, 1, 3}, optional
+        The order of the spline interpolation.
+    clamp : bool, optional
+        If True, points outside of the image take the value of the nearest
+        edge ('nearest' mode), else they are set to cval ('constant' mode).
+    cval : float, optional
+        The value of points outside of the image if clamp is False.
+    scale : float, optional
+        A factor the interpolated values (but not cval) are multiplied by.
+
+    Returns
+    -------
+    sampled : (n_rows * n_cols, n_channels) ndarray
+        The pixel information sampled at each pixel of the template.
+    """
+    cdef Py_ssize_t i, j
+    cdef double r, c, z
+    cdef np.ndarray[double, ndim=2] sampled = np.empty(
+        (n_rows * n_cols, pixels.shape[2]))
+    cdef double[:, ::1] output = sampled
+    cdef double[:, ::1] H = h_matrix
+    with nogil:
+        for i in range(n_rows):
+            for j in range(n_cols):
+                r = H[0, 0] * i + H[0, 1] * j + H[0, 2]
+                c = H[1, 0] * i + H[1, 1] * j + H[1, 2]
+                z = H[2, 0] * i + H[2, 1] * j + H[2, 2]
+                sample_point(pixels, r / z, c / z, order, clamp, cval, scale,
+                             output, i * n_cols + j)
+    return sampled
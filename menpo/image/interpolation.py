@@ -1,12 +1,54 @@
+import copy
 import numpy as np
+from menpo.base import float_dtype
 map_coordinates = None  # expensive, from scipy.ndimage
-from menpo.external.skimage._warps_cy import _warp_fast
-from menpo.transform import Homogeneous
+spline_filter1d = None  # expensive, from scipy.ndimage
+from .fastinterpolation import interpolate_points, interpolate_homogeneous
 
-# Store out a transform that simply switches the x and y axis
-xy_yx = Homogeneous(np.array([[0., 1., 0.],
-                              [1., 0., 0.],
-                              [0., 0., 1.]]))
+
+def _spline_prefilter(pixels, order):
+    r"""
+    Spline filter every channel of an image (along each of the spatial axes
+    only) so that it can be sampled with B-spline weights, exactly as done
+    internally by SciPy's map_coordinates.
+    """
+    global spline_filter1d
+    if spline_filter1d is None:
+        from scipy.ndimage import spline_filter1d  # expensive
+    filtered = pixels.astype(float_dtype(pixels.dtype))
+    for axis in xrange(pixels.ndim - 1):
+        filtered = spline_filter1d(filtered, order=order, axis=axis)
+    return filtered
+
+
+def _cython_supported(n_dims, order, mode):
+    r"""
+    Whether the single pass Cython kernel can perform the given
+    interpolation (else we fall back to SciPy).
+    """
+    return n_dims == 2 and order in (0, 1, 3) and mode in ('constant',
+                                                           'nearest')
+
+
+def _cython_pixels(pixels, order):
+    r"""
+    The pixels in the form the Cython kernel expects - C contiguous doubles,
+    floats or bytes, spline filtered for order 3.
+    """
+    if order > 1:
+        return _spline_prefilter(pixels, order)
+    if pixels.dtype in (np.float64, np.float32, np.uint8):
+        return np.require(pixels, requirements=['C'])
+    return np.require(pixels, dtype=np.double, requirements=['C'])
+
+
+def _sampled_dtype(pixels):
+    r"""
+    The data type of the pixels sampled from an image - the type of the
+    image if it is floating point, else the :map:`default_dtype`.
+    Interpolated values are never rounded back to integers.
+    """
+    return float_dtype(pixels.dtype)
 
 
 def scipy_interpolation(pixels, points_to_sample, mode='constant', order=1,
@@ -58,10 +100,16 @@ def scipy_interpolation(pixels, points_to_sample, mode='constant', order=1,
     return np.concatenate(sampled_pixel_values, axis=1)
 
 
-def cython_interpolation(pixels, template_shape, h_transform, mode='constant',
-                         order=1, cval=0.):
+def cython_point_interpolation(pixels, points_to_sample, mode='constant',
+                               order=1, cval=0., scale=None):
     r"""
-    Interpolation utilizing skimage's fast cython warp function.
+    Interpolation of all channels of a 2D image in a single pass of a Cython
+    kernel. The interpolation weights of each point are computed once and
+    shared between the channels, and the result is written straight into the
+    output. The result matches :func:`scipy_interpolation`, which is used
+    instead for anything the kernel does not support (images that are not
+    2D, orders other than 0, 1 and 3 or modes other than 'constant' and
+    'nearest').
 
     Parameters
     ----------
@@ -69,9 +117,71 @@ def cython_interpolation(pixels, template_shape, h_transform, mode='constant',
         The image to be sampled from, the final axis containing channel
         information.
 
+    points_to_sample : (n_points, n_dims) ndarray
+        The points which should be sampled from pixels
+
+    mode : {'constant', 'nearest', 'reflect', 'wrap'}, optional
+        Points outside the boundaries of the input are filled according to the
+        given mode.
+
+    order : int, optional
+        The order of the spline interpolation. The order has to be in the
+        range 0-5.
+
+    cval : float, optional
+        The value that should be used for points that are sampled from
+        outside the image bounds if mode is 'constant'
+
+    scale : float, optional
+        If given, the sampled values (but not ``cval``) are multiplied by
+        ``scale`` and returned as floating point. This allows compact
+        integer pixels to be sampled straight into normalised values.
+
+    Returns
+    -------
+    sampled_image : (n_points, n_channels) ndarray
+        The pixel information sampled at each of the points.
+        Floating point, even for integer pixels.
+    """
+    dtype = _sampled_dtype(pixels)
+    if not _cython_supported(pixels.ndim - 1, order, mode):
+        # SciPy would round samples of integer pixels back to integers
+        if scale is not None:
+            pixels = pixels * scale
+        else:
+            pixels = pixels.astype(dtype, copy=False)
+        sampled = scipy_interpolation(pixels, points_to_sample, mode=mode,
+                                      order=order, cval=cval)
+        return sampled.astype(dtype, copy=False)
+    sampled = interpolate_points(
+        _cython_pixels(pixels, order),
+        np.require(points_to_sample, dtype=np.double, requirements=['C']),
+        order=order, clamp=mode == 'nearest', cval=cval,
+        scale=1. if scale is None else scale)
+    return sampled.astype(dtype, copy=False)
+
+
+def cython_interpolation(pixels, template_shape, h_transform, mode='constant',
+                         order=1, cval=0., scale=None):
+    r"""
+    Interpolation of all channels of a 2D image at every pixel of a template
+    shape mapped through a homogeneous transform, in a single pass of a
+    Cython kernel. The sample points are computed on the fly rather than
+    being stored. See :func:`cython_point_interpolation` for the supported
+    interpolations - anything else falls back to :func:`scipy_interpolation`.
+
+    Parameters
+    ----------
+    pixels : (M, N, n_channels) ndarray
+        The image to be sampled from, the final axis containing channel
+        information.
+
     template_shape : tuple
         The shape of the new image that will be sampled
 
+    h_transform : :map:`Homogeneous`
+        The transform from the template back to the image.
+
     mode : {'constant', 'nearest', 'reflect', 'wrap'}, optional
         Points outside the boundaries of the input are filled according to the
         given mode.
@@ -84,20 +194,284 @@ def cython_interpolation(pixels, template_shape, h_transform, mode='constant',
         The value that should be used for points that are sampled from
         outside the image bounds if mode is 'constant'
 
+    scale : float, optional
+        If given, the sampled values (but not ``cval``) are multiplied by
+        ``scale`` and returned as floating point.
+
     Returns
     -------
-    sampled_image : ndarray
-        The pixel information sampled at each of the points.
+    sampled_image : (n_template_pixels, n_channels) ndarray
+        The pixel information sampled at each pixel of the template.
+        Floating point, even for integer pixels.
     """
-    # unfortunately they consider xy -> yx
-    matrix = xy_yx.compose_before(h_transform).compose_before(xy_yx).h_matrix
-    warped_channels = []
-    # Loop over every channel in image - we know last axis is always channels
-    # Note that map_coordinates uses the opposite (dims, points) convention
-    # to us so we transpose
-    for i in xrange(pixels.shape[-1]):
-        warped_channels.append(_warp_fast(pixels[..., i], matrix,
-                                          output_shape=template_shape,
-                                          mode=mode, order=order, cval=cval))
-    warped_channels = [v.reshape([-1, 1]) for v in warped_channels]
-    return np.concatenate(warped_channels, axis=1)
+    if not _cython_supported(pixels.ndim - 1, order, mode):
+        points_to_sample = h_transform.apply(
+            np.indices(template_shape).reshape([len(template_shape), -1]).T)
+        return cython_point_interpolation(pixels, points_to_sample,
+                                          mode=mode, order=order, cval=cval,
+                                          scale=scale)
+    sampled = interpolate_homogeneous(
+        _cython_pixels(pixels, order),
+        np.require(h_transform.h_matrix, dtype=np.double,
+                   requirements=['C']),
+        template_shape[0], template_shape[1], order=order,
+        clamp=mode == 'nearest', cval=cval,
+        scale=1. if scale is None else scale)
+    return sampled.astype(_sampled_dtype(pixels), copy=False)
+
+
+def _mirror_indices(indices, length):
+    r"""
+    Map indices outside of [0, length - 1] back inside by mirroring about the
+    first and last sample (without repeating them), matching the boundary
+    used by SciPy's spline prefilter.
+    """
+    if length == 1:
+        return np.zeros_like(indices)
+    period = 2 * length - 2
+    indices = np.abs(indices) % period
+    return np.where(indices >= length, period - indices, indices)
+
+
+def _axis_footprint(coords, length, order, mode):
+    r"""
+    The per-axis indices and weights of the samples that contribute to each
+    coordinate along one axis of length ``length``.
+
+    Returns
+    -------
+    indices : (n_points, order + 1) ndarray
+    weights : (n_points, order + 1) ndarray
+    outside : (n_points,) ndarray
+        Whether each coordinate lies outside the axis.
+    """
+    outside = (coords < 0) | (coords > length - 1)
+    if mode == 'nearest':
+        coords = np.clip(coords, 0, length - 1)
+    if order == 0:
+        indices = np.floor(coords + 0.5).astype(np.int)[:, None]
+        weights = np.ones_like(indices, dtype=np.float)
+    elif order == 1:
+        lower = np.floor(coords)
+        t = coords - lower
+        lower = lower.astype(np.int)
+        indices = np.vstack([lower, lower + 1]).T
+        weights = np.vstack([1 - t, t]).T
+    else:  # order == 3
+        lower = np.floor(coords)
+        t = coords - lower
+        lower = lower.astype(np.int)
+        indices = lower[:, None] + np.arange(-1, 3)
+        t2, t3 = t ** 2, t ** 3
+        weights = np.vstack([(1 - t) ** 3,
+                             3 * t3 - 6 * t2 + 4,
+                             -3 * t3 + 3 * t2 + 3 * t + 1,
+                             t3]).T / 6.
+    # points outside the axis are replaced by cval in constant mode, so all
+    # that matters is that their (unused) indices are legal
+    indices = _mirror_indices(indices, length)
+    return indices, weights, outside
+
+
+class WarpPlan(object):
+    r"""
+    A precomputed warp of images of a fixed shape into a fixed template.
+
+    Building the plan resolves the template sample points, applies the
+    transform to them and derives, for every sample point, the flat indices
+    and weights of the source pixels it is interpolated from. Warping an image
+    with the plan (see the ``plan`` argument of :meth:`Image.warp_to_mask` and
+    :meth:`Image.warp_to_shape`) is then just a gather and a weighted sum.
+    The result is identical to the unplanned warp.
+
+    Parameters
+    ----------
+    template : :map:`BooleanImage` or `tuple`
+        Either the template mask (for use with ``warp_to_mask``) or the
+        template shape (for use with ``warp_to_shape``).
+
+    transform : :map:`Transform`
+        Transform **from the template space back to the image**.
+
+    image_shape : `tuple`
+        The (spatial) shape of the images that will be warped with this plan.
+
+    order : {0, 1, 3}, optional
+        The order of interpolation: nearest-neighbour, bi-linear or bi-cubic
+        (B-spline, as SciPy's ``map_coordinates``).
+
+    mode : {'constant', 'nearest'}, optional
+        Points outside the boundaries of the image are filled according to
+        the given mode.
+
+    cval : `float`, optional
+        Used in conjunction with mode 'constant', the value outside the image
+        boundaries.
+
+    Raises
+    ------
+    ValueError
+        If the order or mode is not supported, or the transform dimensionality
+        does not match the image.
+    """
+
+    def __init__(self, template, transform, image_shape, order=1,
+                 mode='constant', cval=0.):
+        image_shape = tuple(image_shape)
+        if hasattr(template, 'true_indices'):
+            self.template_mask = template
+            self.template_shape = template.shape
+            template_points = template.true_indices()
+        else:
+            self.template_mask = None
+            self.template_shape = tuple(template)
+            template_points = np.indices(self.template_shape).reshape(
+                [len(self.template_shape), -1]).T
+        if len(image_shape) != transform.n_dims:
+            raise ValueError(
+                "Trying to plan a warp of a {}D image with a {}D transform "
+                "(they must match)".format(len(image_shape),
+                                           transform.n_dims))
+        self.template_points = template_points
+        self.image_shape = image_shape
+        self.transform = transform
+        self.mode = mode
+        self.cval = cval
+        self.points_to_sample = transform.apply(template_points)
+        # footprints are cached by order so that plans derived with
+        # with_order() share them
+        self._footprints = {}
+        self._set_order(order)
+
+    def _set_order(self, order):
+        if order not in (0, 1, 3):
+            raise ValueError("Warp plans support interpolation orders 0, 1 "
+                             "and 3 only (not {})".format(order))
+        if self.mode not in ('constant', 'nearest'):
+            raise ValueError("Warp plans support modes 'constant' and "
+                             "'nearest' only (not '{}')".format(self.mode))
+        self.order = order
+        if order not in self._footprints:
+            self._footprints[order] = self._build_footprint(order)
+
+    def _build_footprint(self, order):
+        n_points = self.points_to_sample.shape[0]
+        indices = np.zeros((n_points, 1), dtype=np.int)
+        weights = np.ones((n_points, 1))
+        outside = np.zeros(n_points, dtype=np.bool)
+        # combine the per-axis footprints into flat (C order) indices into
+        # the image and the products of the per-axis weights
+        for axis, length in enumerate(self.image_shape):
+            a_indices, a_weights, a_outside = _axis_footprint(
+                self.points_to_sample[:, axis], length, order, self.mode)
+            indices = (indices[:, :, None] * length +
+                       a_indices[:, None, :]).reshape([n_points, -1])
+            weights = (weights[:, :, None] *
+                       a_weights[:, None, :]).reshape([n_points, -1])
+            outside |= a_outside
+        if self.mode != 'constant':
+            outside[...] = False
+        return indices, weights, outside
+
+    @property
+    def n_points(self):
+        r"""
+        The number of points sampled by this plan.
+
+        :type: `int`
+        """
+        return self.template_points.shape[0]
+
+    def with_order(self, order):
+        r"""
+        A plan for the same points interpolated with a different order. The
+        template points, sampled points and any footprints already computed
+        are shared with this plan.
+
+        Parameters
+        ----------
+        order : {0, 1, 3}
+            The order of interpolation.
+
+        Returns
+        -------
+        plan : :map:`WarpPlan`
+            This plan if it already has the requested order, else a new plan.
+        """
+        if order == self.order:
+            return self
+        plan = copy.copy(self)
+        plan._set_order(order)
+        return plan
+
+    def with_transform(self, transform):
+        r"""
+        A plan into the same template with the same settings but a different
+        transform, reusing the template points of this plan.
+
+        Parameters
+        ----------
+        transform : :map:`Transform`
+            Transform **from the template space back to the image**.
+
+        Returns
+        -------
+        plan : :map:`WarpPlan`
+            The new plan.
+        """
+        if transform.n_dims != len(self.image_shape):
+            raise ValueError(
+                "Trying to plan a warp of a {}D image with a {}D transform "
+                "(they must match)".format(len(self.image_shape),
+                                           transform.n_dims))
+        plan = copy.copy(self)
+        plan.transform = transform
+        plan.points_to_sample = transform.apply(self.template_points)
+        plan._footprints = {}
+        plan._set_order(self.order)
+        return plan
+
+    def sample(self, pixels, scale=None):
+        r"""
+        Sample an image at the planned points.
+
+        Parameters
+        ----------
+        pixels : (M, N, ..., n_channels) ndarray
+            The image to be sampled from, the final axis containing channel
+            information. Its spatial shape must match the ``image_shape`` of
+            this plan.
+
+        scale : float, optional
+            If given, the sampled values (but not ``cval``) are multiplied
+            by ``scale`` and returned as floating point.
+
+        Returns
+        -------
+        sampled_image : (n_points, n_channels) ndarray
+            The pixel information sampled at each of the points.
+            Floating point, even for integer pixels.
+        """
+        if pixels.shape[:-1] != self.image_shape:
+            raise ValueError(
+                "This plan warps images of shape {}, not {}".format(
+                    self.image_shape, pixels.shape[:-1]))
+        indices, weights, outside = self._footprints[self.order]
+        dtype = _sampled_dtype(pixels)
+        n_channels = pixels.shape[-1]
+        if self.order == 0:
+            sampled = pixels.reshape([-1, n_channels])[indices[:, 0]]
+            sampled = sampled.astype(dtype, copy=False)
+            if scale is not None:
+                sampled *= scale
+        else:
+            if self.order > 1:
+                pixels = _spline_prefilter(pixels, self.order)
+            flat_pixels = pixels.reshape([-1, n_channels])
+            sampled = np.zeros((self.n_points, n_channels), dtype=dtype)
+            for k in xrange(indices.shape[1]):
+                sampled += weights[:, k, None] * flat_pixels[indices[:, k]]
+            if scale is not None:
+                sampled *= scale
+        sampled[outside] = self.cval
+        return sampled
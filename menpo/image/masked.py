@@ -3,6 +3,7 @@ from warnings import warn
 import numpy as np
 binary_erosion = None  # expensive, from scipy.ndimage
 
+from menpo.base import default_dtype
 from menpo.visualize.base import ImageViewer
 gradient = None  # avoid circular reference, from menpo.feature
 
@@ -88,7 +89,7 @@ class MaskedImage(Image):
         return img
 
     @classmethod
-    def blank(cls, shape, n_channels=1, fill=0, dtype=np.float, mask=None):
+    def blank(cls, shape, n_channels=1, fill=0, dtype=None, mask=None):
         r"""
         Returns a blank image
 
@@ -107,9 +108,10 @@ class MaskedImage(Image):
 
             Default: 0
         dtype: numpy datatype, optional
-            The datatype of the image.
+            The datatype of the image. If ``None``, the
+            :map:`default_dtype`.
 
-            Default: np.float
+            Default: None
         mask: (M, N) boolean ndarray or :class:`BooleanImage`
             An optional mask that can be applied to the image. Has to have a
              shape equal to that of the image.
@@ -130,6 +132,8 @@ class MaskedImage(Image):
         blank_image : :class:`MaskedImage`
             A new masked image of the requested size.
         """
+        if dtype is None:
+            dtype = default_dtype()
         # Ensure that the '+' operator means concatenate tuples
         shape = tuple(np.ceil(shape).astype(np.int))
         if fill == 0:
@@ -283,7 +287,8 @@ class MaskedImage(Image):
             # we can just reshape the array!
             image_data = vector.reshape((self.shape + (n_channels,)))
         else:
-            image_data = np.zeros(self.shape + (n_channels,))
+            image_data = np.zeros(self.shape + (n_channels,),
+                                  dtype=vector.dtype)
             pixels_per_channel = vector.reshape((-1, n_channels))
             image_data[self.mask.mask] = pixels_per_channel
         new_image = MaskedImage(image_data, mask=self.mask)
@@ -418,7 +423,7 @@ class MaskedImage(Image):
                           constrain_to_boundary=constrain_to_boundary)
 
     def warp_to_mask(self, template_mask, transform, warp_landmarks=False,
-                     order=1, mode='constant', cval=0.):
+                     order=1, mode='constant', cval=0., plan=None):
         r"""
         Warps this image into a different reference space.
 
@@ -454,6 +459,13 @@ class MaskedImage(Image):
             Used in conjunction with mode 'constant', the value outside
             the image boundaries.
 
+        plan : :map:`WarpPlan`, optional
+            A plan built for this ``template_mask``, ``transform`` and the
+            shape of this image. If provided, the sample points and
+            interpolation weights are taken from the plan rather than being
+            recomputed. The ``order``, ``mode`` and ``cval`` given must be
+            those of the plan. The mask is warped with the same plan.
+
         Returns
         -------
         warped_image : ``type(self)``
@@ -463,15 +475,16 @@ class MaskedImage(Image):
         # with a blank mask
         warped_image = Image.warp_to_mask(self, template_mask, transform,
                                           warp_landmarks=warp_landmarks,
-                                          order=order, mode=mode, cval=cval)
+                                          order=order, mode=mode, cval=cval,
+                                          plan=plan)
         warped_mask = self.mask.warp_to_mask(template_mask, transform,
                                              warp_landmarks=warp_landmarks,
-                                             mode=mode, cval=cval)
+                                             mode=mode, cval=cval, plan=plan)
         warped_image.mask = warped_mask
         return warped_image
 
     def warp_to_shape(self, template_shape, transform, warp_landmarks=False,
-                      order=1, mode='constant', cval=0.):
+                      order=1, mode='constant', cval=0., plan=None):
         """
         Return a copy of this :map:`MaskedImage` warped into a different
         reference space.
@@ -508,6 +521,13 @@ class MaskedImage(Image):
             Used in conjunction with mode 'constant', the value outside
             the image boundaries.
 
+        plan : :map:`WarpPlan`, optional
+            A plan built for this ``template_shape``, ``transform`` and the
+            shape of this image. If provided, the sample points and
+            interpolation weights are taken from the plan rather than being
+            recomputed. The ``order``, ``mode`` and ``cval`` given must be
+            those of the plan. The mask is warped with the same plan.
+
         Returns
         -------
         warped_image : :map:`MaskedImage`
@@ -516,11 +536,12 @@ class MaskedImage(Image):
         # call the super variant and get ourselves an Image back
         warped_image = Image.warp_to_shape(self, template_shape, transform,
                                            warp_landmarks=warp_landmarks,
-                                           order=order, mode=mode, cval=cval)
+                                           order=order, mode=mode, cval=cval,
+                                           plan=plan)
         # warp the mask separately and reattach.
         mask = self.mask.warp_to_shape(template_shape, transform,
                                        warp_landmarks=warp_landmarks,
-                                       mode=mode, cval=cval)
+                                       mode=mode, cval=cval, plan=plan)
         # efficiently turn the Image into a MaskedImage, attaching the
         # landmarks
         masked_warped_image = MaskedImage(warped_image.pixels, mask=mask,
@@ -33,3 +33,37 @@ def test_blank_maskedimage():
 
     im = MaskedImage.blank((10, 10), fill=2.0, n_channels=10)
     assert np.all(im.pixels == 2.0)
+
+
+def test_blank_default_dtype():
+    from menpo import set_default_dtype
+    set_default_dtype(np.float32)
+    try:
+        im = Image.blank((10, 10))
+        masked_im = MaskedImage.blank((10, 10), n_channels=3)
+    finally:
+        set_default_dtype(np.float64)
+    assert im.pixels.dtype == np.float32
+    assert masked_im.pixels.dtype == np.float32
+    assert Image.blank((10, 10)).pixels.dtype == np.float64
+
+
+def test_blank_float32_gaussian_filter_preserves_dtype():
+    from menpo.feature import gaussian_filter
+    im = Image.blank((10, 10), fill=0.5, dtype=np.float32)
+    assert gaussian_filter(im, 1.0).pixels.dtype == np.float32
+
+
+def test_default_dtype_features_and_greyscale_preserve_dtype():
+    from menpo import set_default_dtype
+    from menpo.feature import igo, es
+    set_default_dtype(np.float32)
+    try:
+        im = Image.blank((10, 10), fill=0.5, n_channels=3)
+        im.pixels[2:5, 3:7] = 0.25
+        assert igo(im).pixels.dtype == np.float32
+        assert igo(im, double_angles=True).pixels.dtype == np.float32
+        assert es(im).pixels.dtype == np.float32
+        assert im.as_greyscale().pixels.dtype == np.float32
+    finally:
+        set_default_dtype(np.float64)
@@ -0,0 +1,101 @@
+import numpy as np
+from numpy.testing import assert_allclose, assert_equal
+from nose.tools import raises
+from menpo.image import CompactImage, Image, WarpPlan
+from menpo.transform import Affine, UniformScale
+
+compact_pixels = np.random.randint(0, 256, size=(40, 50, 3)).astype(np.uint8)
+normalised_image = Image(compact_pixels / 255.)
+
+
+def test_compact_image_pixels_are_normalised():
+    im = CompactImage(compact_pixels)
+    assert im.is_compact
+    assert_equal(im.compact_pixels.dtype, np.uint8)
+    assert_allclose(im.pixels, normalised_image.pixels)
+    assert_equal(im.shape, (40, 50))
+    assert_equal(im.n_channels, 3)
+
+
+def test_compact_image_normalised_pixels_region():
+    im = CompactImage(compact_pixels)
+    region = (slice(10, 20), slice(5, 15))
+    assert_allclose(im.normalised_pixels(region),
+                    normalised_image.pixels[region])
+
+
+@raises(ValueError)
+def test_compact_image_pixels_are_read_only():
+    im = CompactImage(compact_pixels)
+    im.pixels[0, 0, 0] = 0.5
+
+
+def test_compact_image_as_masked_is_writable():
+    im = CompactImage(compact_pixels)
+    masked = im.as_masked(copy=False)
+    masked.pixels[0, 0, 0] = 0.5
+    assert_allclose(masked.pixels[0, 0, 0], 0.5)
+    assert im.is_compact
+
+
+@raises(ValueError)
+def test_compact_image_float_pixels_raises_value_error():
+    CompactImage(np.zeros((10, 10, 1)))
+
+
+def test_compact_image_crop_stays_compact():
+    im = CompactImage(compact_pixels)
+    im.crop_inplace(np.array([5, 10]), np.array([25, 30]))
+    assert im.is_compact
+    assert_allclose(im.pixels, normalised_image.crop(
+        np.array([5, 10]), np.array([25, 30])).pixels)
+
+
+def test_compact_image_warp_to_shape():
+    im = CompactImage(compact_pixels)
+    transform = Affine.identity(2).from_vector(
+        np.array([0.1, 0, 0, -0.1, 2, 3]))
+    warped = im.warp_to_shape((30, 30), transform)
+    expected = normalised_image.warp_to_shape((30, 30), transform)
+    assert_allclose(warped.pixels, expected.pixels)
+
+
+def test_compact_image_warp_to_mask_with_plan():
+    im = CompactImage(compact_pixels)
+    transform = UniformScale(1.5, 2)
+    plan = WarpPlan((20, 20), transform, im.shape)
+    warped = im.warp_to_shape((20, 20), transform, plan=plan)
+    expected = normalised_image.warp_to_shape((20, 20), transform)
+    assert_allclose(warped.pixels, expected.pixels)
+
+
+def test_compact_image_rescale():
+    im = CompactImage(compact_pixels)
+    assert_allclose(im.rescale(0.5).pixels,
+                    normalised_image.rescale(0.5).pixels)
+
+
+def test_compact_image_float_assignment_decompacts():
+    im = CompactImage(compact_pixels)
+    im.from_vector_inplace(normalised_image.as_vector())
+    assert not im.is_compact
+    assert_allclose(im.pixels, normalised_image.pixels)
+
+
+def test_compact_image_extract_channels():
+    im = CompactImage(compact_pixels)
+    red = im.extract_channels(0)
+    assert red.is_compact
+    assert_allclose(red.pixels, normalised_image.pixels[..., :1])
+
+
+def test_compact_image_normalised_pixels_match_image():
+    assert_equal(CompactImage(compact_pixels).pixels,
+                 normalised_image.pixels)
+
+
+def test_compact_image_as_PILImage_round_trips():
+    im = CompactImage(compact_pixels)
+    assert_equal(np.array(im.as_PILImage()), compact_pixels)
+    grey = CompactImage(compact_pixels[..., :1])
+    assert_equal(np.array(grey.as_PILImage()), compact_pixels[..., 0])
@@ -1,8 +1,13 @@
 import numpy as np
 import menpo
 from numpy.testing import assert_allclose
-from menpo.image import BooleanImage, Image, MaskedImage
-from menpo.transform import Affine
+from nose.tools import raises
+from menpo.image import BooleanImage, Image, MaskedImage, WarpPlan
+from menpo.image.base import indices_for_image_of_shape
+from menpo.transform import Affine, Homogeneous
+from menpo.image.interpolation import (scipy_interpolation,
+                                       cython_interpolation,
+                                       cython_point_interpolation)
 import menpo.io as mio
 
 # do the import to generate the expected outputs
@@ -95,6 +100,124 @@ def test_warp_to_shape_equal_warp_to_mask():
     assert_allclose(m_shape.pixels, m_mask.pixels)
 
 
+def test_warp_plan_to_mask_matches_unplanned():
+    template_mask = BooleanImage.blank((40, 50))
+    template_mask.pixels[:10, :20] = False
+    t = Affine.identity(2).from_vector(np.array([0.1, 0.2, -0.1, 0.05,
+                                                 60.3, 40.7]))
+    for order in (0, 1, 3):
+        plan = WarpPlan(template_mask, t, rgb_image.shape, order=order)
+        expected = rgb_image.warp_to_mask(template_mask, t, order=order)
+        warped = rgb_image.warp_to_mask(template_mask, t, order=order,
+                                        plan=plan)
+        assert_allclose(warped.pixels, expected.pixels)
+
+
+def test_warp_plan_to_shape_matches_unplanned():
+    t = Affine.identity(2).from_vector(np.array([0.1, 0.2, -0.1, 0.05,
+                                                 -10.3, 40.7]))
+    for mode in ('constant', 'nearest'):
+        for order in (0, 1, 3):
+            plan = WarpPlan((60, 30), t, rgb_image.shape, order=order,
+                            mode=mode)
+            expected = rgb_image.warp_to_shape((60, 30), t, order=order,
+                                               mode=mode)
+            warped = rgb_image.warp_to_shape((60, 30), t, order=order,
+                                             mode=mode, plan=plan)
+            assert_allclose(warped.pixels, expected.pixels)
+
+
+def test_warp_plan_masked_image():
+    img = MaskedImage.blank((10, 10), n_channels=2)
+    img.pixels[:, :5, :] = 0.5
+    img.mask.pixels[:5, :] = False
+    t = Affine.identity(2).from_vector(np.array([0, 0, 0, 0, 1.5, -2.]))
+    plan = WarpPlan((8, 8), t, img.shape)
+    expected = img.warp_to_shape((8, 8), t)
+    warped = img.warp_to_shape((8, 8), t, plan=plan)
+    assert_allclose(warped.pixels, expected.pixels)
+    assert(np.all(warped.mask.pixels == expected.mask.pixels))
+
+
+@raises(ValueError)
+def test_warp_plan_wrong_image_shape_raises_value_error():
+    plan = WarpPlan((8, 8), Affine.identity(2), (9, 9))
+    Image.blank((10, 10)).warp_to_shape((8, 8), Affine.identity(2),
+                                        plan=plan)
+
+
+@raises(ValueError)
+def test_warp_plan_different_transform_raises_value_error():
+    plan = WarpPlan((8, 8), Affine.identity(2), (10, 10))
+    t = Affine.identity(2).from_vector(np.array([0, 0, 0, 0, 1., 0]))
+    Image.blank((10, 10)).warp_to_shape((8, 8), t, plan=plan)
+
+
+def test_warp_plan_equal_transform():
+    plan = WarpPlan((8, 8), Affine.identity(2), (10, 10))
+    Image.blank((10, 10)).warp_to_shape((8, 8), Affine.identity(2),
+                                        plan=plan)
+
+
+@raises(ValueError)
+def test_warp_plan_different_order_raises_value_error():
+    plan = WarpPlan((8, 8), Affine.identity(2), (10, 10), order=3)
+    Image.blank((10, 10)).warp_to_shape((8, 8), Affine.identity(2),
+                                        plan=plan)
+
+
+@raises(ValueError)
+def test_warp_plan_different_mask_raises_value_error():
+    mask = BooleanImage.blank((8, 8))
+    mask.pixels[:2] = False
+    plan = WarpPlan(mask, Affine.identity(2), (10, 10))
+    other_mask = BooleanImage.blank((8, 8))
+    other_mask.pixels[-2:] = False
+    Image.blank((10, 10)).warp_to_mask(other_mask, Affine.identity(2),
+                                       plan=plan)
+
+
+@raises(ValueError)
+def test_warp_plan_unsupported_order_raises_value_error():
+    WarpPlan((8, 8), Affine.identity(2), (10, 10), order=2)
+
+
+def test_cython_interpolation_matches_scipy():
+    pixels = np.random.randn(20, 25, 4)
+    t = Homogeneous(np.array([[0.9, 0.3, -2.5],
+                              [-0.2, 1.1, 1.7],
+                              [0.001, -0.002, 1.]]))
+    points = t.apply(indices_for_image_of_shape((30, 20)))
+    for mode in ('constant', 'nearest'):
+        for order in (0, 1, 3):
+            expected = scipy_interpolation(pixels, points, order=order,
+                                           mode=mode, cval=0.5)
+            sampled = cython_point_interpolation(pixels, points, order=order,
+                                                 mode=mode, cval=0.5)
+            assert_allclose(sampled, expected)
+            sampled = cython_interpolation(pixels, (30, 20), t, order=order,
+                                           mode=mode, cval=0.5)
+            assert_allclose(sampled, expected)
+
+
+def test_warp_uint8_image_is_not_rounded():
+    pixels = np.zeros((20, 25, 1), dtype=np.uint8)
+    pixels[5:15, 5:15] = 255  # cubic interpolation overshoots at the edges
+    float_image = Image(pixels.astype(np.float64))
+    t = Affine.identity(2).from_vector(np.array([0.1, 0.05, -0.1, 0.1,
+                                                 1.3, 0.7]))
+    for order in (0, 1, 3):
+        expected = float_image.warp_to_shape((18, 22), t, order=order)
+        warped = Image(pixels).warp_to_shape((18, 22), t, order=order)
+        assert(warped.pixels.dtype == np.float64)
+        assert_allclose(warped.pixels, expected.pixels)
+        plan = WarpPlan((18, 22), t, float_image.shape, order=order)
+        planned = Image(pixels).warp_to_shape((18, 22), t, order=order,
+                                              plan=plan)
+        assert(planned.pixels.dtype == np.float64)
+        assert_allclose(planned.pixels, expected.pixels)
+
+
 def test_rescale_boolean():
     mask = BooleanImage.blank((100, 100))
     mask.resize((10, 10))
@@ -3,5 +3,7 @@ from .input import (import_image, import_images,
                     import_landmark_file, import_landmark_files,
                     data_path_to, data_dir_path, ls_builtin_assets,
                     image_paths, landmark_file_paths,
-                    import_pickle, import_pickles)
-from .output import export_image, export_landmark_file, export_pickle
+                    import_pickle, import_pickles, SameNameIndex,
+                    import_packed_images, LazyImageList, LazyFrames)
+from .output import (export_image, export_landmark_file, export_pickle,
+                     export_packed_images)
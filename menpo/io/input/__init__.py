@@ -3,4 +3,5 @@ from .base import (import_image, import_images,
                    import_landmark_file, import_landmark_files,
                    data_path_to, data_dir_path, ls_builtin_assets,
                    image_paths, landmark_file_paths,
-                   import_pickle, import_pickles)
+                   import_pickle, import_pickles, SameNameIndex,
+                   import_packed_images, LazyImageList, LazyFrames)
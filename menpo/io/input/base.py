@@ -1,6 +1,13 @@
 import abc
 import os
+from collections import deque, OrderedDict
+from functools import partial
+from itertools import islice
+from multiprocessing.pool import ThreadPool
+from numbers import Integral
 from pathlib import Path
+from threading import Lock
+import numpy as np
 
 from ..utils import _norm_path
 from menpo.base import menpo_src_dir_path
@@ -58,7 +65,82 @@ def same_name(asset):
     return {p.suffix[1:].upper(): p for p in landmark_file_paths(pattern)}
 
 
-def import_image(filepath, landmark_resolver=same_name, normalise=True):
+class SameNameIndex(object):
+    r"""
+    A landmark resolver that finds the same landmarks as :func:`same_name`,
+    but from an in-memory index rather than a glob per asset.
+
+    The first time an asset from a directory is resolved, the directory is
+    listed once and every landmark file in it is indexed by stem and
+    extension. All further lookups in that directory are answered from the
+    index, which saves a filesystem glob per image - most noticeably on
+    network mounted datasets. The index is kept for the lifetime of the
+    resolver, so the same resolver can be reused across calls to
+    :func:`import_images` on the same directories. Call :meth:`clear` if
+    landmark files have been added or removed since.
+
+    Examples
+    --------
+    Import a large collection with the landmarks indexed per directory
+
+        >>> resolver = SameNameIndex()
+        >>> images = list(import_images('./massive_image_db/*',
+        >>>                             landmark_resolver=resolver))
+    """
+
+    def __init__(self):
+        self._indices = {}
+        self._lock = Lock()
+
+    def __call__(self, asset):
+        path = asset.path
+        index = self._index_for_directory(path.parent)
+        return dict(index.get(path.stem, {}))
+
+    def _index_for_directory(self, directory):
+        # resolvers can be shared by the threads of import_images, so the
+        # index of each directory is built exactly once
+        with self._lock:
+            index = self._indices.get(directory)
+            if index is None:
+                index = _landmark_index_for_directory(directory)
+                self._indices[directory] = index
+        return index
+
+    def clear(self):
+        r"""
+        Forget all the indexed directories, so that they are listed again
+        when next used.
+        """
+        with self._lock:
+            self._indices = {}
+
+
+def _landmark_index_for_directory(directory):
+    r"""
+    Map the stem of every landmark file in a directory to a dictionary of the
+    form ``{'EXT': path}``, as returned by :func:`same_name`.
+    """
+    index = {}
+    try:
+        filenames = os.listdir(str(directory))
+    except OSError:
+        return index
+    for filename in filenames:
+        path = directory / filename
+        suffix = ''.join(path.suffixes)
+        # as for landmark_file_paths, only files whose full suffix has an
+        # importer are landmarks (so stems can't contain a '.')
+        if suffix not in image_landmark_types:
+            continue
+        stem = filename[:-len(suffix)]
+        index.setdefault(stem, {})[path.suffix[1:].upper()] = path
+    return index
+
+
+def import_image(filepath, landmark_resolver=same_name, normalise=True,
+                 compact=False, scale=None, max_diagonal=None,
+                 lazy_frames=False):
     r"""
     Single image (and associated landmarks) importer.
 
@@ -79,13 +161,36 @@ def import_image(filepath, landmark_resolver=same_name, normalise=True):
     normalise : `bool`, optional
         If ``True``, normalise the image pixels between 0 and 1 and convert
         to floating point.
+    compact : `bool`, optional
+        If ``True`` (and ``normalise`` is ``True``), 8-bit images are
+        imported as a :map:`CompactImage`, which keeps the decoded `uint8`
+        pixels (an eighth of the memory of ``np.float64`` pixels) and
+        normalises them lazily.
+    scale : `float`, optional
+        If less than 1, the image is decoded at this fraction of its full
+        size (rounding up), and its landmarks are scaled to match. JPEGs are
+        decoded straight to a reduced size, which is much faster and takes
+        much less memory than importing at full size and rescaling.
+    max_diagonal : `float`, optional
+        If given, the image is decoded at a size whose diagonal is at most
+        ``max_diagonal`` (rounding down), as for ``scale``.
+    lazy_frames : `bool`, optional
+        If ``True``, the frames of a multi-frame image (such as an animated
+        GIF) are returned as :map:`LazyFrames`, which decodes each frame
+        (and attaches its landmarks) only when it is accessed.
 
     Returns
     -------
-    images : :map:`Image` or list of
+    images : :map:`Image` or list of or :map:`LazyFrames`
         An instantiated :map:`Image` or subclass thereof or a list of images.
+
+    Raises
+    ------
+    ValueError
+        If ``scale`` or ``max_diagonal`` is not positive.
     """
-    kwargs = {'normalise': normalise}
+    kwargs = {'normalise': normalise, 'compact': compact, 'scale': scale,
+              'max_diagonal': max_diagonal, 'lazy_frames': lazy_frames}
     return _import(filepath, image_types,
                    landmark_ext_map=image_landmark_types,
                    landmark_resolver=landmark_resolver,
@@ -129,8 +234,34 @@ def import_pickle(filepath):
     return _import(filepath, pickle_types)
 
 
+def import_packed_images(filepath):
+    r"""Import a packed image file written by :map:`export_packed_images`.
+
+    The file is memory mapped rather than read, and images are only built
+    as they are indexed, with pixels that are views onto the memory map.
+
+    Parameters
+    ----------
+    filepath : `str`
+        A relative or absolute filepath to an .mpk file.
+
+    Returns
+    -------
+    :map:`PackedImages`
+        The images of the file, indexable by `int` and `slice`.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a packed image file.
+    """
+    return _import(filepath, packed_types)
+
+
 def import_images(pattern, max_images=None, landmark_resolver=same_name,
-                  normalise=True, verbose=False):
+                  normalise=True, compact=False, scale=None,
+                  max_diagonal=None, n_workers=None, prefetch=None,
+                  lazy=False, cache_size=8, verbose=False):
     r"""
     Multiple image import generator.
 
@@ -138,9 +269,11 @@ def import_images(pattern, max_images=None, landmark_resolver=same_name,
     information such as landmarks. It searches the directory for files that
     begin with the same filename and end in a supported extension.
 
-    Note that this is a generator function. This allows for pre-processing
-    of data to take place as data is imported (e.g. cropping images to
-    landmarks as they are imported for memory efficiency).
+    Note that by default this returns a generator. This allows for
+    pre-processing of data to take place as data is imported (e.g. cropping
+    images to landmarks as they are imported for memory efficiency). If
+    ``lazy`` is ``True``, a :map:`LazyImageList` is returned instead, which
+    allows random access to the images without holding them all in memory.
 
     Parameters
     ----------
@@ -156,19 +289,56 @@ def import_images(pattern, max_images=None, landmark_resolver=same_name,
         Default finds landmarks with the same name as the image file.
     normalise : `bool`, optional
         If ``True``, normalise the images between 0.0 and 1.0 and convert
-        to ``np.float``.
+        to the :map:`default_dtype`.
+    compact : `bool`, optional
+        If ``True`` (and ``normalise`` is ``True``), 8-bit images are
+        imported as :map:`CompactImage` s, which keep the decoded `uint8`
+        pixels and normalise them lazily. This allows many more images to be
+        held in memory at once.
+    scale : `float`, optional
+        If less than 1, the images are decoded at this fraction of their
+        full size (rounding up), and their landmarks are scaled to match.
+        JPEGs are decoded straight to a reduced size.
+    max_diagonal : `float`, optional
+        If given, the images are decoded at a size whose diagonal is at most
+        ``max_diagonal`` (rounding down), as for ``scale``.
+    n_workers : `int`, optional
+        If greater than 1, images (and their landmarks) are decoded by a
+        pool of this many threads. PIL releases the GIL while decoding, so
+        this speeds up importing large collections. Images are still
+        yielded in sorted order. The frames of multi-frame images (such as
+        animated GIFs) are always decoded one by one as they are yielded,
+        so only one frame is held at a time.
+    prefetch : `int`, optional
+        The maximum number of images decoded ahead of the one being
+        yielded when ``n_workers`` is greater than 1, which bounds the
+        memory used by the look-ahead. Defaults to ``2 * n_workers``.
+    lazy : `bool`, optional
+        If ``True``, the images are not imported here. Instead a
+        :map:`LazyImageList` of the images found is returned, which imports
+        each image when it is indexed. ``n_workers`` and ``prefetch`` then
+        apply to iterating over the list.
+    cache_size : `int`, optional
+        If ``lazy`` is ``True``, the maximum number of imported images the
+        :map:`LazyImageList` caches. If ``0``, nothing is cached.
     verbose : `bool`, optional
         If ``True`` progress of the importing will be dynamically reported.
+        Ignored if ``lazy`` is ``True``.
 
-    Yields
-    ------
-    :map:`MaskedImage`
+    Returns
+    -------
+    images : generator of :map:`MaskedImage` or :map:`LazyImageList`
         Images found to match the glob pattern provided.
 
     Raises
     ------
     ValueError
         If no images are found at the provided glob.
+    ValueError
+        If ``n_workers`` or ``prefetch`` is less than 1, or ``prefetch`` is
+        given without ``n_workers`` greater than 1.
+    ValueError
+        If ``scale`` or ``max_diagonal`` is not positive.
 
     Examples
     --------
@@ -178,15 +348,195 @@ def import_images(pattern, max_images=None, landmark_resolver=same_name,
         >>> for im in import_images('./massive_image_db/*'):
         >>>    im.crop_inplace((0, 0), (100, 100))  # crop to a sensible size as we go
         >>>    images.append(im)
+
+    Shuffle a huge collection of images and look at a few of them
+
+        >>> images = import_images('./massive_image_db/*', lazy=True)
+        >>> images = images[np.random.permutation(len(images))]
+        >>> first_ten = list(images[:10])
     """
-    kwargs = {'normalise': normalise}
-    for asset in _import_glob_generator(pattern, image_types,
-                                        max_assets=max_images,
-                                        landmark_resolver=landmark_resolver,
-                                        landmark_ext_map=image_landmark_types,
-                                        verbose=verbose,
-                                        importer_kwargs=kwargs):
-        yield asset
+    # validated here as the images are imported by a generator
+    _validate_workers(n_workers, prefetch)
+    _validate_decode_size(scale, max_diagonal)
+    # unless the images are held lazily, the frames of multi-frame images
+    # are streamed through the generator one by one
+    kwargs = {'normalise': normalise, 'compact': compact, 'scale': scale,
+              'max_diagonal': max_diagonal, 'lazy_frames': not lazy}
+    if lazy:
+        return LazyImageList(sorted(_glob_filepaths(pattern, image_types,
+                                                    max_assets=max_images)),
+                             landmark_resolver=landmark_resolver,
+                             importer_kwargs=kwargs, cache_size=cache_size,
+                             n_workers=n_workers, prefetch=prefetch)
+    return _import_glob_generator(pattern, image_types,
+                                  max_assets=max_images,
+                                  landmark_resolver=landmark_resolver,
+                                  landmark_ext_map=image_landmark_types,
+                                  verbose=verbose,
+                                  importer_kwargs=kwargs,
+                                  n_workers=n_workers,
+                                  prefetch=prefetch)
+
+
+class LazyImageList(object):
+    r"""
+    A list of images that are only imported when they are indexed.
+
+    Only the paths of the images are held. Indexing with an `int` imports
+    that image (and its landmarks) and applies any functions given to
+    :meth:`map`. Indexing with a `slice`, a sequence of `int` or a boolean
+    mask returns a new :map:`LazyImageList` of just those images, without importing
+    anything - so a huge collection can be indexed, shuffled and subsampled
+    freely. A file holding several images (such as an animated GIF) is a
+    single item of the list.
+
+    The most recently imported images are kept in a cache shared by all the
+    lists derived from this one, so that repeatedly indexing the same
+    images does not import them again. Every index returns a new copy of
+    the image, so modifying it never affects the cache.
+
+    Parameters
+    ----------
+    filepaths : `list` of ``pathlib.Path``
+        The paths of the images.
+    landmark_resolver : `function`, optional
+        The function used to find the landmarks of each image, as for
+        :func:`import_images`. It is called as each image is imported.
+    importer_kwargs : `dict`, optional
+        The kwargs given to the importer of each image (``normalise``,
+        ``compact``, ``scale`` and ``max_diagonal``).
+    cache_size : `int`, optional
+        The maximum number of imported images that are cached. If ``0``,
+        nothing is cached.
+    n_workers : `int`, optional
+        If greater than 1, iterating over the list imports the images with a
+        pool of this many threads, as for :func:`import_images`.
+    prefetch : `int`, optional
+        The maximum number of images imported ahead of the one being
+        iterated over when ``n_workers`` is greater than 1.
+
+    Raises
+    ------
+    ValueError
+        If ``cache_size`` is negative, ``n_workers`` or ``prefetch`` is less
+        than 1 or ``prefetch`` is given without ``n_workers`` greater than 1.
+    """
+
+    def __init__(self, filepaths, landmark_resolver=same_name,
+                 importer_kwargs=None, cache_size=8, n_workers=None,
+                 prefetch=None):
+        if cache_size < 0:
+            raise ValueError('cache_size must be non-negative - '
+                             '{} given'.format(cache_size))
+        _validate_workers(n_workers, prefetch)
+        self.paths = list(filepaths)
+        self.landmark_resolver = landmark_resolver
+        self.importer_kwargs = importer_kwargs
+        self.n_workers = n_workers
+        self.prefetch = prefetch
+        self._cache = _LRUCache(cache_size)
+        self._functions = ()
+
+    def _derive(self, paths=None, functions=None):
+        derived = LazyImageList.__new__(LazyImageList)
+        derived.__dict__.update(self.__dict__)
+        if paths is not None:
+            derived.paths = paths
+        if functions is not None:
+            derived._functions = functions
+        return derived
+
+    def _import_path(self, path):
+        return _import(path, image_types,
+                       landmark_resolver=self.landmark_resolver,
+                       landmark_ext_map=image_landmark_types,
+                       importer_kwargs=self.importer_kwargs)
+
+    def _image_for_path(self, path):
+        image = self._cache.get(path)
+        if image is None:
+            image = self._import_path(path)
+            if self._cache.max_size == 0:
+                return image
+            self._cache.put(path, image)
+        # hand out copies so the cached image is never modified
+        if isinstance(image, list):
+            return [i.copy() for i in image]
+        return image.copy()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._derive(paths=self.paths[i])
+        if not isinstance(i, Integral) and hasattr(i, '__iter__'):
+            mask = np.asarray(i)
+            if mask.dtype == np.bool:
+                if mask.shape != (len(self),):
+                    raise IndexError('A boolean mask must have one entry per '
+                                     'image - {} given for {} '
+                                     'images'.format(mask.shape, len(self)))
+                i = np.flatnonzero(mask)
+            return self._derive(paths=[self.paths[j] for j in i])
+        image = self._image_for_path(self.paths[i])
+        for function in self._functions:
+            image = function(image)
+        return image
+
+    def __iter__(self):
+        if self.n_workers is not None and self.n_workers > 1:
+            return _prefetching_map(self.__getitem__, xrange(len(self)),
+                                    self.n_workers, prefetch=self.prefetch)
+        return (self[i] for i in xrange(len(self)))
+
+    def map(self, function):
+        r"""
+        A new :map:`LazyImageList` of these images with a function applied
+        to each image when it is indexed. Nothing is imported here.
+
+        Parameters
+        ----------
+        function : `function`
+            The function to apply. It should take an image (as returned by
+            indexing this list) and return the new item.
+
+        Returns
+        -------
+        mapped : :map:`LazyImageList`
+            The images with ``function`` applied, sharing the cache of
+            this list.
+        """
+        return self._derive(functions=self._functions + (function,))
+
+    def __str__(self):
+        return 'Lazy list of {} images'.format(len(self))
+
+
+class _LRUCache(object):
+    r"""
+    A thread safe cache of at most ``max_size`` items, evicting the least
+    recently used item when full.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self._items[key] = value  # now the most recently used
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
 
 
 def import_landmark_files(pattern, max_landmarks=None, verbose=False):
@@ -329,17 +679,15 @@ def landmark_file_paths(pattern):
 def _import_glob_generator(pattern, extension_map, max_assets=None,
                            landmark_resolver=same_name,
                            landmark_ext_map=None, importer_kwargs=None,
-                           verbose=False):
-    filepaths = list(glob_with_suffix(pattern, extension_map))
-    if max_assets:
-        filepaths = filepaths[:max_assets]
+                           verbose=False, n_workers=None, prefetch=None):
+    filepaths = _glob_filepaths(pattern, extension_map, max_assets=max_assets)
     n_files = len(filepaths)
-    if n_files == 0:
-        raise ValueError('The glob {} yields no assets'.format(pattern))
     for i, asset in enumerate(_multi_import_generator(filepaths, extension_map,
                                          landmark_resolver=landmark_resolver,
                                          landmark_ext_map=landmark_ext_map,
-                                         importer_kwargs=importer_kwargs)):
+                                         importer_kwargs=importer_kwargs,
+                                         n_workers=n_workers,
+                                         prefetch=prefetch)):
         if verbose:
             print_dynamic('- Loading {} assets: {}'.format(
                 n_files, progress_bar_str(float(i + 1) / n_files,
@@ -347,6 +695,15 @@ def _import_glob_generator(pattern, extension_map, max_assets=None,
         yield asset
 
 
+def _glob_filepaths(pattern, extension_map, max_assets=None):
+    filepaths = list(glob_with_suffix(pattern, extension_map))
+    if max_assets:
+        filepaths = filepaths[:max_assets]
+    if len(filepaths) == 0:
+        raise ValueError('The glob {} yields no assets'.format(pattern))
+    return filepaths
+
+
 def _import(filepath, extensions_map, keep_importer=False,
             landmark_resolver=same_name,
             landmark_ext_map=None, asset=None, importer_kwargs=None):
@@ -399,29 +756,24 @@ def _import(filepath, extensions_map, keep_importer=False,
         built_objects = importer.build(asset=asset)
     else:
         built_objects = importer.build()
+
+    finish = partial(_attach_path_and_landmarks, path=path, importer=importer,
+                     landmark_resolver=landmark_resolver,
+                     landmark_ext_map=landmark_ext_map)
+    if isinstance(built_objects, LazyFrames):
+        # the frames are finished off as they are built
+        built_objects.frame_functions.append(finish)
+        if keep_importer:
+            return built_objects, importer
+        else:
+            return built_objects
+
     # landmarks are iterable so check for list precisely
     # enforce a list to make processing consistent
     if not isinstance(built_objects, list):
         built_objects = [built_objects]
-
-    # attach path if there is no x.path already.
     for x in built_objects:
-        if not hasattr(x, 'path'):
-            try:
-                x.path = path
-            except AttributeError:
-                pass  # that's fine! Probably a dict/list from PickleImporter.
-    # handle landmarks
-    if landmark_ext_map is not None:
-        for x in built_objects:
-            lm_paths = landmark_resolver(x)  # use the users fcn to find
-            # paths
-            if lm_paths is None:
-                continue
-            for group_name, lm_path in lm_paths.iteritems():
-                lms = _import(lm_path, landmark_ext_map, asset=x)
-                if x.n_dims == lms.n_dims:
-                    x.landmarks[group_name] = lms
+        finish(x)
 
     # undo list-ification (if we added it!)
     if len(built_objects) == 1:
@@ -433,9 +785,42 @@ def _import(filepath, extensions_map, keep_importer=False,
         return built_objects
 
 
+def _attach_path_and_landmarks(x, path=None, importer=None,
+                               landmark_resolver=same_name,
+                               landmark_ext_map=None):
+    r"""
+    Attach the path an asset was imported from (if there is no ``x.path``
+    already) and, if ``landmark_ext_map`` is not ``None``, the landmarks
+    found for it by the ``landmark_resolver``. Returns the asset.
+    """
+    if not hasattr(x, 'path'):
+        try:
+            x.path = path
+        except AttributeError:
+            pass  # that's fine! Probably a dict/list from PickleImporter.
+    if landmark_ext_map is None:
+        return x
+    lm_paths = landmark_resolver(x)  # use the users fcn to find paths
+    if lm_paths is None:
+        return x
+    # assets decoded at a reduced resolution have a transform onto it from
+    # the full resolution the landmarks are given at
+    decode_transform = getattr(importer, 'decode_transform', None)
+    for group_name, lm_path in lm_paths.iteritems():
+        lms, lm_importer = _import(lm_path, landmark_ext_map, asset=x,
+                                   keep_importer=True)
+        if x.n_dims == lms.n_dims:
+            if (decode_transform is not None and
+                    not lm_importer.normalised):
+                decode_transform.apply_inplace(lms.lms)
+            x.landmarks[group_name] = lms
+    return x
+
+
 def _multi_import_generator(filepaths, extensions_map, keep_importers=False,
                             landmark_resolver=same_name,
-                            landmark_ext_map=None, importer_kwargs=None):
+                            landmark_ext_map=None, importer_kwargs=None,
+                            n_workers=None, prefetch=None):
     r"""
     Generator yielding assets from the filepaths provided.
 
@@ -464,6 +849,12 @@ def _multi_import_generator(filepaths, extensions_map, keep_importers=False,
         return a dictionary of the form {'group_name': 'landmark_filepath'}
     importer_kwargs: dict, optional
         kwargs to be supplied to the importer if not None
+    n_workers: int, optional
+        If greater than 1, the files are imported by a pool of this many
+        threads.
+    prefetch: int, optional
+        The maximum number of files imported ahead of the one being yielded
+        when ``n_workers`` is greater than 1. Defaults to ``2 * n_workers``.
 
     Yields
     ------
@@ -474,18 +865,27 @@ def _multi_import_generator(filepaths, extensions_map, keep_importers=False,
         yielded asset.
     """
     importer = None
-    for f in sorted(filepaths):
-        imported = _import(f, extensions_map, keep_importer=keep_importers,
-                           landmark_resolver=landmark_resolver,
-                           landmark_ext_map=landmark_ext_map,
-                           importer_kwargs=importer_kwargs)
+
+    def import_file(f):
+        return _import(f, extensions_map, keep_importer=keep_importers,
+                       landmark_resolver=landmark_resolver,
+                       landmark_ext_map=landmark_ext_map,
+                       importer_kwargs=importer_kwargs)
+
+    if n_workers is not None and n_workers > 1:
+        all_imported = _prefetching_map(import_file, sorted(filepaths),
+                                        n_workers, prefetch=prefetch)
+    else:
+        all_imported = (import_file(f) for f in sorted(filepaths))
+    for imported in all_imported:
         if keep_importers:
             assets, importer = imported
         else:
             assets = imported
         # could be that there are many assets returned from one file.
-        # landmarks are iterable so check for list precisely
-        if isinstance(assets, list):
+        # landmarks are iterable so check for list precisely. Lazy frames
+        # are built one by one as they are yielded.
+        if isinstance(assets, (list, LazyFrames)):
             # there are multiple assets, and one importer.
             # -> yield each asset in turn with the shared importer (if
             # requested)
@@ -500,6 +900,71 @@ def _multi_import_generator(filepaths, extensions_map, keep_importers=False,
             yield imported
 
 
+def _validate_workers(n_workers, prefetch):
+    r"""
+    Check the ``n_workers`` and ``prefetch`` given to import in parallel.
+    ``prefetch`` only applies to a pool of more than one worker, so is
+    rejected otherwise rather than silently ignored.
+    """
+    if n_workers is not None and n_workers < 1:
+        raise ValueError('n_workers must be at least 1 - '
+                         '{} given'.format(n_workers))
+    if prefetch is not None:
+        if prefetch < 1:
+            raise ValueError('prefetch must be at least 1 - '
+                             '{} given'.format(prefetch))
+        if n_workers is None or n_workers == 1:
+            raise ValueError('prefetch only applies when n_workers is '
+                             'greater than 1 - {} given'.format(n_workers))
+
+
+def _validate_decode_size(scale, max_diagonal):
+    r"""
+    Check the ``scale`` and ``max_diagonal`` given to decode images at a
+    reduced size. A non-positive value would decode every image to a single
+    pixel.
+    """
+    if scale is not None and scale <= 0:
+        raise ValueError('scale must be positive - {} given'.format(scale))
+    if max_diagonal is not None and max_diagonal <= 0:
+        raise ValueError('max_diagonal must be positive - '
+                         '{} given'.format(max_diagonal))
+
+
+def _prefetching_map(function, items, n_workers, prefetch=None):
+    r"""
+    Generator yielding ``function(item)`` for each of the items, in order,
+    computed by a pool of ``n_workers`` threads. At most ``prefetch`` results
+    (by default ``2 * n_workers``) are computed ahead of the one being
+    yielded, so the memory held by the look-ahead is bounded however slowly
+    the results are consumed. Exceptions are raised when the result they
+    belong to is reached.
+    """
+    if n_workers < 1:
+        raise ValueError('n_workers must be at least 1 - '
+                         '{} given'.format(n_workers))
+    if prefetch is None:
+        prefetch = 2 * n_workers
+    if prefetch < 1:
+        raise ValueError('prefetch must be at least 1 - '
+                         '{} given'.format(prefetch))
+    items = iter(items)
+    pool = ThreadPool(n_workers)
+    try:
+        pending = deque(pool.apply_async(function, (item,))
+                        for item in islice(items, prefetch))
+        while pending:
+            result = pending.popleft().get()
+            # keep the look-ahead full before handing the result over
+            for item in islice(items, 1):
+                pending.append(pool.apply_async(function, (item,)))
+            yield result
+    finally:
+        # the consumer may stop early - drop any outstanding work
+        pool.terminate()
+        pool.join()
+
+
 def _pathlib_glob_for_pattern(pattern):
     r"""Generator for glob matching a string path pattern
 
@@ -643,6 +1108,66 @@ class Importer(object):
         pass
 
 
+class LazyFrames(object):
+    r"""
+    The frames of a multi-frame file (such as an animated GIF), built one
+    at a time as they are accessed rather than all at once.
+
+    Iterating over the frames builds each in turn, holding only one frame
+    at a time, and indexing with an `int` builds just that frame. Importers
+    that stream frames return this from :meth:`Importer.build`.
+
+    Parameters
+    ----------
+    build_frame : `function`
+        Builds the frame at the given index, raising an `IndexError` past
+        the last frame.
+    count_frames : `function`
+        Returns the number of frames. Only called if the length is needed.
+
+    Attributes
+    ----------
+    frame_functions : `list` of `function`
+        Functions applied, in order, to each frame as it is built.
+    """
+
+    def __init__(self, build_frame, count_frames):
+        self._build_frame = build_frame
+        self._count_frames = count_frames
+        self._n_frames = None
+        self.frame_functions = []
+
+    def __len__(self):
+        if self._n_frames is None:
+            self._n_frames = self._count_frames()
+        return self._n_frames
+
+    def _finish(self, frame):
+        for function in self.frame_functions:
+            frame = function(frame)
+        return frame
+
+    def __getitem__(self, i):
+        if not isinstance(i, Integral):
+            raise TypeError('Frames can only be indexed by an int - '
+                            '{} given'.format(type(i).__name__))
+        if i < 0:
+            i += len(self)
+        if i < 0:
+            raise IndexError('Frame index out of range')
+        return self._finish(self._build_frame(i))
+
+    def __iter__(self):
+        i = 0
+        while True:
+            try:
+                frame = self._build_frame(i)
+            except IndexError:
+                return  # past the last frame
+            yield self._finish(frame)
+            i += 1
+
+
 # Avoid circular imports
 from menpo.io.input.extensions import (image_landmark_types, image_types,
-                                       pickle_types)
+                                       pickle_types, packed_types)
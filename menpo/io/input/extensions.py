@@ -3,6 +3,7 @@ from .landmark import LM2Importer, LJSONImporter
 from .image import PILImporter, PILGIFImporter
 from .landmark_image import ImageASFImporter, ImagePTSImporter
 from .pickle import PickleImporter, GZipPickleImporter
+from .packed import PackedImagesImporter
 
 image_types = {'.bmp': PILImporter,
                '.dib': PILImporter,
@@ -37,3 +38,5 @@ image_landmark_types = {'.asf': ImageASFImporter,
 
 pickle_types = {'.pkl': PickleImporter,
                 '.pkl.gz': GZipPickleImporter}
+
+packed_types = {'.mpk': PackedImagesImporter}
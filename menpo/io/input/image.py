@@ -1,7 +1,9 @@
 import numpy as np
 import PIL.Image as PILImage
-from .base import Importer
-from menpo.image import Image, MaskedImage, BooleanImage
+from menpo.base import default_dtype
+from .base import Importer, LazyFrames, _validate_decode_size
+from menpo.image import Image, MaskedImage, BooleanImage, CompactImage
+from menpo.transform import Translation, NonUniformScale
 
 
 class PILImporter(Importer):
@@ -11,7 +13,8 @@ class PILImporter(Importer):
     Different image modes cause different importing strategies.
 
     RGB, L, I:
-        Imported as either `float` or `uint8` depending on normalisation flag.
+        Imported as either the :map:`default_dtype` or `uint8` depending on
+        normalisation flag.
     RGBA:
         Imported as :map:`MaskedImage` if normalise is ``True`` else imported
         as a 4 channel `uint8` image.
@@ -28,11 +31,44 @@ class PILImporter(Importer):
         If ``True``, normalise between 0.0 and 1.0 and convert to float. If
         ``False`` just pass whatever PIL imports back (according
         to types rules outlined in constructor).
+    compact : `bool`, optional
+        If ``True`` (and ``normalise`` is ``True``), 8-bit images (modes L,
+        RGB and P) are imported as a :map:`CompactImage` that keeps the
+        decoded `uint8` pixels and normalises them lazily.
+    scale : `float`, optional
+        If less than 1, the image is decoded at this fraction of its size.
+    max_diagonal : `float`, optional
+        If given, the image is decoded at a size whose diagonal is at most
+        ``max_diagonal``.
+    lazy_frames : `bool`, optional
+        If ``True``, importers of multi-frame images (see
+        :map:`PILGIFImporter`) build their frames lazily. Single frame
+        images are unaffected.
+
+    Attributes
+    ----------
+    decode_transform : :map:`Affine` or ``None``
+        After :meth:`build`, the transform from the full resolution of the
+        file onto the reduced resolution it was decoded at, or ``None`` if
+        it was decoded at full resolution.
+
+    Raises
+    ------
+    ValueError
+        If ``scale`` or ``max_diagonal`` is not positive.
     """
-    def __init__(self, filepath, normalise=True):
+    def __init__(self, filepath, normalise=True, compact=False, scale=None,
+                 max_diagonal=None, lazy_frames=False):
+        _validate_decode_size(scale, max_diagonal)
         super(PILImporter, self).__init__(filepath)
         self._pil_image = None
         self.normalise = normalise
+        self.compact = compact
+        self.scale = scale
+        self.max_diagonal = max_diagonal
+        self.lazy_frames = lazy_frames
+        self.decode_transform = None
+        self._decode_size = None
 
     def build(self):
         r"""
@@ -40,6 +76,8 @@ class PILImporter(Importer):
         create a class.
         """
         self._pil_image = PILImage.open(self.filepath)
+        self._plan_reduced_decode()
+        self._pil_image = self._resized(self._pil_image)
         mode = self._pil_image.mode
         if mode == 'RGBA':
             # RGB with Alpha Channel
@@ -53,6 +91,9 @@ class PILImporter(Importer):
             else:
                 # With no normalisation we just return the pixels
                 image = Image(self._pil_to_numpy(False))
+        elif mode in ['L', 'RGB'] and self.normalise and self.compact:
+            # 8-bit images are normalised lazily
+            image = CompactImage(self._pil_to_numpy(False))
         elif mode in ['L', 'I', 'RGB']:
             # Greyscale, Integer and RGB images
             image = Image(self._pil_to_numpy(self.normalise))
@@ -61,7 +102,7 @@ class PILImporter(Importer):
             image = BooleanImage(self._pil_to_numpy(False))
         elif mode == 'P':
             # Convert pallete images to RGB
-            image = Image(self._pil_to_numpy(self.normalise, convert='RGB'))
+            image = self._build_rgb_image()
         elif mode == 'F':  # Floating point images
             # Don't normalise as we don't know the scale
             image = Image(self._pil_to_numpy(False))
@@ -69,11 +110,65 @@ class PILImporter(Importer):
             raise ValueError('Unexpected mode for PIL: {}'.format(mode))
         return image
 
+    def _plan_reduced_decode(self):
+        r"""
+        Work out the size to decode the image at from ``scale`` and
+        ``max_diagonal``, and the transform that takes landmarks at full
+        resolution onto it. JPEG decoders are set to decode straight to the
+        smallest of 1/2, 1/4 or 1/8 of the full size that is still at least
+        as large, which saves most of the decoding work and memory.
+        """
+        width, height = self._pil_image.size
+        scale = 1.0 if self.scale is None else float(self.scale)
+        # round up, unless that could break the bound on the diagonal
+        round_size = np.ceil
+        if self.max_diagonal is not None:
+            diagonal_scale = self.max_diagonal / np.hypot(width, height)
+            if diagonal_scale < scale:
+                scale, round_size = diagonal_scale, np.floor
+        if scale >= 1:
+            return
+        self._decode_size = (max(1, int(round_size(width * scale))),
+                             max(1, int(round_size(height * scale))))
+        # a no-op for formats without reduced decoding
+        self._pil_image.draft(self._pil_image.mode, self._decode_size)
+        # PIL resamples aligning pixel centres, so the landmarks are scaled
+        # about the corner of the first pixel rather than its centre
+        scales = np.array([self._decode_size[1] / float(height),
+                           self._decode_size[0] / float(width)])
+        to_corner = Translation(np.array([0.5, 0.5]))
+        self.decode_transform = to_corner.compose_before(
+            NonUniformScale(scales)).compose_before(
+            Translation(np.array([-0.5, -0.5])))
+
+    def _resized(self, pil_image):
+        r"""
+        The PIL image resized to the planned decode size (if any).
+        """
+        if self._decode_size is None or pil_image.size == self._decode_size:
+            return pil_image
+        if pil_image.mode in ['1', 'P']:
+            resample = PILImage.NEAREST
+        else:
+            resample = PILImage.BILINEAR
+        return pil_image.resize(self._decode_size, resample)
+
+    def _build_rgb_image(self):
+        r"""
+        An RGB image of the (converted) PIL image, compact if requested.
+        """
+        if self.normalise and self.compact:
+            return CompactImage(self._pil_to_numpy(False, convert='RGB'))
+        return Image(self._pil_to_numpy(self.normalise, convert='RGB'))
+
     def _pil_to_numpy(self, normalise, convert=None):
-        dtype = np.float if normalise else None
+        dtype = default_dtype() if normalise else None
         p = self._pil_image.convert(convert) if convert else self._pil_image
+        p = self._resized(p)
         np_pixels = np.array(p, dtype=dtype, copy=True)
-        return np_pixels / 255.0 if normalise else np_pixels
+        if normalise:
+            np_pixels /= 255.0
+        return np_pixels
 
 
 class PILGIFImporter(PILImporter):
@@ -82,7 +177,8 @@ class PILGIFImporter(PILImporter):
     (`P` for `RGB` (Pallete mode).
 
     For multi-frame GIF animations, will return a list of images containing
-    each frame.
+    each frame, or, if ``lazy_frames`` is ``True``, a :map:`LazyFrames`
+    that decodes and normalises each frame only when it is accessed.
 
     Parameters
     ----------
@@ -92,10 +188,26 @@ class PILGIFImporter(PILImporter):
         If ``True``, normalise between 0.0 and 1.0 and convert to float. If
         ``False`` just pass whatever PIL imports back (according
         to types rules outlined in constructor).
+    compact : `bool`, optional
+        If ``True`` (and ``normalise`` is ``True``), frames are imported as
+        :map:`CompactImage` s.
+    scale : `float`, optional
+        If less than 1, each frame is resized to this fraction of its size.
+    max_diagonal : `float`, optional
+        If given, each frame is resized so that its diagonal is at most
+        ``max_diagonal``.
+    lazy_frames : `bool`, optional
+        If ``True``, return the frames as a :map:`LazyFrames`. Iterating
+        over it holds only one frame at a time, and indexing seeks straight
+        to a frame.
     """
 
-    def __init__(self, filepath, normalise=True):
-        super(PILGIFImporter, self).__init__(filepath, normalise=normalise)
+    def __init__(self, filepath, normalise=True, compact=False, scale=None,
+                 max_diagonal=None, lazy_frames=False):
+        super(PILGIFImporter, self).__init__(filepath, normalise=normalise,
+                                             compact=compact, scale=scale,
+                                             max_diagonal=max_diagonal,
+                                             lazy_frames=lazy_frames)
 
     def build(self):
         r"""
@@ -103,22 +215,47 @@ class PILGIFImporter(PILImporter):
         create a class.
         """
         self._pil_image = PILImage.open(self.filepath)
+        # frames are resized one by one once converted to RGB
+        self._plan_reduced_decode()
         # By default GIFs use a
-        if self._pil_image.mode == 'P':
-            # Do we need this duration information for playback?
-            # duration = self._pil_image.info['duration']
-            images = []
-            try:
-                while 1:  # Keep looping until we hit the end of the GIF
-                    np_pixels = self._pil_to_numpy(self.normalise,
-                                                   convert='RGB')
-                    images.append(Image(np_pixels))
-                    # Seek to the next frame
-                    self._pil_image.seek(self._pil_image.tell() + 1)
-            except EOFError:
-                pass  # Exhausted GIF
-        else:
+        if self._pil_image.mode != 'P':
             raise ValueError('Unknown mode for GIF: {}'.format(
                 self._pil_image.mode))
+        # Do we need this duration information for playback?
+        # duration = self._pil_image.info['duration']
+        frames = LazyFrames(self._build_frame, self._count_frames)
+        if self.lazy_frames:
+            return frames
+        return list(frames)
+
+    def _seek(self, frame):
+        r"""
+        Seek the PIL image to the given frame, raising an `IndexError` if
+        the GIF has no such frame. GIFs can only be decoded forwards, so
+        seeking back reopens the file.
+        """
+        if frame < self._pil_image.tell():
+            self._pil_image = PILImage.open(self.filepath)
+        try:
+            while self._pil_image.tell() < frame:
+                self._pil_image.seek(self._pil_image.tell() + 1)
+        except EOFError:
+            raise IndexError('GIF has no frame {}'.format(frame))
+
+    def _build_frame(self, frame):
+        self._seek(frame)
+        return self._build_rgb_image()
 
-        return images
+    def _count_frames(self):
+        n_frames = getattr(self._pil_image, 'n_frames', None)
+        if n_frames is not None:
+            return n_frames
+        # count by seeking through a separate handle on the file
+        pil_image = PILImage.open(self.filepath)
+        n_frames = 1
+        try:
+            while 1:
+                pil_image.seek(n_frames)
+                n_frames += 1
+        except EOFError:
+            return n_frames
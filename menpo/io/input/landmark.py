@@ -22,6 +22,10 @@ class LandmarkImporter(Importer):
 
     __metaclass__ = abc.ABCMeta
 
+    # whether the landmarks are stored normalised to the size of the asset
+    # they belong to (rather than in its coordinates)
+    normalised = False
+
     def __init__(self, filepath):
         super(LandmarkImporter, self).__init__(filepath)
         self.pointcloud = None
@@ -90,6 +94,8 @@ class ASFImporter(LandmarkImporter):
     ----------
     .. [1] http://www2.imm.dtu.dk/~aam/datasets/datasets.html
     """
+    normalised = True
+
     def __init__(self, filepath):
         super(ASFImporter, self).__init__(filepath)
 
@@ -0,0 +1,144 @@
+import cPickle as pickle
+import numpy as np
+from pathlib import Path
+
+from .base import Importer
+from menpo.io.output.packed import MAGIC, TRAILER
+
+
+class PackedImagesImporter(Importer):
+    r"""
+    Importer for the packed image format written by
+    :map:`export_packed_images`. Building returns a :map:`PackedImages`
+    that only reads the index of the file - no pixels are read until an
+    image is indexed.
+
+    Parameters
+    ----------
+    filepath : `str`
+        Absolute filepath of the packed image file.
+    """
+
+    def build(self):
+        return PackedImages(self.filepath)
+
+
+def _packed_array(filepath, record):
+    offset, dtype, shape = record
+    dtype = np.dtype(dtype)
+    if int(np.prod(shape)) == 0:
+        return np.empty(shape, dtype=dtype)  # can't map nothing
+    # a copy-on-write map of its own, viewed as a plain ndarray so that
+    # arrays derived from it are never memmaps themselves
+    return np.asarray(np.memmap(filepath, dtype=dtype, mode='c',
+                                offset=offset, shape=shape))
+
+
+def _packed_bytes(filepath, record):
+    offset, n_bytes = record
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        return f.read(n_bytes)
+
+
+def _unpack_image(filepath, entry):
+    from menpo.image import BooleanImage, CompactImage, Image, MaskedImage
+    pixels = _packed_array(filepath, entry['pixels'])
+    image_type = entry['type']
+    if image_type == 'compact':
+        image = CompactImage(pixels, scale=entry['scale'], copy=False)
+    elif image_type == 'masked':
+        image = MaskedImage(pixels, copy=False,
+                            mask=_packed_array(filepath, entry['mask']))
+    elif image_type == 'boolean':
+        image = BooleanImage(pixels[..., 0], copy=False)
+    else:
+        image = Image(pixels, copy=False)
+    if entry['landmarks'] is not None:
+        image.landmarks = pickle.loads(_packed_bytes(filepath,
+                                                     entry['landmarks']))
+    if entry['path'] is not None:
+        image.path = Path(entry['path'])
+    return image
+
+
+class PackedImages(object):
+    r"""
+    The images of a packed image file, read lazily by memory mapping the
+    file.
+
+    Indexing with an `int` builds that image, with its pixels (and mask) as
+    views straight onto a memory map of the file - nothing is copied and
+    only the pages of the file the image lives in are ever read. Indexing
+    with a `slice` returns a :map:`PackedImages` over just those images.
+
+    Every image built gets its own copy-on-write map of the file, so images
+    can be modified inplace as usual, but changes are never written back to
+    the file and are never seen by other images built from it - indexing
+    the same image again gives the image as it is stored.
+
+    Parameters
+    ----------
+    filepath : `str`
+        Absolute filepath of the packed image file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a packed image file.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._index = self._read_index()
+
+    def _read_index(self):
+        not_packed = ValueError('{} is not a packed image '
+                                'file'.format(self.filepath))
+        with open(self.filepath, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+            if size < len(MAGIC) + TRAILER.size:
+                raise not_packed
+            f.seek(0)
+            magic = f.read(len(MAGIC))
+            f.seek(size - TRAILER.size)
+            index_offset, trailer_magic = TRAILER.unpack(
+                f.read(TRAILER.size))
+            if magic != MAGIC or trailer_magic != MAGIC:
+                raise not_packed
+            f.seek(index_offset)
+            return pickle.loads(f.read(size - TRAILER.size - index_offset))
+
+    def _view(self, index):
+        view = PackedImages.__new__(PackedImages)
+        view.filepath = self.filepath
+        view._index = index
+        return view
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._view(self._index[i])
+        return _unpack_image(self.filepath, self._index[i])
+
+    def __iter__(self):
+        for entry in self._index:
+            yield _unpack_image(self.filepath, entry)
+
+    @property
+    def paths(self):
+        r"""
+        The paths the images were originally imported from (``None`` for
+        images that did not have one), read from the index without building
+        any image.
+
+        :type: `list` of ``pathlib.Path``
+        """
+        return [None if e['path'] is None else Path(e['path'])
+                for e in self._index]
+
+    def __str__(self):
+        return '{} packed images in {}'.format(len(self), self.filepath)
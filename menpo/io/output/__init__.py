@@ -1 +1,2 @@
-from .base import export_landmark_file, export_image, export_pickle
+from .base import (export_landmark_file, export_image, export_pickle,
+                   export_packed_images)
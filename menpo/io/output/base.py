@@ -2,7 +2,8 @@ import gzip
 from functools import partial
 from pathlib import Path
 
-from .extensions import landmark_types, image_types, pickle_types
+from .extensions import (landmark_types, image_types, pickle_types,
+                         packed_types)
 from ..utils import _norm_path
 
 # an open file handle that uses a small fast level of compression
@@ -133,6 +134,39 @@ def export_pickle(obj, fp, overwrite=False):
         _export(obj, fp, pickle_types, '.pkl', overwrite)
 
 
+def export_packed_images(images, fp, overwrite=False):
+    r"""
+    Exports a collection of images to a single packed image file.
+
+    The packed format stores the pixels and masks of every image raw and
+    back to back, together with their landmarks, paths and an index of
+    where each image lives in the file. Unlike a pickle of the images, it
+    can be memory mapped by :map:`import_packed_images` so that any one
+    image can be read without reading the others.
+
+    The ``fp`` argument can be either a `str` or any Python type that acts
+    like a file. If ``fp`` is a path, it must have the suffix `.mpk`.
+
+    Parameters
+    ----------
+    images : `iterable` of :map:`Image`
+        The images to export. :map:`MaskedImage` s keep their masks and
+        compact :map:`CompactImage` s keep their compact pixels.
+    fp : `str` or `file`-like object
+        The string path or file-like object to save the images at/into.
+    overwrite : `bool`, optional
+        Whether or not to overwrite a file if it already exists.
+
+    Raises
+    ------
+    ValueError
+        File already exists and ``overwrite`` != ``True``
+    ValueError
+        ``fp`` is a `str` and its extension is not `.mpk`
+    """
+    _export(images, fp, packed_types, '.mpk', overwrite)
+
+
 def _normalise_extension(extension):
     # Account for the fact the user may only have passed the extension
     # without the proceeding period
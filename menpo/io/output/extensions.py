@@ -1,6 +1,7 @@
 from .landmark import LJSONExporter, PTSExporter
 from .image import PILExporter
 from .pickle import pickle_export
+from .packed import packed_images_export
 
 landmark_types = {
     '.ljson': LJSONExporter,
@@ -34,3 +35,7 @@ image_types = {
 pickle_types = {
     '.pkl': pickle_export,
 }
+
+packed_types = {
+    '.mpk': packed_images_export,
+}
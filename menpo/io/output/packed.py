@@ -0,0 +1,99 @@
+import cPickle as pickle
+import struct
+import numpy as np
+
+# A packed image file is laid out as
+#
+#     MAGIC | buffer | buffer | ... | pickled index | index offset, MAGIC
+#
+# where each buffer is the raw (C-ordered) data of one array, aligned to
+# ALIGNMENT bytes from the start of the file. The index is a list with one
+# dict per image recording the offsets of its buffers, so that an importer
+# can memory map the file and view any image without reading the others.
+MAGIC = b'MENPOPK1'
+ALIGNMENT = 64
+TRAILER = struct.Struct('<Q8s')
+
+
+class _BufferWriter(object):
+    r"""
+    Writes buffers to a file handle, keeping track of the offset from the
+    start of the file as it goes.
+    """
+
+    def __init__(self, file_handle):
+        self.file_handle = file_handle
+        self.offset = 0
+
+    def write(self, data):
+        self.file_handle.write(data)
+        self.offset += len(data)
+
+    def align(self):
+        padding = -self.offset % ALIGNMENT
+        if padding:
+            self.write(b'\0' * padding)
+
+    def write_array(self, array):
+        array = np.ascontiguousarray(array)
+        self.align()
+        offset = self.offset
+        self.write(array.tostring())
+        return offset, array.dtype.str, array.shape
+
+    def write_bytes(self, data):
+        self.align()
+        offset = self.offset
+        self.write(data)
+        return offset, len(data)
+
+
+def _pack_image(image, writer):
+    from menpo.image import BooleanImage, CompactImage, MaskedImage
+    entry = {'mask': None, 'scale': None, 'landmarks': None, 'path': None}
+    if isinstance(image, CompactImage) and image.is_compact:
+        entry['type'] = 'compact'
+        entry['pixels'] = writer.write_array(image.compact_pixels)
+        entry['scale'] = image.scale
+    else:
+        if isinstance(image, BooleanImage):
+            entry['type'] = 'boolean'
+        elif isinstance(image, MaskedImage):
+            entry['type'] = 'masked'
+            entry['mask'] = writer.write_array(image.mask.pixels[..., 0])
+        else:
+            entry['type'] = 'image'
+        entry['pixels'] = writer.write_array(image.pixels)
+    if image.has_landmarks:
+        entry['landmarks'] = writer.write_bytes(
+            pickle.dumps(image.landmarks, protocol=2))
+    if hasattr(image, 'path'):
+        entry['path'] = str(image.path)
+    return entry
+
+
+def packed_images_export(images, file_handle):
+    r"""
+    Given a file handle to write in to (which should act like a Python `file`
+    object), write out the images in the packed image format. No value is
+    returned.
+
+    The pixels (and masks) of every image are written out raw, one after the
+    other, followed by an index of where each image lives in the file. The
+    landmarks of each image are pickled alongside its pixels. The file
+    handle must be positioned at the start of the file.
+
+    Parameters
+    ----------
+    images : `iterable` of :map:`Image`
+        The images to write out.
+    file_handle : `file`-like object
+        The file to write in to
+    """
+    writer = _BufferWriter(file_handle)
+    writer.write(MAGIC)
+    index = [_pack_image(image, writer) for image in images]
+    writer.align()
+    index_offset = writer.offset
+    writer.write(pickle.dumps(index, protocol=2))
+    writer.write(TRAILER.pack(index_offset, MAGIC))
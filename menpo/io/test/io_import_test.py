@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 import numpy as np
 from mock import patch
 from nose.tools import raises
@@ -39,6 +41,38 @@ def test_lenna_import():
     assert(img.landmarks['PTS'].n_landmarks == 68)
 
 
+def test_import_image_scale():
+    img_path = mio.data_dir_path() / 'breakingbad.jpg'
+    full = mio.import_image(img_path)
+    im = mio.import_image(img_path, scale=0.25)
+    assert(im.shape == (270, 480))
+    assert(np.allclose(im.landmarks['PTS'].lms.points,
+                       full.landmarks['PTS'].lms.points * 0.25, atol=0.5))
+
+
+def test_import_image_max_diagonal():
+    img_path = mio.data_dir_path() / 'takeo.ppm'
+    im = mio.import_image(img_path, max_diagonal=100)
+    assert(np.hypot(*im.shape) <= 100)
+    assert(im.landmarks['PTS'].n_landmarks == 68)
+
+
+def test_import_image_max_diagonal_jpeg():
+    img_path = mio.data_dir_path() / 'breakingbad.jpg'
+    im = mio.import_image(img_path, max_diagonal=200)
+    assert(np.hypot(*im.shape) <= 200)
+
+
+@raises(ValueError)
+def test_import_image_zero_scale_raises_value_error():
+    mio.import_image(mio.data_dir_path() / 'takeo.ppm', scale=0)
+
+
+@raises(ValueError)
+def test_import_images_negative_max_diagonal_raises_value_error():
+    mio.import_images(mio.data_dir_path(), max_diagonal=-100)
+
+
 def test_path():
     # choose a random asset (all should have it!)
     img = mio.import_builtin_asset('einstein.jpg')
@@ -75,6 +109,117 @@ def test_import_images():
     assert(len(exp_imgs_filenames - imgs_filenames) == 0)
 
 
+def test_import_images_n_workers():
+    imgs = list(mio.import_images(mio.data_dir_path()))
+    parallel_imgs = list(mio.import_images(mio.data_dir_path(), n_workers=3,
+                                           prefetch=2))
+    assert([i.path for i in parallel_imgs] == [i.path for i in imgs])
+    for parallel_img, img in zip(parallel_imgs, imgs):
+        assert(np.all(parallel_img.pixels == img.pixels))
+        assert(sorted(parallel_img.landmarks.group_labels) ==
+               sorted(img.landmarks.group_labels))
+
+
+@raises(ValueError)
+def test_import_images_zero_prefetch_raises_value_error():
+    list(mio.import_images(mio.data_dir_path(), n_workers=2, prefetch=0))
+
+
+@raises(ValueError)
+def test_import_images_zero_n_workers_raises_value_error():
+    # raised before the generator is iterated over
+    mio.import_images(mio.data_dir_path(), n_workers=0)
+
+
+@raises(ValueError)
+def test_import_images_prefetch_without_n_workers_raises_value_error():
+    mio.import_images(mio.data_dir_path(), prefetch=4)
+
+
+def test_import_images_same_name_index():
+    resolver = mio.SameNameIndex()
+    imgs = list(mio.import_images(mio.data_dir_path()))
+    indexed_imgs = list(mio.import_images(mio.data_dir_path(),
+                                          landmark_resolver=resolver))
+    for indexed_img, img in zip(indexed_imgs, imgs):
+        assert(sorted(indexed_img.landmarks.group_labels) ==
+               sorted(img.landmarks.group_labels))
+    # the index is reused on a second import
+    assert(len(list(mio.import_images(mio.data_dir_path(),
+                                      landmark_resolver=resolver))) ==
+           len(imgs))
+
+
+def test_import_images_lazy():
+    imgs = list(mio.import_images(mio.data_dir_path()))
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True)
+    assert(len(lazy_imgs) == len(imgs))
+    assert(lazy_imgs.paths == [i.path for i in imgs])
+    assert(np.all(lazy_imgs[1].pixels == imgs[1].pixels))
+    assert(sorted(lazy_imgs[1].landmarks.group_labels) ==
+           sorted(imgs[1].landmarks.group_labels))
+
+
+def test_lazy_image_list_slice_and_index():
+    imgs = list(mio.import_images(mio.data_dir_path()))
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True)
+    assert([i.path for i in lazy_imgs[1:3]] == [i.path for i in imgs[1:3]])
+    shuffled = lazy_imgs[[2, 0]]
+    assert(shuffled.paths == [imgs[2].path, imgs[0].path])
+
+
+def test_lazy_image_list_boolean_mask():
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True)
+    mask = np.zeros(len(lazy_imgs), dtype=np.bool)
+    mask[[0, 2]] = True
+    assert(lazy_imgs[mask].paths == [lazy_imgs.paths[0],
+                                     lazy_imgs.paths[2]])
+
+
+@raises(IndexError)
+def test_lazy_image_list_wrong_size_boolean_mask_raises_index_error():
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True)
+    lazy_imgs[np.ones(len(lazy_imgs) + 1, dtype=np.bool)]
+
+
+def test_import_images_lazy_cache_size():
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True,
+                                  cache_size=0)
+    lazy_imgs[0]
+    assert(lazy_imgs._cache.max_size == 0)
+    assert(len(lazy_imgs._cache._items) == 0)
+
+
+def test_lazy_image_list_map():
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True)
+    shapes = lazy_imgs.map(lambda i: i.shape)
+    assert(list(shapes) == [i.shape for i in lazy_imgs])
+
+
+def test_lazy_image_list_cache_returns_copies():
+    lazy_imgs = mio.import_images(mio.data_dir_path(), lazy=True)
+    img = lazy_imgs[0]
+    img.pixels[...] = 0
+    assert(lazy_imgs[0] is not img)
+    assert(np.any(lazy_imgs[0].pixels != 0))
+
+
+@raises(ValueError)
+def test_lazy_image_list_negative_cache_size_raises_value_error():
+    mio.LazyImageList([], cache_size=-1)
+
+
+@raises(ValueError)
+def test_lazy_image_list_negative_n_workers_raises_value_error():
+    mio.LazyImageList([], n_workers=-1)
+
+
+@raises(ValueError)
+def test_import_images_lazy_prefetch_with_one_worker_raises_value_error():
+    mio.import_images(mio.data_dir_path(), lazy=True, n_workers=1,
+                      prefetch=2)
+
+
 def test_ls_builtin_assets():
     assert(set(mio.ls_builtin_assets()) == {'breakingbad.jpg',
                                             'einstein.jpg', 'einstein.pts',
@@ -252,6 +397,80 @@ def test_importing_GIF_no_normalise(is_file, mock_image):
     assert im.pixels.dtype == np.uint8
 
 
+@patch('menpo.io.input.image.PILImage.open')
+@patch('menpo.io.input.base.Path.is_file')
+def test_importing_GIF_lazy_frames(is_file, mock_image):
+    mock_image.return_value = PILImage.new('P', (10, 10))
+    is_file.return_value = True
+
+    frames = mio.import_image('fake_image_being_mocked.gif',
+                              lazy_frames=True)
+    assert isinstance(frames, mio.LazyFrames)
+    assert len(frames) == 1
+    assert frames[-1].shape == (10, 10)
+    assert frames[0].n_channels == 3
+    assert len(list(frames)) == 1
+
+
+@patch('menpo.io.input.image.PILImage.open')
+@patch('menpo.io.input.base.Path.is_file')
+@raises(IndexError)
+def test_importing_GIF_lazy_frames_out_of_range(is_file, mock_image):
+    mock_image.return_value = PILImage.new('P', (10, 10))
+    is_file.return_value = True
+
+    frames = mio.import_image('fake_image_being_mocked.gif',
+                              lazy_frames=True)
+    frames[1]
+
+
+def _write_animated_gif(directory, values):
+    frames = [PILImage.new('L', (12, 10), color=v) for v in values]
+    gif_path = os.path.join(directory, 'animation.gif')
+    frames[0].save(gif_path, save_all=True, append_images=frames[1:])
+    with open(os.path.join(directory, 'animation.pts'), 'w') as f:
+        f.write('version: 1\nn_points: 2\n{\n2.0 3.0\n5.0 4.0\n}\n')
+    return gif_path
+
+
+def test_importing_GIF_lazy_frames_multi_frame():
+    values = [0, 64, 128, 255]
+    gif_dir = tempfile.mkdtemp()
+    try:
+        gif_path = _write_animated_gif(gif_dir, values)
+        frames = mio.import_image(gif_path, lazy_frames=True)
+        assert len(frames) == 4
+        # frames are built in order as they are iterated over
+        for frame, value in zip(frames, values):
+            assert frame.shape == (10, 12)
+            assert np.allclose(frame.pixels, value / 255.)
+            assert frame.landmarks['PTS'].n_landmarks == 2
+        # seeking back reopens the file
+        assert np.allclose(frames[1].pixels, values[1] / 255.)
+        assert np.allclose(frames[-1].pixels, values[-1] / 255.)
+        assert np.allclose(frames[0].pixels, values[0] / 255.)
+        assert frames[0].path.name == 'animation.gif'
+        # import_images streams the frames
+        streamed = list(mio.import_images(gif_dir))
+        assert len(streamed) == 4
+        assert all(f.landmarks['PTS'].n_landmarks == 2 for f in streamed)
+    finally:
+        shutil.rmtree(gif_dir)
+
+
+@patch('menpo.io.input.image.PILImage.open')
+@patch('menpo.io.input.base.Path.is_file')
+@raises(TypeError)
+def test_importing_GIF_lazy_frames_slice_raises_type_error(is_file,
+                                                           mock_image):
+    mock_image.return_value = PILImage.new('P', (10, 10))
+    is_file.return_value = True
+
+    frames = mio.import_image('fake_image_being_mocked.gif',
+                              lazy_frames=True)
+    frames[:1]
+
+
 @patch('menpo.io.input.image.PILImage.open')
 @patch('menpo.io.input.base.Path.is_file')
 @raises(ValueError)
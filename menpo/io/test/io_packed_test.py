@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from numpy.testing import assert_allclose, assert_equal
+from nose.tools import raises
+
+import menpo.io as mio
+from menpo.image import MaskedImage, CompactImage
+
+breaking_bad = mio.import_builtin_asset('breakingbad.jpg')
+takeo = mio.import_builtin_asset('takeo.ppm')
+masked = MaskedImage(np.random.random([20, 30, 2]))
+masked.mask.pixels[:5] = False
+compact = CompactImage(np.random.randint(0, 256, size=(10, 12, 3)).astype(
+    np.uint8))
+test_images = [breaking_bad, takeo, masked, compact]
+packed_dir = None
+packed_path = None
+
+
+def setup_module():
+    global packed_dir, packed_path
+    packed_dir = tempfile.mkdtemp()
+    packed_path = os.path.join(packed_dir, 'images.mpk')
+    mio.export_packed_images(test_images, packed_path)
+
+
+def teardown_module():
+    shutil.rmtree(packed_dir)
+
+
+def _import_packed():
+    packed = mio.import_packed_images(packed_path)
+    return packed, [im for im in packed]
+
+
+def test_packed_images_round_trip():
+    packed, images = _import_packed()
+    assert_equal(len(packed), 4)
+    for image, expected in zip(images, test_images):
+        assert type(image) is type(expected)
+        assert_allclose(image.pixels, expected.pixels)
+        assert_equal(getattr(image, 'path', None),
+                     getattr(expected, 'path', None))
+
+
+def test_packed_images_landmarks_and_mask():
+    packed, _ = _import_packed()
+    assert_allclose(packed[0].landmarks['PTS'].lms.points,
+                    breaking_bad.landmarks['PTS'].lms.points)
+    assert_equal(packed[2].mask.pixels, masked.mask.pixels)
+    assert not packed[2].has_landmarks
+
+
+def test_packed_images_compact_pixels_stay_compact():
+    packed, _ = _import_packed()
+    image = packed[3]
+    assert image.is_compact
+    assert_equal(image.compact_pixels, compact.compact_pixels)
+
+
+def test_packed_images_pixels_are_views_of_file():
+    packed, _ = _import_packed()
+    image = packed[1]
+    assert not image.pixels.flags.owndata
+    image.pixels[0, 0, 0] = -1  # copy-on-write - the file is unchanged
+    assert_allclose(packed[1].pixels, takeo.pixels)
+    assert_allclose(mio.import_packed_images(packed_path)[1].pixels,
+                    takeo.pixels)
+
+
+def test_packed_images_slice():
+    packed, _ = _import_packed()
+    sliced = packed[1:3]
+    assert_equal(len(sliced), 2)
+    assert_equal(sliced.paths, [takeo.path, None])
+    assert_allclose(sliced[-1].pixels, masked.pixels)
+
+
+@raises(ValueError)
+def test_import_packed_images_not_packed():
+    packed_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(packed_dir, 'images.mpk')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 100)
+        mio.import_packed_images(path)
+    finally:
+        shutil.rmtree(packed_dir)
@@ -1,4 +1,6 @@
 from .convolution import log_gabor
 from .decomposition import (eigenvalue_decomposition,
-                            principal_component_decomposition)
+                            principal_component_decomposition,
+                            incremental_principal_component_decomposition,
+                            randomized_eigenvectors)
 from .linalg import dot_inplace_left, dot_inplace_right
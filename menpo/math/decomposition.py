@@ -1,30 +1,59 @@
 from __future__ import division
 import numpy as np
+from scipy.linalg import eigh
+from menpo.base import float_dtype
 from .linalg import dot_inplace_right
 
 
-def eigenvalue_decomposition(S, eps=10**-10):
+def _tolerance(eps, dtype, n):
+    r"""
+    The relative tolerance below which eigenvalues computed in ``dtype``
+    from a problem of size ``n`` are round-off: ``eps``, but never less than
+    the working precision of ``dtype`` scaled by ``n``. Integer data is
+    decomposed in floating point, so its precision is that of
+    :map:`float_dtype`.
+    """
+    return max(eps, np.finfo(float_dtype(dtype)).eps * n)
+
+
+def eigenvalue_decomposition(S, eps=10**-10, n_components=None):
     r"""
 
     Parameters
     ----------
     S : (N, N)  ndarray
         Covariance/Scatter matrix
+    eps : float, optional
+        Eigenvalues smaller than ``eps`` times the largest eigenvalue are
+        discarded. The tolerance is never less than the precision of the
+        data type of ``S`` times ``N``, so round-off eigenvalues of single
+        precision problems are discarded too.
+    n_components : int, optional
+        If given, only the ``n_components`` largest eigenvalues (and their
+        eigenvectors) are computed, which is much faster than the full
+        decomposition when ``n_components`` is small compared to ``N``.
 
     Returns
     -------
     pos_eigenvectors: (N, p) ndarray
     pos_eigenvalues: (p,) ndarray
     """
+    N = S.shape[0]
     # compute eigenvalue decomposition
-    eigenvalues, eigenvectors = np.linalg.eigh(S)
+    if n_components is None or n_components >= N:
+        eigenvalues, eigenvectors = np.linalg.eigh(S)
+    else:
+        # only the largest eigenvalues, by index (eigh returns them in
+        # ascending order)
+        eigenvalues, eigenvectors = eigh(S, eigvals=(N - n_components,
+                                                     N - 1))
     # sort eigenvalues from largest to smallest
     index = np.argsort(eigenvalues)[::-1]
     eigenvalues = eigenvalues[index]
     eigenvectors = eigenvectors[:, index]
 
     # set tolerance limit
-    limit = np.max(np.abs(eigenvalues)) * eps
+    limit = np.max(np.abs(eigenvalues)) * _tolerance(eps, S.dtype, N)
 
     # select positive eigenvalues
     pos_index = eigenvalues > 0.0
@@ -38,13 +67,173 @@ def eigenvalue_decomposition(S, eps=10**-10):
     return pos_eigenvectors, pos_eigenvalues
 
 
+def _centred_dot(X, mean_vector, B, block_size=1000):
+    r"""
+    ``(X - mean_vector).dot(B)``, centring ``block_size`` rows of ``X`` at a
+    time so that no centred copy of ``X`` is made.
+    """
+    n_samples = X.shape[0]
+    C = np.empty((n_samples, B.shape[1]), dtype=float_dtype(X.dtype))
+    for i in range(0, n_samples, block_size):
+        j = i + block_size
+        C[i:j] = np.dot(X[i:j] - mean_vector, B)
+    return C
+
+
+def _centred_transpose_dot(X, mean_vector, B, block_size=1000):
+    r"""
+    ``(X - mean_vector).T.dot(B)``, centring ``block_size`` rows of ``X`` at
+    a time so that no centred copy of ``X`` is made.
+    """
+    n_samples, n_features = X.shape
+    C = np.zeros((n_features, B.shape[1]), dtype=float_dtype(X.dtype))
+    for i in range(0, n_samples, block_size):
+        j = i + block_size
+        C += np.dot((X[i:j] - mean_vector).T, B[i:j])
+    return C
+
+
+def _blocked_scatter(X, mean_vector, block_size):
+    r"""
+    ``X.T.dot(X)`` accumulated over blocks of ``block_size`` rows of ``X``.
+    If ``mean_vector`` is not `None` it is subtracted from each block.
+    """
+    n_samples, n_features = X.shape
+    S = np.zeros((n_features, n_features), dtype=float_dtype(X.dtype))
+    for i in range(0, n_samples, block_size):
+        block = X[i:i + block_size]
+        if mean_vector is not None:
+            block = block - mean_vector
+        S += np.dot(block.T, block)
+    return S
+
+
+def _blocked_gram(X, mean_vector, block_size):
+    r"""
+    ``X.dot(X.T)`` accumulated over blocks of ``block_size`` columns of
+    ``X``. If ``mean_vector`` is not `None` it is subtracted from each block.
+    """
+    n_samples, n_features = X.shape
+    S = np.zeros((n_samples, n_samples), dtype=float_dtype(X.dtype))
+    for i in range(0, n_features, block_size):
+        j = i + block_size
+        block = X[:, i:j]
+        if mean_vector is not None:
+            block = block - mean_vector[i:j]
+        S += np.dot(block, block.T)
+    return S
+
+
+def _blocked_back_projection(A, X, mean_vector, block_size):
+    r"""
+    ``A.dot(X - mean_vector)`` computed over blocks of ``block_size`` columns
+    of ``X``, without modifying or copying ``X``.
+    """
+    C = np.empty((A.shape[0], X.shape[1]), dtype=float_dtype(X.dtype))
+    for i in range(0, X.shape[1], block_size):
+        j = i + block_size
+        C[:, i:j] = np.dot(A, X[:, i:j] - mean_vector[i:j])
+    return C
+
+
+def randomized_eigenvectors(X, mean_vector, N, n_components, n_oversamples=10,
+                            n_iter=4, block_size=1000, eps=10**-10):
+    r"""
+    The leading eigenvectors and eigenvalues of the covariance of X, found
+    with a randomised range finder (Halko et al., "Finding Structure with
+    Randomness", SIAM Review 2011) rather than by decomposing the full
+    covariance or Gram matrix.
+
+    A random sketch of the row space of the centred data is refined by
+    ``n_iter`` power iterations and used to project the data down to
+    ``n_components + n_oversamples`` dimensions, where an exact SVD is
+    taken. ``X`` is only ever read ``block_size`` rows at a time (and
+    centred block by block), so besides ``X`` itself only matrices of
+    ``n_components + n_oversamples`` columns are held in memory.
+
+    Parameters
+    ----------
+    X : (n_samples, n_features) ndarray
+        The data matrix. It is not modified.
+    mean_vector : (n_features,) ndarray
+        The mean to subtract from each sample.
+    N : float
+        The normalisation of the covariance (the number of samples, or the
+        number of samples minus one).
+    n_components : int
+        The number of leading components to find.
+    n_oversamples : int, optional
+        The number of extra random directions sampled to improve accuracy.
+
+        Default: `10`
+    n_iter : int, optional
+        The number of power iterations. Each iteration reads the data matrix
+        twice, and sharpens the estimate when the eigenvalues decay slowly.
+
+        Default: `4`
+    block_size : int, optional
+        The number of samples read from ``X`` at a time.
+
+        Default: `1000`
+    eps : float, optional
+        Eigenvalues smaller than ``eps`` times the largest eigenvalue are
+        discarded.
+
+        Default: `10**-10`
+
+    Returns
+    -------
+    eigenvectors : (n_components, n_features) ndarray
+        The leading eigenvectors.
+    eigenvalues : (n_components,) ndarray
+        The positive eigenvalues associated to the eigenvectors.
+    """
+    n_samples, n_features = X.shape
+    n_random = min(n_components + n_oversamples, n_samples, n_features)
+
+    # sketch the row space of the data: Q = X^T omega
+    omega = np.random.randn(n_samples, n_random).astype(float_dtype(X.dtype))
+    Q = _centred_transpose_dot(X, mean_vector, omega, block_size=block_size)
+    for _ in range(n_iter):
+        # orthonormalise between the products to keep the directions with
+        # small eigenvalues from being lost to round-off
+        Q = np.linalg.qr(Q)[0]
+        Z = np.linalg.qr(_centred_dot(X, mean_vector, Q,
+                                      block_size=block_size))[0]
+        Q = _centred_transpose_dot(X, mean_vector, Z, block_size=block_size)
+    Q = np.linalg.qr(Q)[0]
+
+    # project the data onto the sketch and decompose exactly there
+    _, s, V = np.linalg.svd(_centred_dot(X, mean_vector, Q,
+                                         block_size=block_size),
+                            full_matrices=False)
+    eigenvectors = np.dot(V[:n_components], Q.T)
+    eigenvalues = s[:n_components] ** 2 / N
+
+    # select positive eigenvalues within the expected tolerance
+    eps = _tolerance(eps, eigenvalues.dtype, max(n_samples, n_features))
+    index = eigenvalues > np.max(eigenvalues) * eps
+    return eigenvectors[index], eigenvalues[index]
+
+
 def principal_component_decomposition(X, whiten=False, centre=True,
-                                      bias=False, inplace=False):
+                                      bias=False, inplace=False,
+                                      n_components=None, method='eigen',
+                                      max_memory=None, n_threads=1):
     r"""
     Apply PCA on the data matrix X. In the case where the data matrix is very
     large, it is advisable to set `inplace=True`. However, note this this
     destructively edits the data matrix by subtracting the mean inplace.
 
+    When only a few leading components are needed from a very large data
+    matrix, ``method='randomized'`` finds them without forming the
+    covariance or Gram matrix - see :map:`randomized_eigenvectors`.
+
+    ``max_memory`` bounds the working memory used on top of the data matrix,
+    which makes it possible to decompose a data matrix held on disk in an
+    ``np.memmap`` - the data matrix is then only ever read (and centred)
+    in blocks that fit the budget.
+
     Parameters
     ----------
     x : (n_samples, n_features) ndarray
@@ -67,6 +256,36 @@ def principal_component_decomposition(X, whiten=False, centre=True,
         the data matrix is greater than half the available memory size.
 
         Default: `False`
+    n_components : int, optional
+        The number of leading components to keep. If `None`, all the
+        components are kept. Only the kept components are computed (see
+        :map:`eigenvalue_decomposition`).
+
+        Default: `None`
+    method : ``{'eigen', 'randomized'}``, optional
+        ``'eigen'`` computes the components exactly by an eigenvalue
+        decomposition of the covariance or Gram matrix. ``'randomized'``
+        approximates the leading ``n_components`` components, which must be
+        given. The randomized method reads the data matrix in blocks and
+        never modifies it, irrespective of `inplace`.
+
+        Default: `'eigen'`
+    max_memory : int, optional
+        If given, the covariance (or Gram) matrix, the centring and the
+        back-projection of the eigenvectors are computed over blocks of at
+        most ``max_memory`` bytes of the data matrix at a time. The
+        covariance or Gram matrix itself and the eigenvectors are not
+        included in the budget. If `None`, the whole data matrix is
+        processed at once.
+
+        Default: `None`
+    n_threads : int, optional
+        The number of threads the back-projection of the eigenvectors is
+        split between when `inplace` is `True` and there are more features
+        than samples - see :map:`dot_inplace_right`. With ``max_memory``,
+        the blocks of all the threads together stay within the budget.
+
+        Default: `1`
 
     Returns
     -------
@@ -79,6 +298,16 @@ def principal_component_decomposition(X, whiten=False, centre=True,
     """
     n_samples, n_features = X.shape
 
+    if method not in ('eigen', 'randomized'):
+        raise ValueError("method must be 'eigen' or 'randomized' - "
+                         "'{}' given".format(method))
+    if n_components is not None and n_components < 1:
+        raise ValueError('n_components must be at least 1 - '
+                         '{} given'.format(n_components))
+    if n_threads < 1:
+        raise ValueError('n_threads must be at least 1 - '
+                         '{} given'.format(n_threads))
+
     if bias:
         N = n_samples
     else:
@@ -88,18 +317,52 @@ def principal_component_decomposition(X, whiten=False, centre=True,
         # centre data
         mean_vector = np.mean(X, axis=0)
     else:
-        mean_vector = np.zeros(n_features)
+        mean_vector = np.zeros(n_features, dtype=float_dtype(X.dtype))
 
-    # This is required if the data matrix is very large!
-    if inplace:
-        X -= mean_vector
+    if max_memory is not None:
+        # the number of samples (rows) or features (columns) of X that fit
+        # in the memory budget
+        bytes_per_value = max(X.dtype.itemsize, 8)
+        row_block = max(1, int(max_memory // (n_features * bytes_per_value)))
+        column_block = max(1, int(max_memory //
+                                  (n_samples * bytes_per_value)))
     else:
-        X = X - mean_vector
+        row_block = 1000
+
+    if method == 'randomized':
+        if n_components is None:
+            raise ValueError("n_components must be given for the "
+                             "'randomized' method")
+        eigenvectors, eigenvalues = randomized_eigenvectors(
+            X, mean_vector, N, n_components, block_size=row_block)
+        if whiten:
+            eigenvectors /= np.sqrt(eigenvalues)[:, None]
+        return eigenvectors, eigenvalues, mean_vector
+
+    if max_memory is None:
+        # This is required if the data matrix is very large!
+        if inplace:
+            X -= mean_vector
+        else:
+            X = X - mean_vector
+        # X is now centred
+        offset = None
+    else:
+        if inplace:
+            for i in range(0, n_samples, row_block):
+                X[i:i + row_block] -= mean_vector
+            offset = None
+        else:
+            # centre each block of X as it is read rather than copying X
+            offset = mean_vector
 
     if n_features < n_samples:
         # compute covariance matrix
         # S:  n_features  x  n_features
-        S = np.dot(X.T, X) / N
+        if max_memory is None:
+            S = np.dot(X.T, X) / N
+        else:
+            S = _blocked_scatter(X, offset, row_block) / N
         # S should be perfectly symmetrical, but numerical error can creep
         # in. Enforce symmetry here to avoid creating complex
         # eigenvectors from eigendecomposition
@@ -108,7 +371,8 @@ def principal_component_decomposition(X, whiten=False, centre=True,
         # perform eigenvalue decomposition
         # eigenvectors:  n_features x  n_features
         # eigenvalues:   n_features
-        eigenvectors, eigenvalues = eigenvalue_decomposition(S)
+        eigenvectors, eigenvalues = eigenvalue_decomposition(
+            S, n_components=n_components)
 
         if whiten:
             # whiten eigenvectors
@@ -122,7 +386,10 @@ def principal_component_decomposition(X, whiten=False, centre=True,
         # n_features > n_samples
         # compute covariance matrix
         # S:  n_samples  x  n_samples
-        S = np.dot(X, X.T) / N
+        if max_memory is None:
+            S = np.dot(X, X.T) / N
+        else:
+            S = _blocked_gram(X, offset, column_block) / N
         # S should be perfectly symmetrical, but numerical error can creep
         # in. Enforce symmetry here to avoid creating complex
         # eigenvectors from eigendecomposition
@@ -131,7 +398,8 @@ def principal_component_decomposition(X, whiten=False, centre=True,
         # perform eigenvalue decomposition
         # eigenvectors:  n_samples  x  n_samples
         # eigenvalues:   n_samples
-        eigenvectors_s, eigenvalues = eigenvalue_decomposition(S)
+        eigenvectors_s, eigenvalues = eigenvalue_decomposition(
+            S, n_components=n_components)
 
         # compute final eigenvectors
         # eigenvectors:  n_samples  x  n_features
@@ -140,10 +408,156 @@ def principal_component_decomposition(X, whiten=False, centre=True,
         else:
             w = np.sqrt(1.0 / (N * eigenvalues))
 
-        dot = dot_inplace_right if inplace else np.dot
-        eigenvectors = dot(eigenvectors_s.T, X)
+        if max_memory is None:
+            if inplace:
+                eigenvectors = dot_inplace_right(eigenvectors_s.T, X,
+                                                 n_threads=n_threads)
+            else:
+                eigenvectors = np.dot(eigenvectors_s.T, X)
+        elif inplace:
+            # the result is stored in (and is a view onto) X - copy it out
+            # so that X can be freed. Every thread has a block in flight,
+            # so the budget is shared between them
+            eigenvectors = np.array(dot_inplace_right(
+                eigenvectors_s.T, X,
+                block_size=max(1, column_block // n_threads),
+                n_threads=n_threads))
+        else:
+            eigenvectors = _blocked_back_projection(eigenvectors_s.T, X,
+                                                    offset, column_block)
 
         # whiten, and we are done.
         eigenvectors *= w[:, None]
 
     return eigenvectors, eigenvalues, mean_vector
+
+
+def incremental_principal_component_decomposition(X, eigenvectors,
+                                                  eigenvalues, n_samples,
+                                                  mean_vector=None,
+                                                  bias=False,
+                                                  forgetting_factor=1.0,
+                                                  eps=10**-10):
+    r"""
+    Update an existing PCA with a batch of new samples without revisiting
+    the data the PCA was originally computed from, using the incremental
+    SVD of Ross et al. ("Incremental Learning for Robust Visual Tracking",
+    IJCV 2008). The existing decomposition is treated as the thin SVD of the
+    (centred) data seen so far, which is augmented by the new samples. Only
+    a small ``(n_components + n_new_samples)`` square matrix is decomposed,
+    so the cost of an update depends on the size of the new batch and the
+    number of components kept, not on the number of samples seen so far.
+
+    If the existing decomposition was not trimmed and ``forgetting_factor``
+    is ``1.0``, the result is the same (up to the signs of the eigenvectors)
+    as running :map:`principal_component_decomposition` on all the samples.
+
+    Parameters
+    ----------
+    X : (n_new_samples, n_features) ndarray
+        The new samples.
+    eigenvectors : (n_components, n_features) ndarray
+        The (unwhitened) eigenvectors of the current decomposition.
+    eigenvalues : (n_components,) ndarray
+        The eigenvalues of the current decomposition.
+    n_samples : float
+        The number of samples the current decomposition was computed from.
+    mean_vector : (n_features,) ndarray, optional
+        The mean of the current decomposition. If `None`, the data is
+        assumed to be centred and the mean is left at zero.
+
+        Default: `None`
+    bias : bool, optional
+        Whether the eigenvalues are, and should remain, biased estimates
+        (see :map:`principal_component_decomposition`).
+
+        Default: `False`
+    forgetting_factor : float, optional
+        A value in ``(0, 1]`` which down-weights the samples seen so far
+        relative to the new samples. ``1.0`` weights all samples equally.
+
+        Default: `1.0`
+    eps : float, optional
+        Eigenvalues smaller than ``eps`` times the largest eigenvalue are
+        discarded.
+
+        Default: `10**-10`
+
+    Returns
+    -------
+    eigenvectors : (n_components, n_features) ndarray
+        The updated eigenvectors.
+    eigenvalues : (n_components,) ndarray
+        The updated positive eigenvalues.
+    mean_vector : (n_features,) ndarray
+        The updated mean.
+    n_samples : float
+        The effective number of samples the updated decomposition represents
+        (the previous number scaled by ``forgetting_factor`` plus the number
+        of new samples).
+    """
+    if not 0.0 < forgetting_factor <= 1.0:
+        raise ValueError('forgetting_factor must be in the range (0, 1] - '
+                         '{} given'.format(forgetting_factor))
+    n_new_samples, n_features = X.shape
+    if n_features != eigenvectors.shape[1]:
+        raise ValueError('Cannot update a decomposition of {} features with '
+                         'samples of {} features'.format(eigenvectors.shape[1],
+                                                         n_features))
+    # recover the singular values of the (centred) data seen so far
+    N_old = n_samples if bias else n_samples - 1.0
+    singular_values = np.sqrt(N_old * eigenvalues)
+
+    # the samples seen so far count for less under a forgetting factor
+    n_old = forgetting_factor * n_samples
+    n_total = n_old + n_new_samples
+
+    if mean_vector is not None:
+        # the new mean is the weighted average of the two means. The new
+        # samples are centred on their own mean, and an extra sample
+        # accounts for the shift between the old and the new mean
+        new_mean = np.mean(X, axis=0)
+        updated_mean = ((n_old * mean_vector + n_new_samples * new_mean) /
+                        n_total)
+        X = np.vstack((X - new_mean,
+                       np.sqrt(n_old * n_new_samples / n_total) *
+                       (new_mean - mean_vector)))
+    else:
+        updated_mean = np.zeros(n_features, dtype=float_dtype(X.dtype))
+
+    # the part of the new samples not explained by the current eigenvectors,
+    # and an orthonormal basis for it. Directions the new samples barely
+    # span are dropped so that the basis stays orthogonal to the
+    # eigenvectors
+    weights = np.dot(X, eigenvectors.T)
+    residual = X - np.dot(weights, eigenvectors)
+    _, r_s, residual_basis = np.linalg.svd(residual, full_matrices=False)
+    limit = (max(r_s.max(), singular_values.max()) *
+             _tolerance(eps, residual.dtype, max(residual.shape)))
+    residual_basis = residual_basis[r_s > limit]
+
+    # the data seen so far and the new samples expressed in the joint
+    # basis [eigenvectors; residual_basis]:
+    #     [ f * S   U X^T ]
+    #     [   0     Q R^T ]
+    n_components = eigenvectors.shape[0]
+    R = np.zeros((n_components + residual_basis.shape[0],
+                  n_components + X.shape[0]), dtype=residual.dtype)
+    R[:n_components, :n_components] = np.diag(forgetting_factor *
+                                              singular_values)
+    R[:n_components, n_components:] = weights.T
+    R[n_components:, n_components:] = np.dot(residual_basis, residual.T)
+    U, s, _ = np.linalg.svd(R, full_matrices=False)
+
+    N = n_total if bias else n_total - 1.0
+    updated_eigenvalues = s ** 2 / N
+    # rotate the joint basis onto the principal directions
+    updated_eigenvectors = np.dot(U.T, np.vstack((eigenvectors,
+                                                  residual_basis)))
+
+    # keep the positive eigenvalues within the expected tolerance (the SVD
+    # already sorts them from largest to smallest)
+    eps = _tolerance(eps, updated_eigenvalues.dtype, max(R.shape))
+    index = updated_eigenvalues > np.max(updated_eigenvalues) * eps
+    return (updated_eigenvectors[index], updated_eigenvalues[index],
+            updated_mean, n_total)
@@ -1,6 +1,50 @@
+from multiprocessing.pool import ThreadPool
+import numpy as np
 
 
-def dot_inplace_left(a, b, block_size=1000):
+# the default bound (in bytes) on the temporary memory used by the blocked
+# inplace products
+DEFAULT_MAX_MEMORY = 2 ** 26
+
+
+def _auto_block_size(n_big, k, n_small, itemsize, n_threads, max_memory):
+    r"""
+    The largest block size for which the temporaries of ``n_threads`` blocks
+    in flight stay within ``max_memory`` bytes. Each block needs a copy of
+    the (k, block_size) slice being dotted (NumPy copies non-contiguous
+    slices before handing them to BLAS) and the (n_small, block_size) result
+    before it is written back. BLAS does its own cache blocking within each
+    product, so large blocks are preferred. The blocks are never so large
+    that some of the threads would be left without one.
+    """
+    bytes_per_column = (k + n_small) * max(itemsize, 8)
+    block_size = int(max_memory // (n_threads * bytes_per_column))
+    block_size = min(block_size, -(-n_big // n_threads))
+    return max(1, block_size)
+
+
+def _blocked_inplace(n_big, block_size, n_threads, dot_block):
+    r"""
+    Run ``dot_block(i, j)`` for every block ``[i, j)`` of ``n_big``, either
+    serially or on a pool of ``n_threads`` threads. The blocks write to
+    disjoint parts of the output, and NumPy releases the GIL in ``dot``, so
+    they can safely be computed concurrently.
+    """
+    starts = range(0, n_big, block_size)
+    if n_threads == 1:
+        for i in starts:
+            dot_block(i, i + block_size)
+    else:
+        pool = ThreadPool(n_threads)
+        try:
+            pool.map(lambda i: dot_block(i, i + block_size), starts)
+        finally:
+            pool.close()
+            pool.join()
+
+
+def dot_inplace_left(a, b, block_size=1000, n_threads=1,
+                     max_memory=DEFAULT_MAX_MEMORY):
     r"""
     a * b = c where ``a`` will be replaced inplace with ``c``.
 
@@ -18,6 +62,12 @@ def dot_inplace_left(a, b, block_size=1000):
         The size of the block of ``a`` that will be dotted against ``b`` in
         each iteration. larger block sizes increase the time performance of the
         dot product at the cost of a higher memory overhead for the operation.
+        If None, the largest block size within ``max_memory`` is used.
+    n_threads : int, optional
+        The number of threads the blocks are split between.
+    max_memory : int, optional
+        The bound (in bytes) on the temporary memory used by all the threads
+        when ``block_size`` is None.
 
     Returns
     -------
@@ -33,13 +83,22 @@ def dot_inplace_left(a, b, block_size=1000):
         raise ValueError('Cannot dot inplace left - '
                          'b.shape[1] ({}) > a.shape[1] '
                          '({})'.format(n_small, k_a))
-    for i in range(0, n_big, block_size):
-        j = i + block_size
+    if n_threads < 1:
+        raise ValueError('n_threads must be at least 1 - '
+                         '{} given'.format(n_threads))
+    if block_size is None:
+        block_size = _auto_block_size(n_big, k_a, n_small, a.itemsize,
+                                      n_threads, max_memory)
+
+    def dot_block(i, j):
         a[i:j, :n_small] = a[i:j].dot(b)
+
+    _blocked_inplace(n_big, block_size, n_threads, dot_block)
     return a[:, :n_small]
 
 
-def dot_inplace_right(a, b, block_size=1000):
+def dot_inplace_right(a, b, block_size=1000, n_threads=1,
+                      max_memory=DEFAULT_MAX_MEMORY):
     r"""
     a * b = c where ``b`` will be replaced inplace with ``c``.
 
@@ -57,7 +116,13 @@ def dot_inplace_right(a, b, block_size=1000):
         The size of the block of ``b`` that ``a`` will be dotted against
         in each iteration. larger block sizes increase the time performance of
         the dot product at the cost of a higher memory overhead for the
-        operation.
+        operation. If None, the largest block size within ``max_memory`` is
+        used.
+    n_threads : int, optional
+        The number of threads the blocks are split between.
+    max_memory : int, optional
+        The bound (in bytes) on the temporary memory used by all the threads
+        when ``block_size`` is None.
 
     Returns
     -------
@@ -73,7 +138,15 @@ def dot_inplace_right(a, b, block_size=1000):
         raise ValueError('Cannot dot inplace right - '
                          'a.shape[1] ({}) > b.shape[0] '
                          '({})'.format(n_small, k_b))
-    for i in range(0, n_big, block_size):
-        j = i + block_size
+    if n_threads < 1:
+        raise ValueError('n_threads must be at least 1 - '
+                         '{} given'.format(n_threads))
+    if block_size is None:
+        block_size = _auto_block_size(n_big, k_b, n_small, b.itemsize,
+                                      n_threads, max_memory)
+
+    def dot_block(i, j):
         b[:n_small, i:j] = a.dot(b[:, i:j])
+
+    _blocked_inplace(n_big, block_size, n_threads, dot_block)
     return b[:n_small]
@@ -1,5 +1,6 @@
 import numpy as np
-from numpy.testing import assert_almost_equal
+from nose.tools import raises
+from numpy.testing import assert_almost_equal, assert_allclose
 from menpo.math import eigenvalue_decomposition, \
     principal_component_decomposition
 
@@ -284,3 +285,74 @@ def eigenvalue_decomposition_large_epsilon_test():
     sqrt_one_over_2 = np.sqrt(2.0) / 2.0
     assert_almost_equal(pos_eigenvectors,
                         [[sqrt_one_over_2], [sqrt_one_over_2]])
+
+
+def pcd_features_n_components_test():
+    output = principal_component_decomposition(large_samples_data_matrix.T,
+                                               centre=False, n_components=1)
+    eigenvectors, eigenvalues, mean_vector = output
+
+    assert_almost_equal(eigenvalues, eigenvalues_no_centre_no_bias_f[:1])
+    assert_almost_equal(eigenvectors, non_centered_eigenvectors_f[:1])
+
+
+def pcd_randomized_test():
+    # rank 5 data, so the leading components are recovered exactly
+    X = np.random.randn(100, 5).dot(np.random.randn(5, 300))
+    eigenvectors, eigenvalues, mean_vector = \
+        principal_component_decomposition(X, n_components=3)
+    r_eigenvectors, r_eigenvalues, r_mean_vector = \
+        principal_component_decomposition(X, n_components=3,
+                                          method='randomized')
+
+    assert_allclose(r_eigenvalues, eigenvalues)
+    assert_allclose(np.abs(r_eigenvectors), np.abs(eigenvectors), atol=1e-8)
+    assert_allclose(r_mean_vector, mean_vector)
+
+
+@raises(ValueError)
+def pcd_randomized_no_n_components_test():
+    principal_component_decomposition(large_samples_data_matrix,
+                                      method='randomized')
+
+
+def pcd_max_memory_test():
+    # blocks of a single sample or feature, and of several
+    for X in [large_samples_data_matrix, large_samples_data_matrix.T]:
+        output = principal_component_decomposition(X, max_memory=8)
+        blocked_output = principal_component_decomposition(
+            X, max_memory=8 * X.shape[1])
+        for a, b in zip(principal_component_decomposition(X), output):
+            assert_almost_equal(np.abs(a), np.abs(b))
+        for a, b in zip(output, blocked_output):
+            assert_almost_equal(np.abs(a), np.abs(b))
+
+
+def pcd_n_threads_test():
+    # more features than samples, so the eigenvectors are back-projected
+    # inplace onto the data matrix
+    X = np.random.randn(20, 500)
+    expected = principal_component_decomposition(X)
+    for max_memory in [None, 8 * 20 * 50]:
+        output = principal_component_decomposition(
+            X.copy(), inplace=True, max_memory=max_memory, n_threads=4)
+        for a, b in zip(expected, output):
+            assert_allclose(np.abs(a), np.abs(b), atol=1e-10)
+
+
+@raises(ValueError)
+def pcd_n_threads_zero_test():
+    principal_component_decomposition(large_samples_data_matrix,
+                                      n_threads=0)
+
+
+def eigenvalue_decomposition_n_components_test():
+    X = np.random.randn(50, 20)
+    S = np.dot(X.T, X)
+    eigenvectors, eigenvalues = eigenvalue_decomposition(S)
+    k_eigenvectors, k_eigenvalues = eigenvalue_decomposition(S,
+                                                             n_components=5)
+
+    assert_allclose(k_eigenvalues, eigenvalues[:5])
+    assert_allclose(np.abs(k_eigenvectors), np.abs(eigenvectors[:, :5]),
+                    atol=1e-10)
@@ -46,3 +46,28 @@ def test_dot_inplace_right_n_small_too_big_raises_value_error():
     a = np.zeros((101, 100))
     b = np.zeros((100, 10000))
     dot_inplace_right(a, b)
+
+
+def test_dot_inplace_left_threaded():
+    a_l_tmp = a_l.copy()
+    left_result = dot_inplace_left(a_l_tmp, b_l, block_size=1000, n_threads=4)
+    assert_allclose(left_result, gt_l)
+
+
+def test_dot_inplace_right_threaded():
+    b_r_tmp = b_r.copy()
+    right_result = dot_inplace_right(a_r, b_r_tmp, block_size=1000,
+                                     n_threads=4)
+    assert_allclose(right_result, gt_r)
+
+
+def test_dot_inplace_left_auto_block_size_small_memory():
+    a_l_tmp = a_l.copy()
+    left_result = dot_inplace_left(a_l_tmp, b_l, block_size=None,
+                                   n_threads=2, max_memory=10000)
+    assert_allclose(left_result, gt_l)
+
+
+@raises(ValueError)
+def test_dot_inplace_left_zero_threads_raises_value_error():
+    dot_inplace_left(a_l.copy(), b_l, n_threads=0)
@@ -1,4 +1,21 @@
 
+import numpy as np
+
+
+def _instances_as_matrix(instances):
+    r"""
+    Stack the vectorized forms of a list of :map:`Vectorizable` instances
+    into a (n_instances, n_features) matrix.
+    """
+    first_vector = instances[0].as_vector()
+    vectors = np.empty((len(instances), first_vector.size),
+                       dtype=first_vector.dtype)
+    vectors[0] = first_vector
+    for i, instance in enumerate(instances[1:], 1):
+        vectors[i] = instance.as_vector()
+    return vectors
+
+
 class InstanceBackedModel(object):
     r"""
     Mixin for models constructed from a set of Vectorizable objects.
@@ -15,6 +32,8 @@ class InstanceBackedModel(object):
     project_vector(vector)
     reconstruct_vectors(vectors, n_components)
     project_out_vector(vector)
+    project_vectors(vectors)
+    project_out_vectors(vectors)
 
     The constructor takes an instance of :map:`Vectorizable`. This is used for
     all conversions to and from numpy vectors and instances.
@@ -76,6 +95,26 @@ class InstanceBackedModel(object):
         """
         return self.project_vector(instance.as_vector())
 
+    def project_many(self, instances):
+        """
+        Projects each of the `instances` onto the model, retrieving the
+        optimal linear weightings for each.
+
+        The instances are stacked into a single matrix which is projected in
+        one go, which is much faster than calling :meth:`project` on each.
+
+        Parameters
+        -----------
+        instances : list of :class:`menpo.base.Vectorizable`
+            Novel instances.
+
+        Returns
+        -------
+        projected : (n_instances, n_components) ndarray
+            The optimal linear weightings of each instance.
+        """
+        return self.project_vectors(_instances_as_matrix(instances))
+
     def reconstruct(self, instance):
         """
         Projects a `instance` onto the linear space and rebuilds from the
@@ -100,6 +139,37 @@ class InstanceBackedModel(object):
         reconstruction_vector = self.reconstruct_vector(instance.as_vector())
         return instance.from_vector(reconstruction_vector)
 
+    def reconstruct_many(self, instances, as_vectors=False):
+        """
+        Projects each of the `instances` onto the linear space and rebuilds
+        them from the weights found.
+
+        The instances are stacked into a single matrix which is
+        reconstructed in one go, which is much faster than calling
+        :meth:`reconstruct` on each.
+
+        Parameters
+        ----------
+        instances : list of :class:`menpo.base.Vectorizable`
+            Novel instances of Vectorizable
+        as_vectors : bool, optional
+            If True, the reconstructed vectors are returned rather than
+            reconstructed objects, which saves building an object per
+            instance.
+
+            Default: False
+
+        Returns
+        -------
+        reconstructed : list or (n_instances, n_features) ndarray
+            The reconstructed objects (of `self.instance_class`), or their
+            vectors if `as_vectors` is True.
+        """
+        vectors = self.reconstruct_vectors(_instances_as_matrix(instances))
+        if as_vectors:
+            return vectors
+        return [i.from_vector(v) for i, v in zip(instances, vectors)]
+
     def project_out(self, instance):
         """
         Returns a version of `instance` where all the basis of the model
@@ -117,3 +187,34 @@ class InstanceBackedModel(object):
         """
         vector_instance = self.project_out_vector(instance.as_vector())
         return instance.from_vector(vector_instance)
+
+    def project_out_many(self, instances, as_vectors=False):
+        """
+        Returns a version of each of the `instances` where all the basis of
+        the model have been projected out.
+
+        The instances are stacked into a single matrix which is processed in
+        one go, which is much faster than calling :meth:`project_out` on
+        each.
+
+        Parameters
+        ----------
+        instances : list of :class:`menpo.base.Vectorizable`
+            Novel instances.
+        as_vectors : bool, optional
+            If True, the projected out vectors are returned rather than
+            objects, which saves building an object per instance.
+
+            Default: False
+
+        Returns
+        -------
+        projected_out : list or (n_instances, n_features) ndarray
+            Copies of the `instances` (of `self.instance_class`) with all
+            basis of the model projected out, or their vectors if
+            `as_vectors` is True.
+        """
+        vectors = self.project_out_vectors(_instances_as_matrix(instances))
+        if as_vectors:
+            return vectors
+        return [i.from_vector(v) for i, v in zip(instances, vectors)]
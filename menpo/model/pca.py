@@ -1,10 +1,130 @@
 from __future__ import division
+import os
+import tempfile
+from itertools import islice
+from multiprocessing.pool import ThreadPool
 import numpy as np
-from menpo.math import principal_component_decomposition
+from menpo.base import float_dtype
+from menpo.math import (principal_component_decomposition,
+                        incremental_principal_component_decomposition)
 from menpo.model.base import MeanInstanceLinearModel
 from menpo.visualize import print_dynamic, progress_bar_str
 
 
+def _data_matrix(samples, n_samples=None, verbose=False, path=None,
+                 n_workers=None, dtype=None):
+    r"""
+    Build the (n_samples, n_features) data matrix of a list or iterator of
+    :map:`Vectorizable` samples. If ``path`` is given the data matrix is an
+    ``np.memmap`` onto a new file at ``path``, else it is held in memory.
+    If ``n_workers`` is greater than 1, the samples are vectorized by a pool
+    of that many threads, each writing straight into the sample's row.
+    If ``dtype`` is None, the data matrix has the floating point data type
+    of the samples (see :map:`float_dtype`).
+
+    Returns the data matrix and the first sample, which acts as a template.
+    """
+    if n_workers is not None and n_workers < 1:
+        raise ValueError('n_workers must be at least 1 - '
+                         '{} given'.format(n_workers))
+    # get the first element as the template and use it to configure the
+    # data matrix
+    if n_samples is None:
+        # samples is a list
+        n_samples = len(samples)
+        template = samples[0]
+        samples = samples[1:]
+    else:
+        # samples is an iterator
+        template = next(samples)
+    n_features = template.n_parameters
+    template_vector = template.as_vector()
+    if dtype is None:
+        dtype = float_dtype(template_vector.dtype)
+    if path is None:
+        data = np.zeros((n_samples, n_features), dtype=dtype)
+    else:
+        data = np.memmap(path, dtype=dtype, mode='w+',
+                         shape=(n_samples, n_features))
+    # now we can fill in the first element from the template
+    data[0] = template_vector
+    del template_vector
+    if verbose:
+        print('Allocated data matrix {:.2f}'
+              'GB{}'.format(data.nbytes / 2 ** 30,
+                            '' if path is None else ' on disk'))
+    if n_workers is not None and n_workers > 1:
+        _parallel_fill_data_matrix(data, samples, n_workers, verbose=verbose)
+        return data, template
+    # 1-based as we have the template vector set already
+    for i, sample in enumerate(samples, 1):
+        if i >= n_samples:
+            break
+        if verbose:
+            print_dynamic(
+                'Building data matrix from {} samples - {}'.format(
+                    n_samples,
+                progress_bar_str(float(i + 1) / n_samples, show_bar=True)))
+        data[i] = sample.as_vector()
+    return data, template
+
+
+def _parallel_fill_data_matrix(data, samples, n_workers, verbose=False):
+    r"""
+    Fill rows 1 onwards of the data matrix with the vectorized samples,
+    using a pool of ``n_workers`` threads.
+
+    Samples are taken from ``samples`` a few per worker at a time, so that a
+    lazy iterator is never consumed far ahead of the samples being
+    vectorized. Each sample is written to the row given by its position, so
+    the order of the rows does not depend on the order in which the workers
+    finish.
+    """
+    n_samples = data.shape[0]
+
+    def fill_row(i_sample):
+        i, sample = i_sample
+        data[i] = sample.as_vector()
+
+    # 1-based as we have the template vector set already
+    indexed_samples = islice(enumerate(samples, 1), n_samples - 1)
+    chunk_size = 4 * n_workers
+    pool = ThreadPool(n_workers)
+    try:
+        n_done = 1
+        while True:
+            chunk = list(islice(indexed_samples, chunk_size))
+            if not chunk:
+                break
+            pool.map(fill_row, chunk)
+            n_done += len(chunk)
+            if verbose:
+                print_dynamic(
+                    'Building data matrix from {} samples - {}'.format(
+                        n_samples,
+                        progress_bar_str(float(n_done) / n_samples,
+                                         show_bar=True)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _total_variance(data, centre=True, bias=False, block_size=None):
+    r"""
+    The total variance (the trace of the covariance matrix) of a data
+    matrix, computed ``block_size`` samples at a time.
+    """
+    n_samples = data.shape[0]
+    if block_size is None:
+        block_size = 1000
+    N = n_samples if bias else n_samples - 1.0
+    mean = np.mean(data, axis=0) if centre else 0
+    total = 0.0
+    for i in range(0, n_samples, block_size):
+        total += np.sum((data[i:i + block_size] - mean) ** 2)
+    return total / N
+
+
 class PCAModel(MeanInstanceLinearModel):
     """A :map:`MeanInstanceLinearModel` where components are Principal
     Components.
@@ -29,6 +149,45 @@ class PCAModel(MeanInstanceLinearModel):
         If provided then ``samples``  must be an iterator  that yields
         ``n_samples``. If not provided then samples has to be a
         list (so we know how large the data matrix needs to be).
+    n_components : int, optional
+        If provided, only the ``n_components`` leading components are
+        computed and kept. The variance of the other components is still
+        accounted for (see :meth:`original_variance` and
+        :meth:`noise_variance`), as if the model had been trimmed, though
+        it is spread evenly over the discarded components.
+    method : ``{'eigen', 'randomized'}``, optional
+        How the components are computed. ``'randomized'`` requires
+        ``n_components`` and approximates the leading components without
+        forming the full covariance or Gram matrix, which is much faster
+        when only a few components of a very large data matrix are wanted.
+        See :map:`principal_component_decomposition`.
+    memmap_dir : str, optional
+        If given, the data matrix is built in a temporary file in this
+        directory, which is memory-mapped, instead of in memory. This allows
+        models to be built from more data than fits in memory. The file is
+        removed once the model is built. Use a directory on a fast local
+        disk.
+    max_memory : int, optional
+        A bound (in bytes) on the working memory used to process the data
+        matrix - see :map:`principal_component_decomposition`. Set this along
+        with ``memmap_dir`` to keep the memory used to build the model
+        bounded.
+    n_workers : int, optional
+        If greater than 1, the samples are vectorized by this many threads
+        at once. This speeds up building the model when vectorizing a sample
+        is expensive (for instance, when it is computed lazily) and mostly
+        runs outside of the GIL, as NumPy and SciPy operations do. The rows
+        of the data matrix are in the order of ``samples`` irrespective of
+        ``n_workers``.
+    dtype : numpy data type, optional
+        The floating point data type the data matrix, and so the model, is
+        built in. If None, the data type of the samples if they are floating
+        point, else the :map:`default_dtype`. A ``np.float32`` model takes
+        half the memory of a ``np.float64`` one.
+    n_threads : int, optional
+        The number of threads the back-projection of the eigenvectors onto
+        the data matrix is split between, when there are more features than
+        samples. See :map:`principal_component_decomposition`.
 
     ..notes:
 
@@ -42,48 +201,62 @@ class PCAModel(MeanInstanceLinearModel):
 
     """
     def __init__(self, samples, centre=True, bias=False, verbose=False,
-                 n_samples=None):
-        # get the first element as the template and use it to configure the
-        # data matrix
-        if n_samples is None:
-            # samples is a list
-            n_samples = len(samples)
-            template = samples[0]
-            samples = samples[1:]
+                 n_samples=None, n_components=None, method='eigen',
+                 memmap_dir=None, max_memory=None, n_workers=None,
+                 dtype=None, n_threads=1):
+        if memmap_dir is not None:
+            fd, path = tempfile.mkstemp(suffix='.dat', dir=memmap_dir)
+            os.close(fd)
         else:
-            # samples is an iterator
-            template = next(samples)
-        n_features = template.n_parameters
-        template_vector = template.as_vector()
-        data = np.zeros((n_samples, n_features), dtype=template_vector.dtype)
-        # now we can fill in the first element from the template
-        data[0] = template_vector
-        del template_vector
-        if verbose:
-            print('Allocated data matrix {:.2f}'
-                  'GB'.format(data.nbytes / 2 ** 30))
-        # 1-based as we have the template vector set already
-        for i, sample in enumerate(samples, 1):
-            if i >= n_samples:
-                break
-            if verbose:
-                print_dynamic(
-                    'Building data matrix from {} samples - {}'.format(
-                        n_samples,
-                    progress_bar_str(float(i + 1) / n_samples, show_bar=True)))
-            data[i] = sample.as_vector()
-
-        # compute pca
-        e_vectors, e_values, mean = principal_component_decomposition(
-            data, whiten=False,  centre=centre, bias=bias, inplace=True)
+            path = None
+        try:
+            data, template = _data_matrix(samples, n_samples=n_samples,
+                                          verbose=verbose, path=path,
+                                          n_workers=n_workers, dtype=dtype)
+            n_samples, n_features = data.shape
+            if n_components is not None:
+                # the variance of the discarded components is only known
+                # from the total variance, which has to be found before the
+                # data matrix is centred inplace
+                block_size = None
+                if max_memory is not None:
+                    block_size = max(1, int(max_memory //
+                                            (n_features * data.itemsize)))
+                total_variance = _total_variance(data, centre=centre,
+                                                 bias=bias,
+                                                 block_size=block_size)
+
+            # compute pca
+            e_vectors, e_values, mean = principal_component_decomposition(
+                data, whiten=False,  centre=centre, bias=bias, inplace=True,
+                n_components=n_components, method=method,
+                max_memory=max_memory, n_threads=n_threads)
+            # make sure nothing refers to the data matrix
+            e_vectors = np.array(e_vectors)
+            mean = np.array(mean)
+            del data
+        finally:
+            if path is not None:
+                os.remove(path)
 
         super(PCAModel, self).__init__(e_vectors, mean, template)
         self.centred = centre
         self.biased = bias
+        self.n_samples = n_samples
         self._eigenvalues = e_values
         # start the active components as all the components
         self._n_active_components = int(self.n_components)
         self._trimmed_eigenvalues = None
+        if n_components is not None:
+            # the individual eigenvalues of the discarded components are
+            # unknown, so their total variance is spread evenly between them
+            rank = min(n_samples - 1 if centre else n_samples,
+                       self.n_features)
+            n_trimmed = rank - self.n_components
+            trimmed_variance = total_variance - e_values.sum()
+            if n_trimmed > 0 and trimmed_variance > 0:
+                self._trimmed_eigenvalues = np.repeat(
+                    trimmed_variance / n_trimmed, n_trimmed)
 
     @property
     def n_active_components(self):
@@ -367,7 +540,8 @@ class PCAModel(MeanInstanceLinearModel):
                 "Number of weightings cannot be greater than {}".format(
                     self.n_active_components))
         else:
-            full_weights = np.zeros((n_instances, self.n_active_components))
+            full_weights = np.zeros((n_instances, self.n_active_components),
+                                    dtype=self._components.dtype)
             full_weights[..., :n_weights] = weights
             weights = full_weights
         return self._instance_vectors_for_full_weights(weights)
@@ -413,6 +587,83 @@ class PCAModel(MeanInstanceLinearModel):
             # make sure that the eigenvalues are trimmed too
             self._eigenvalues = self._eigenvalues[:self.n_active_components]
 
+    def increment(self, samples, forgetting_factor=None, verbose=False,
+                  n_samples=None, n_workers=None):
+        r"""
+        Update the mean, eigenvectors and eigenvalues of the model with new
+        samples, without rebuilding it from all the samples it has seen.
+        The cost of an update depends only on the number of new samples and
+        the number of components of the model. See
+        :map:`incremental_principal_component_decomposition` for details.
+
+        If the model has not been trimmed and no forgetting factor is used,
+        the updated model is the same (up to the signs of the components)
+        as one built from all the samples at once. After a trim the
+        discarded components cannot be updated, so the update is an
+        approximation. The number of components can grow by up to the
+        number of new samples. If all the components were active before the
+        update, all the components are active after it.
+
+        Parameters
+        ----------
+        samples : list of :map:`Vectorizable`
+            List of new samples to update the model with.
+        forgetting_factor : float, optional
+            A value in ``(0, 1]`` which down-weights the samples the model
+            has already seen relative to the new samples. If None (the
+            default) all samples are weighted equally.
+        verbose : bool, optional
+            Print progress while building the data matrix of the new
+            samples.
+        n_samples : int, optional
+            If provided then ``samples`` must be an iterator that yields
+            ``n_samples``. If not provided then samples has to be a list.
+        n_workers : int, optional
+            If greater than 1, the new samples are vectorized by this many
+            threads at once.
+
+        Raises
+        ------
+        ValueError
+            If the new samples do not have ``n_features`` features, or the
+            forgetting factor is not in ``(0, 1]``.
+        """
+        if forgetting_factor is None:
+            forgetting_factor = 1.0
+        data, _ = _data_matrix(samples, n_samples=n_samples, verbose=verbose,
+                               n_workers=n_workers,
+                               dtype=self._components.dtype)
+        if data.shape[1] != self.n_features:
+            raise ValueError('The model has {} features but the new samples '
+                             'have {}'.format(self.n_features, data.shape[1]))
+        mean = self.mean_vector if self.centred else None
+        e_vectors, e_values, mean, n_total = \
+            incremental_principal_component_decomposition(
+                data, self._components, self._eigenvalues, self.n_samples,
+                mean_vector=mean, bias=self.biased,
+                forgetting_factor=forgetting_factor)
+
+        if self._trimmed_eigenvalues is not None:
+            # the trimmed variance is not updated, but it is renormalised
+            # (and forgotten) in the same way as the kept eigenvalues
+            if self.biased:
+                N_old, N = self.n_samples, n_total
+            else:
+                N_old, N = self.n_samples - 1.0, n_total - 1.0
+            self._trimmed_eigenvalues = (self._trimmed_eigenvalues *
+                                         forgetting_factor ** 2 * N_old / N)
+
+        all_active = self.n_active_components == self.n_components
+        self._components = e_vectors
+        self._eigenvalues = e_values
+        self.mean_vector = mean
+        self.n_samples = n_total
+        if all_active:
+            self._n_active_components = int(self.n_components)
+        else:
+            self._n_active_components = min(self._n_active_components,
+                                            int(self.n_components))
+
     def distance_to_subspace(self, instance):
         """
         Returns a version of `instance` where all the basis of the model
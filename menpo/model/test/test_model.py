@@ -1,3 +1,7 @@
+import os
+import shutil
+import tempfile
+import time
 import numpy as np
 from nose.tools import raises
 from numpy.testing import assert_allclose, assert_equal
@@ -198,3 +202,176 @@ def test_pca_orthogonalize_against_with_less_active_components():
     # number of active components must remain the same
     assert_equal(pca_model.n_active_components, 5)
 
+
+
+def test_pca_increment_same_as_batch():
+    samples = [PointCloud(np.random.randn(10)) for _ in range(30)]
+    model = PCAModel(samples[:10])
+    model.increment(samples[10:20])
+    model.increment(iter(samples[20:]), n_samples=10)
+    batch_model = PCAModel(samples)
+    assert_equal(model.n_samples, 30)
+    assert_equal(model.n_components, batch_model.n_components)
+    assert_allclose(model.mean_vector, batch_model.mean_vector)
+    assert_allclose(model.eigenvalues, batch_model.eigenvalues)
+    # components are only defined up to sign
+    assert_allclose(np.abs(model.components),
+                    np.abs(batch_model.components), atol=1e-10)
+
+
+def test_pca_increment_forgetting_factor():
+    samples = [PointCloud(np.random.randn(10)) for _ in range(10)]
+    new_samples = [PointCloud(np.random.randn(10) + 5) for _ in range(10)]
+    model = PCAModel(samples)
+    model.increment(new_samples, forgetting_factor=0.5)
+    # the old samples only count for half as much
+    assert_equal(model.n_samples, 15)
+    expected_mean = (0.5 * np.mean([s.points for s in samples], axis=0) +
+                     np.mean([s.points for s in new_samples], axis=0)) / 1.5
+    assert_allclose(model.mean_vector, expected_mean.ravel())
+
+
+@raises(ValueError)
+def test_pca_increment_wrong_n_features():
+    samples = [PointCloud(np.random.randn(10)) for _ in range(10)]
+    model = PCAModel(samples)
+    model.increment([PointCloud(np.random.randn(12)) for _ in range(10)])
+
+
+def test_pca_n_components():
+    samples = [PointCloud(np.random.randn(10)) for _ in range(10)]
+    model = PCAModel(samples, n_components=4)
+    trimmed_model = PCAModel(samples)
+    trimmed_model.trim_components(4)
+    assert_equal(model.n_components, 4)
+    assert_allclose(model.eigenvalues, trimmed_model.eigenvalues)
+    assert_allclose(model.original_variance(),
+                    trimmed_model.original_variance())
+    assert_allclose(model.noise_variance(), trimmed_model.noise_variance())
+
+
+def test_pca_randomized():
+    # rank 3 data, so the leading components are recovered exactly
+    vectors = np.random.randn(20, 3).dot(np.random.randn(3, 40))
+    samples = [PointCloud(v.reshape(-1, 2)) for v in vectors]
+    model = PCAModel(samples, n_components=2, method='randomized')
+    exact_model = PCAModel(samples, n_components=2)
+    assert_allclose(model.eigenvalues, exact_model.eigenvalues)
+    assert_allclose(np.abs(model.components), np.abs(exact_model.components),
+                    atol=1e-8)
+
+
+def test_pca_memmap_max_memory():
+    for n_points in [5, 100]:
+        samples = [PointCloud(np.random.randn(n_points, 2))
+                   for _ in range(20)]
+        model = PCAModel(samples)
+        memmap_dir = tempfile.mkdtemp()
+        try:
+            # a budget of 4 features/samples per block
+            mm_model = PCAModel(samples, memmap_dir=memmap_dir,
+                                max_memory=4 * 8 * n_points * 2)
+            # the data matrix file is removed
+            assert_equal(os.listdir(memmap_dir), [])
+        finally:
+            shutil.rmtree(memmap_dir)
+        assert_allclose(mm_model.eigenvalues, model.eigenvalues)
+        assert_allclose(np.abs(mm_model.components),
+                        np.abs(model.components), atol=1e-10)
+        assert_allclose(mm_model.mean_vector, model.mean_vector)
+
+
+class SlowPointCloud(PointCloud):
+
+    def as_vector(self):
+        # finish in a random order when vectorized in parallel
+        time.sleep(np.random.rand() * 0.002)
+        return PointCloud.as_vector(self)
+
+
+def test_pca_n_workers():
+    samples = [SlowPointCloud(np.random.randn(10, 2)) for _ in range(50)]
+    model = PCAModel(samples)
+    parallel_model = PCAModel(iter(samples), n_samples=50, n_workers=4)
+    assert_equal(parallel_model.components, model.components)
+    assert_equal(parallel_model.eigenvalues, model.eigenvalues)
+    assert_equal(parallel_model.mean_vector, model.mean_vector)
+
+
+@raises(ValueError)
+def test_pca_n_workers_zero():
+    samples = [PointCloud(np.random.randn(10)) for _ in range(10)]
+    PCAModel(samples, n_workers=0)
+
+
+@raises(ValueError)
+def test_pca_n_workers_negative():
+    samples = [PointCloud(np.random.randn(10)) for _ in range(10)]
+    PCAModel(samples, n_workers=-2)
+
+
+def test_pca_n_threads():
+    samples = [PointCloud(np.random.randn(100, 2)) for _ in range(10)]
+    model = PCAModel(samples)
+    threaded_model = PCAModel(samples, n_threads=3)
+    assert_allclose(np.abs(threaded_model.components),
+                    np.abs(model.components))
+    assert_allclose(threaded_model.eigenvalues, model.eigenvalues)
+
+
+def test_pca_project_many():
+    samples = [PointCloud(np.random.randn(10, 2)) for _ in range(20)]
+    model = PCAModel(samples)
+    model.n_active_components = 5
+    novel = [PointCloud(np.random.randn(10, 2)) for _ in range(5)]
+    weights = model.project_many(novel)
+    assert_equal(weights.shape, (5, 5))
+    for w, instance in zip(weights, novel):
+        assert_allclose(w, model.project(instance))
+
+
+def test_pca_reconstruct_many():
+    samples = [PointCloud(np.random.randn(10, 2)) for _ in range(20)]
+    model = PCAModel(samples)
+    model.n_active_components = 5
+    novel = [PointCloud(np.random.randn(10, 2)) for _ in range(5)]
+    reconstructions = model.reconstruct_many(novel)
+    vectors = model.reconstruct_many(novel, as_vectors=True)
+    assert_equal(vectors.shape, (5, 20))
+    for r, v, instance in zip(reconstructions, vectors, novel):
+        expected = model.reconstruct(instance).points
+        assert(isinstance(r, PointCloud))
+        assert_allclose(r.points, expected)
+        assert_allclose(v, expected.ravel())
+
+
+def test_pca_project_out_many():
+    samples = [PointCloud(np.random.randn(10, 2)) for _ in range(20)]
+    model = PCAModel(samples)
+    novel = [PointCloud(np.random.randn(10, 2)) for _ in range(5)]
+    projected_out = model.project_out_many(novel)
+    for p, instance in zip(projected_out, novel):
+        assert_allclose(p.points, model.project_out(instance).points)
+
+
+def test_pca_float32_samples_build_float32_model():
+    samples = [PointCloud(np.random.randn(10, 2).astype(np.float32))
+               for _ in range(20)]
+    model = PCAModel(samples)
+    assert_equal(model.components.dtype, np.float32)
+    assert_equal(model.mean_vector.dtype, np.float32)
+
+
+def test_pca_dtype():
+    samples = [PointCloud(np.random.randn(10, 2)) for _ in range(20)]
+    model = PCAModel(samples, dtype=np.float32)
+    assert_equal(model.components.dtype, np.float32)
+    assert_allclose(model.eigenvalues, PCAModel(samples).eigenvalues,
+                    rtol=1e-4)
+
+
+def test_pca_float32_discards_round_off_eigenvalues():
+    # 30 centred samples span at most 29 dimensions
+    samples = [PointCloud(np.random.randn(50, 2)) for _ in range(30)]
+    model = PCAModel(samples, dtype=np.float32)
+    assert_equal(model.eigenvalues.shape, (29,))
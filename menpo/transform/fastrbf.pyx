@@ -0,0 +1,74 @@
+#cython: cdivision=True
+#cython: boundscheck=False
+#cython: nonecheck=False
+#cython: wraparound=False
+import numpy as np
+cimport numpy as np
+from cython.parallel cimport prange
+from libc.math cimport log, sqrt
+
+# the basis functions that can be evaluated by the fused kernel
+cdef enum BasisFunction:
+    BASIS_R2LOGR2 = 0
+    BASIS_R2LOGR = 1
+
+R2LOGR2 = BASIS_R2LOGR2
+R2LOGR = BASIS_R2LOGR
+
+
+cdef inline double basis(double r, int function) nogil:
+    # the same operations as the NumPy implementations of the basis functions,
+    # with the singularity at r = 0 set to 0
+    if r == 0:
+        return 0
+    if function == BASIS_R2LOGR2:
+        return r * r * (2 * log(r))
+    return r * r * log(r)
+
+
+def rbf_dot(double[:, ::1] points, double[:, ::1] centres,
+            double[:, ::1] weights, int function, int n_threads=1):
+    r"""
+    Evaluate ``rbf(points).dot(weights)`` without building the
+    (n_points, n_centres) matrix of basis function values. Each point is
+    processed in turn - the basis function of the distance to every centre
+    is evaluated and immediately accumulated into the output. The points are
+    optionally split between threads.
+
+    Parameters
+    ----------
+    points : (n_points, n_dims) ndarray
+        The points to evaluate the basis at.
+    centres : (n_centres, n_dims) ndarray
+        The centres of the basis.
+    weights : (n_centres, n_outputs) ndarray
+        The weights of each centre.
+    function : {R2LOGR2, R2LOGR}
+        The basis function to use.
+    n_threads : int, optional
+        The number of threads to use.
+
+    Returns
+    -------
+    result : (n_points, n_outputs) ndarray
+        The weighted sum of the basis functions at each point.
+    """
+    cdef Py_ssize_t n_points = points.shape[0]
+    cdef Py_ssize_t n_centres = centres.shape[0]
+    cdef Py_ssize_t n_dims = points.shape[1]
+    cdef Py_ssize_t n_outputs = weights.shape[1]
+    cdef np.ndarray[double, ndim=2] result = np.zeros((n_points, n_outputs))
+    cdef double[:, ::1] out = result
+    cdef Py_ssize_t i, j, k
+    cdef double r, diff, u
+    for i in prange(n_points, nogil=True, num_threads=n_threads,
+                    schedule='static'):
+        for j in range(n_centres):
+            r = 0
+            for k in range(n_dims):
+                diff = points[i, k] - centres[j, k]
+                r = r + diff * diff
+            u = basis(sqrt(r), function)
+            for k in range(n_outputs):
+                out[i, k] += u * weights[j, k]
+    return result
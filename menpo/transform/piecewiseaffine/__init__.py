@@ -1,2 +1,3 @@
 from .base import CachedPWA as PiecewiseAffine  # the default PWA caches
 from .base import TriangleContainmentError
+from .base import PWALookupMap
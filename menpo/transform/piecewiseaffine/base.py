@@ -6,6 +6,11 @@ from menpo.transform.base import Alignment, Invertible, Transform
 from .fastpwa import CLookupPWA
 # TODO View is broken for PWA (TriangleContainmentError)
 
+# the default scratch memory budget of the PythonPWA containment search
+DEFAULT_MAX_MEMORY = 2 ** 27  # 128MB
+# the number of triangles tested against each block of points at once
+_TRIANGLE_BLOCK_SIZE = 64
+
 
 class TriangleContainmentError(Exception):
     r"""
@@ -161,6 +166,120 @@ def index_alpha_beta(i, ij, ik, points):
     return index, alpha[each_point, index], beta[each_point, index]
 
 
+def chunked_index_alpha_beta(i, ij, ik, points,
+                             max_memory=DEFAULT_MAX_MEMORY):
+    r"""
+    As :func:`index_alpha_beta`, but the points are tested against the
+    triangles in blocks so that the scratch memory used is bounded (rather
+    than being proportional to `n_points` x `n_tris`). The scratch buffers
+    are allocated once and reused for every block, and a point is no longer
+    tested once a block of triangles is found to contain it. Where a point
+    lies in more than one triangle (on a shared edge), the first is
+    returned.
+
+    Parameters
+    -----------
+    i : (`n_tris`, 2) ndarray
+        The coordinate of the i'th point of each triangle
+
+    ij (`n_tris`, 2) ndarray
+        The vector between the i'th point and the j'th point of each
+        triangle
+
+    ik (`n_tris`, 2) ndarray
+        The vector between the i'th point and the k'th point of each
+        triangle
+
+    points : (`n_points`, 2) ndarray
+        Points to calculate the barycentric coordinates for.
+
+    max_memory : `int`, optional
+        The (approximate) number of bytes of scratch memory to use.
+
+    Returns
+    -------
+    tri_index : (`n_points`,) ndarray
+        triangle index for each of the `points`, assigning each
+        point to it's containing triangle.
+    alpha : (`n_points`,) ndarray
+        Alpha for containing triangle of each point.
+    beta : (`n_points`,) ndarray
+        Beta for containing triangle of each point.
+
+    Raises
+    ------
+    TriangleContainmentError
+    All `points` must be contained in a source triangle. Check
+    `error.points_outside_source_domain` to handle this case.
+    """
+    n_points, n_tris = points.shape[0], i.shape[1]
+    dot_jj = np.einsum('dt, dt -> t', ij, ij)
+    dot_kk = np.einsum('dt, dt -> t', ik, ik)
+    dot_jk = np.einsum('dt, dt -> t', ij, ik)
+    d = 1.0/(dot_jj * dot_kk - dot_jk * dot_jk)
+
+    # seven float and two boolean buffers per point/triangle pair
+    tri_block = min(n_tris, _TRIANGLE_BLOCK_SIZE)
+    point_block = int(max_memory // ((7 * 8 + 2) * max(tri_block, 1)))
+    point_block = max(1, min(n_points, point_block))
+    scratch = np.empty((7, point_block, tri_block))
+    contained_scratch = np.empty((2, point_block, tri_block), dtype=np.bool)
+
+    tri_index = -np.ones(n_points, dtype=np.int64)
+    alpha = np.zeros(n_points)
+    beta = np.zeros(n_points)
+    for p_start in xrange(0, n_points, point_block):
+        active = np.arange(p_start, min(p_start + point_block, n_points))
+        for t_start in xrange(0, n_tris, tri_block):
+            if active.size == 0:
+                break  # all the points in this block have been found
+            t = slice(t_start, t_start + tri_block)
+            n, n_t = active.size, min(tri_block, n_tris - t_start)
+            ip_x, ip_y, dot_pj, dot_pk, a, b, tmp = [
+                buf[:n, :n_t] for buf in scratch]
+            contained, tmp_contained = [buf[:n, :n_t]
+                                        for buf in contained_scratch]
+            p = points[active]
+            # (same operations, in the same order, as alpha_beta)
+            np.subtract(p[:, 0, None], i[0, t], out=ip_x)
+            np.subtract(p[:, 1, None], i[1, t], out=ip_y)
+            np.multiply(ip_x, ij[0, t], out=dot_pj)
+            np.multiply(ip_y, ij[1, t], out=tmp)
+            np.add(dot_pj, tmp, out=dot_pj)
+            np.multiply(ip_x, ik[0, t], out=dot_pk)
+            np.multiply(ip_y, ik[1, t], out=tmp)
+            np.add(dot_pk, tmp, out=dot_pk)
+            np.multiply(dot_kk[t], dot_pj, out=a)
+            np.multiply(dot_jk[t], dot_pk, out=tmp)
+            np.subtract(a, tmp, out=a)
+            np.multiply(a, d[t], out=a)
+            np.multiply(dot_jj[t], dot_pk, out=b)
+            np.multiply(dot_jk[t], dot_pj, out=tmp)
+            np.subtract(b, tmp, out=b)
+            np.multiply(b, d[t], out=b)
+            # containment - alpha >= 0, beta >= 0, alpha + beta <= 1
+            np.greater_equal(a, 0, out=contained)
+            np.greater_equal(b, 0, out=tmp_contained)
+            np.logical_and(contained, tmp_contained, out=contained)
+            np.add(a, b, out=tmp)
+            np.less_equal(tmp, 1, out=tmp_contained)
+            np.logical_and(contained, tmp_contained, out=contained)
+            # the first containing triangle of each point (if any)
+            first = np.argmax(contained, axis=1)
+            rows = np.arange(n)
+            found = contained[rows, first]
+            found_points = active[found]
+            rows, first = rows[found], first[found]
+            tri_index[found_points] = t_start + first
+            alpha[found_points] = a[rows, first]
+            beta[found_points] = b[rows, first]
+            active = active[~found]
+    outside = tri_index < 0
+    if np.any(outside):
+        raise TriangleContainmentError(outside)
+    return tri_index.astype(np.uint32), alpha, beta
+
+
 def barycentric_vectors(points, trilist):
     r"""
     Compute the affine transformation between each triangle in the source
@@ -194,6 +313,92 @@ def barycentric_vectors(points, trilist):
     return x[0], x[1] - x[0], x[2] - x[0]
 
 
+class PWALookupMap(object):
+    r"""
+    The source triangulation of a piecewise affine transform rasterised over
+    a fixed template. For every pixel of the template, the index of the
+    containing source triangle and the barycentric coordinates (alpha, beta)
+    of the pixel in it are found once and stored.
+
+    A PWA with a lookup map attached (see :meth:`AbstractPWA.rasterise`)
+    applied to the template pixels only has to gather the target triangle
+    vectors - no containment search is performed. As the map only depends
+    on the source it is unaffected by changing the target of the transform.
+    It is immutable, and so is shared (not copied) between copies of the
+    transform.
+
+    Parameters
+    ----------
+    pwa : :map:`AbstractPWA`
+        The transform whose source triangulation should be rasterised.
+    template : :map:`BooleanImage` or `tuple`
+        The template mask (the `True` pixels are rasterised) or the shape of
+        the template (all pixels are rasterised).
+    """
+
+    def __init__(self, pwa, template):
+        if hasattr(template, 'true_indices'):
+            self.shape = template.shape
+            points = template.true_indices()
+        else:
+            self.shape = tuple(template)
+            points = np.indices(self.shape).reshape([len(self.shape), -1]).T
+        self.points = np.require(points, dtype=np.float64,
+                                 requirements=['C'])
+        self.source = pwa.source.points.copy()
+        self.trilist = pwa.trilist.copy()
+        self.index, self.alpha, self.beta = \
+            pwa._rasterise_index_alpha_beta(self.points)
+        self.outside = self.index < 0
+        self.any_outside = np.any(self.outside)
+        for a in (self.points, self.source, self.trilist, self.index,
+                  self.alpha, self.beta, self.outside):
+            a.flags.writeable = False
+
+    @property
+    def n_points(self):
+        r"""
+        The number of rasterised pixels.
+
+        :type: `int`
+        """
+        return self.points.shape[0]
+
+    def is_compatible_with(self, pwa):
+        r"""
+        Whether this map was rasterised from the same source triangulation as
+        the given transform.
+
+        :type: `bool`
+        """
+        return (np.array_equal(pwa.source.points, self.source) and
+                np.array_equal(pwa.trilist, self.trilist))
+
+    def matches(self, points):
+        r"""
+        Whether the given points are exactly the rasterised pixels.
+
+        :type: `bool`
+        """
+        return points is self.points or (
+            points.shape == self.points.shape and
+            np.array_equal(points, self.points))
+
+    def index_alpha_beta(self):
+        r"""
+        The containing triangle index and the alpha and beta of every
+        rasterised pixel.
+
+        Raises
+        ------
+        TriangleContainmentError
+            If any of the pixels is not contained in a source triangle.
+        """
+        if self.any_outside:
+            raise TriangleContainmentError(self.outside.copy())
+        return self.index, self.alpha, self.beta
+
+
 # Note we inherit from Alignment first to get it's n_dims behavior
 class AbstractPWA(Alignment, Transform, Invertible):
     r"""
@@ -234,6 +439,7 @@ class AbstractPWA(Alignment, Transform, Invertible):
             raise ValueError("source and target must be 2 "
                              "dimensional")
         self.ti, self.tij, self.tik = None, None, None
+        self._lookup_map = None
         self._rebuild_target_vectors()
 
     @property
@@ -286,11 +492,71 @@ class AbstractPWA(Alignment, Transform, Invertible):
         transformed : (K, 2) ndarray
             The transformed array.
         """
-        tri_index, alpha, beta = self.index_alpha_beta(x)
+        if self._lookup_map is not None and self._lookup_map.matches(x):
+            tri_index, alpha, beta = self._lookup_map.index_alpha_beta()
+        else:
+            tri_index, alpha, beta = self.index_alpha_beta(x)
         return (self.ti[tri_index] +
                 alpha[:, None] * self.tij[tri_index] +
                 beta[:, None] * self.tik[tri_index])
 
+    @property
+    def lookup_map(self):
+        r"""
+        The :map:`PWALookupMap` used when this transform is applied to the
+        pixels of a fixed template, or `None`. Set it to share a map built
+        for another transform with the same source.
+
+        :type: :map:`PWALookupMap`
+        """
+        return self._lookup_map
+
+    @lookup_map.setter
+    def lookup_map(self, lookup_map):
+        if lookup_map is not None and not lookup_map.is_compatible_with(self):
+            raise ValueError("The lookup map was rasterised from a different "
+                             "source triangulation")
+        self._lookup_map = lookup_map
+
+    def rasterise(self, template):
+        r"""
+        Rasterise the source triangulation over a fixed template, so that
+        applying this transform to the pixels of the template no longer
+        searches for the containing triangles. The map survives changes of
+        the target and is shared by copies of this transform.
+
+        Parameters
+        ----------
+        template : :map:`BooleanImage` or `tuple`
+            The template mask (the `True` pixels are rasterised) or the shape
+            of the template (all pixels are rasterised).
+
+        Returns
+        -------
+        lookup_map : :map:`PWALookupMap`
+            The map, now attached to this transform.
+        """
+        self._lookup_map = PWALookupMap(self, template)
+        return self._lookup_map
+
+    def _rasterise_index_alpha_beta(self, points):
+        r"""
+        As :meth:`index_alpha_beta`, but points outside of the source
+        triangulation are given an index of -1 rather than raising.
+        """
+        try:
+            return self.index_alpha_beta(points)
+        except TriangleContainmentError as e:
+            outside = e.points_outside_source_domain
+            index = -np.ones(points.shape[0], dtype=np.int32)
+            alpha = np.zeros(points.shape[0])
+            beta = np.zeros(points.shape[0])
+            if not np.all(outside):
+                inside = ~outside
+                index[inside], alpha[inside], beta[inside] = \
+                    self.index_alpha_beta(points[inside])
+            return index, alpha, beta
+
 
     @abc.abstractmethod
     def index_alpha_beta(self, points):
@@ -336,24 +602,71 @@ class AbstractPWA(Alignment, Transform, Invertible):
         from menpo.shape import PointCloud, TriMesh  # to avoid circular import
         new_source = TriMesh(self.target.points, self.source.trilist)
         new_target = PointCloud(self.source.points)
-        return type(self)(new_source, new_target)
+        return type(self)(new_source, new_target, **self._init_kwargs())
+
+    def _init_kwargs(self):
+        r"""
+        The keyword arguments (beyond the source and target) that this
+        transform was built with, so that related transforms can be built
+        with the same configuration.
+        """
+        return {}
 
 
 class PythonPWA(AbstractPWA):
+    r"""
+    A piecewise affine transformation implemented in pure NumPy.
 
-    def __init__(self, source, target):
+    Points are tested against the triangles in blocks, so that the memory
+    used by the containment search stays within a fixed budget however many
+    points are applied. Points stop being tested as soon as a block of
+    triangles contains them.
+
+    Parameters
+    ----------
+    source : :class:`menpo.shape.PointCloud` or :class:`menpo.shape.TriMesh`
+        The source points. If a TriMesh is provided, the triangulation on
+        the TriMesh is used. If a :class:`menpo.shape.PointCloud`
+        is provided, a Delaunay triangulation of the source is performed
+        automatically.
+    target : :class:`PointCloud`
+        The target points. Note that the trilist is entirely decided by
+        the source.
+    max_memory : `int` or ``None``, optional
+        The (approximate) number of bytes of scratch memory the containment
+        search may use. If ``None``, every point is tested against every
+        triangle at once.
+
+    Raises
+    ------
+    ValueError
+        Source and target must both be 2D.
+
+    TriangleContainmentError
+        All points to apply must be contained in a source triangle. Check
+        `error.points_outside_source_domain` to handle this case.
+    """
+
+    def __init__(self, source, target, max_memory=DEFAULT_MAX_MEMORY):
         super(PythonPWA, self).__init__(source, target)
         si, sij, sik = barycentric_vectors(self.source.points, self.trilist)
         self.s, self.sij, self.sik = si, sij, sik
+        self.max_memory = max_memory
 
     def index_alpha_beta(self, points):
-        return index_alpha_beta(self.s, self.sij, self.sik, points)
+        if self.max_memory is None:
+            return index_alpha_beta(self.s, self.sij, self.sik, points)
+        return chunked_index_alpha_beta(self.s, self.sij, self.sik, points,
+                                        max_memory=self.max_memory)
+
+    def _init_kwargs(self):
+        return {'max_memory': self.max_memory}
 
 
 class CachedPWA(PythonPWA):
 
-    def __init__(self, source, target):
-        super(CachedPWA, self).__init__(source, target)
+    def __init__(self, source, target, max_memory=DEFAULT_MAX_MEMORY):
+        super(CachedPWA, self).__init__(source, target, max_memory=max_memory)
         self._applied_points, self._iab = None, None
 
     def index_alpha_beta(self, points):
@@ -370,7 +683,8 @@ class CythonPWA(AbstractPWA):
 
     The apply method in this case involves dotting the triangle vectors with
     the values of alpha and beta found. The calculation of alpha and beta is
-     done in C, and a hash map is used to cache lookup values.
+     done in C, and a hash map is used to cache lookup values. The cache can
+    be bounded, and is safe to use from many threads at once.
 
     Parameters
     ----------
@@ -382,17 +696,24 @@ class CythonPWA(AbstractPWA):
     target : :class:`PointCloud`
         The target points. Note that the trilist is entirely decided by
         the source.
+    cache_size : `int` or ``None``, optional
+        The maximum number of points whose lookups are cached. If ``None``
+        the cache is unbounded, if 0 nothing is cached.
+    cache_policy : {'lru', 'clock'}, optional
+        How points are evicted from a full cache - least recently used, or
+        the cheaper clock (second chance) approximation of it.
 
     Raises
     ------
     ValueError
-        Source and target must both be 2D.
+        Source and target must both be 2D, or the cache configuration is
+        invalid.
 
     TriangleContainmentError
         All points to apply must be contained in a source triangle. Check
         `error.points_outside_source_domain` to handle this case.
     """
-    def __init__(self, source, target):
+    def __init__(self, source, target, cache_size=None, cache_policy='lru'):
         super(CythonPWA, self).__init__(source, target)
         # make sure the source and target satisfy the c requirements
         source_c = np.require(self.source.points, dtype=np.float64,
@@ -400,13 +721,75 @@ class CythonPWA(AbstractPWA):
         trilist_c = np.require(self.trilist, dtype=np.uint32,
                                requirements=['C'])
         # build the cython wrapped C object and store it locally
-        self._fastpwa = CLookupPWA(source_c, trilist_c)
+        self._fastpwa = CLookupPWA(source_c, trilist_c,
+                                   cache_size=cache_size,
+                                   cache_policy=cache_policy)
 
     def copy(self):
         new = Copyable.copy(self)
         new._fastpwa = deepcopy(self._fastpwa)
         return new
 
+    def _init_kwargs(self):
+        return {'cache_size': self.cache_size,
+                'cache_policy': self.cache_policy}
+
+    @property
+    def cache_size(self):
+        r"""
+        The maximum number of cached points (``None`` if unbounded).
+
+        :type: `int` or ``None``
+        """
+        return self._fastpwa.cache_size
+
+    @property
+    def cache_policy(self):
+        r"""
+        The eviction policy of the cache, 'lru' or 'clock'.
+
+        :type: `str`
+        """
+        return self._fastpwa.cache_policy
+
+    @property
+    def n_cache_hits(self):
+        r"""
+        The number of point lookups answered from the cache.
+
+        :type: `int`
+        """
+        return self._fastpwa.n_cache_hits
+
+    @property
+    def n_cache_misses(self):
+        r"""
+        The number of point lookups that missed the cache.
+
+        :type: `int`
+        """
+        return self._fastpwa.n_cache_misses
+
+    @property
+    def n_cached_points(self):
+        r"""
+        The number of points currently in the cache.
+
+        :type: `int`
+        """
+        return self._fastpwa.n_cached_points
+
+    def clear_cache(self):
+        r"""
+        Empty the lookup cache (the hit and miss counts are preserved).
+        """
+        self._fastpwa.clear_cache()
+
+    def _rasterise_index_alpha_beta(self, points):
+        # a single pass over the grid index, keeping the cache clear
+        points_c = np.require(points, dtype=np.float64, requirements=['C'])
+        return self._fastpwa.bulk_index_alpha_beta(points_c)
+
     def index_alpha_beta(self, points):
         points_c = np.require(points, dtype=np.float64, requirements=['C'])
         index, alpha, beta = self._fastpwa.index_alpha_beta(points_c)
@@ -3,59 +3,121 @@
 
 import numpy as np
 cimport numpy as cnp
+from cpython.pythread cimport (PyThread_type_lock, PyThread_allocate_lock,
+                               PyThread_free_lock, PyThread_acquire_lock,
+                               PyThread_release_lock, WAIT_LOCK)
 
 cdef extern from "./fastpwa/pwa.h":
     ctypedef struct TriangleCollection:
         pass
 
-    ctypedef struct AlphaBetaIndex:
-        pass
+    ctypedef struct AlphaBetaCache:
+        unsigned int nEntries
+        unsigned long long hits
+        unsigned long long misses
+
+    int CACHE_POLICY_LRU
+    int CACHE_POLICY_CLOCK
 
     TriangleCollection initTriangleCollection(double *vertices,
                                               unsigned int *trilist,
                                               unsigned int n_triangles)
+    void buildTriangleCollectionGrid(TriangleCollection *tris)
 
-    void arrayCachedAlphaBetaIndexForPoints(AlphaBetaIndex **hashMap,
-                                      TriangleCollection *tris,
-                                      double *points,
-                                      unsigned int n_points, int *indexes,
-                                      double *alphas, double *betas)
+    void initAlphaBetaCache(AlphaBetaCache *cache, unsigned int maxEntries,
+                            int policy)
+    void clearAlphaBetaCache(AlphaBetaCache *cache) nogil
+    void deleteAlphaBetaCache(AlphaBetaCache *cache)
+    unsigned int arrayRetrieveAlphaBetaIndexFromCache(
+        AlphaBetaCache *cache, double *points, unsigned int n_points,
+        int *indexes, double *alphas, double *betas,
+        unsigned int *missed) nogil
+    void arrayAlphaBetaIndexForMissedPoints(
+        TriangleCollection *tris, double *points, unsigned int *missed,
+        unsigned int n_missed, int *indexes, double *alphas,
+        double *betas) nogil
+    void arrayAddAlphaBetaIndexToCache(
+        AlphaBetaCache *cache, double *points, unsigned int *missed,
+        unsigned int n_missed, int *indexes, double *alphas,
+        double *betas) nogil
     void arrayAlphaBetaIndexForPoints(TriangleCollection *tris,
                                       double *points,
                                       unsigned int n_points, int *indexes,
-                                      double *alphas, double *betas)
-    void clearCacheAndDelete(AlphaBetaIndex **hashMap)
+                                      double *alphas, double *betas) nogil
     void deleteTriangleCollection(TriangleCollection *tris)
 
 cdef class CLookupPWA:
+    r"""
+    Finds the containing triangle and the alpha and beta of points in a
+    triangulation, caching the results by point.
+
+    Parameters
+    ----------
+    points : (n_points, 2) ndarray
+        The vertices of the triangulation.
+    trilist : (n_tris, 3) ndarray
+        The triangle list.
+    cache_size : int or None, optional
+        The maximum number of points cached. If None the cache is unbounded,
+        if 0 nothing is cached.
+    cache_policy : {'lru', 'clock'}, optional
+        How points are evicted from a full cache - least recently used, or
+        the clock (second chance) approximation of it, which does not need to
+        reorder entries on each hit.
+
+    Notes
+    -----
+    The cache is protected by a lock, so a single instance can be used from
+    many threads. The lock is not held (nor is the GIL) while searching for
+    the triangles containing the points that missed the cache.
+    """
     cdef TriangleCollection tris
-    cdef AlphaBetaIndex *hashMap
+    cdef AlphaBetaCache cache
+    cdef PyThread_type_lock lock
     cdef unsigned n_tris
     cdef object points
     cdef object trilist
+    cdef readonly object cache_size
+    cdef readonly object cache_policy
 
     def __cinit__(self,
                   double[:, ::1] points not None,
-                  unsigned[:, ::1] trilist not None):
-        hashMap = NULL
+                  unsigned[:, ::1] trilist not None,
+                  cache_size=None, cache_policy='lru'):
         if points.shape[1] != 2:
             raise Exception
+        if cache_size is not None and cache_size < 0:
+            raise ValueError("cache_size must be None or >= 0")
+        if cache_policy not in ('lru', 'clock'):
+            raise ValueError("cache_policy must be one of 'lru' or 'clock'")
         self.n_tris = trilist.shape[0]
         self.points = points
         self.trilist = trilist
+        self.cache_size = cache_size
+        self.cache_policy = cache_policy
         self.tris =  initTriangleCollection(&points[0,0], &trilist[0,0],
                                             trilist.shape[0])
+        # index the triangles on a grid so that finding the triangle
+        # containing a point only has to test the triangles near it
+        buildTriangleCollectionGrid(&self.tris)
+        initAlphaBetaCache(&self.cache,
+                           0 if cache_size is None else cache_size,
+                           CACHE_POLICY_LRU if cache_policy == 'lru'
+                           else CACHE_POLICY_CLOCK)
+        self.lock = PyThread_allocate_lock()
+        if self.lock == NULL:
+            raise MemoryError()
 
     def _init_source_triangles(self,
                   double[:, ::1] points not None,
                   unsigned[:, ::1] trilist not None):
-        hashMap = NULL
         if points.shape[1] != 2:
             raise Exception
         elif points.shape[0] != self.n_tris:
             raise Exception
         self.tris =  initTriangleCollection(&points[0,0], &trilist[0,0],
                                             self.n_tris)
+        buildTriangleCollectionGrid(&self.tris)
 
     def _init_target_triangles(
             self, double[:, ::1] points not None,
@@ -65,26 +127,114 @@ cdef class CLookupPWA:
 
     def __dealloc__(self):
         deleteTriangleCollection(&self.tris)
-        clearCacheAndDelete(&self.hashMap)
+        deleteAlphaBetaCache(&self.cache)
+        if self.lock != NULL:
+            PyThread_free_lock(self.lock)
 
     def __reduce__(self):
         r"""
         Implement the reduction protocol so this object is copyable/picklable
+        (note that the contents of the cache are not preserved)
         """
         return self.__class__, (np.asarray(self.points),
-                                np.asarray(self.trilist))
+                                np.asarray(self.trilist),
+                                self.cache_size, self.cache_policy)
 
     def index_alpha_beta(self, double[:, ::1] points not None):
+        if self.cache_size == 0:
+            return self.bulk_index_alpha_beta(points)
+        cdef unsigned int n_points = points.shape[0], n_missed
         # create three c numpy arrays for storing our output into
         cdef cnp.ndarray[double, ndim=1, mode='c'] alphas = \
-            np.zeros(points.shape[0], dtype=np.float64)
+            np.zeros(n_points, dtype=np.float64)
+        cdef cnp.ndarray[double, ndim=1, mode='c'] betas = \
+            np.zeros(n_points, dtype=np.float64)
+        cdef cnp.ndarray[int, ndim=1, mode='c'] indexes = \
+            np.zeros(n_points, dtype=np.int32)
+        cdef cnp.ndarray[unsigned int, ndim=1, mode='c'] missed = \
+            np.zeros(n_points, dtype=np.uint32)
+        if n_points == 0:
+            return indexes, alphas, betas
+        cdef double *points_ptr = &points[0, 0]
+        cdef int *indexes_ptr = &indexes[0]
+        cdef double *alphas_ptr = &alphas[0]
+        cdef double *betas_ptr = &betas[0]
+        cdef unsigned int *missed_ptr = &missed[0]
+        # fill the arrays with the C results - only the cache accesses need
+        # the lock, the search for the missed points is read only
+        with nogil:
+            PyThread_acquire_lock(self.lock, WAIT_LOCK)
+            n_missed = arrayRetrieveAlphaBetaIndexFromCache(
+                &self.cache, points_ptr, n_points, indexes_ptr, alphas_ptr,
+                betas_ptr, missed_ptr)
+            PyThread_release_lock(self.lock)
+            if n_missed > 0:
+                arrayAlphaBetaIndexForMissedPoints(
+                    &self.tris, points_ptr, missed_ptr, n_missed,
+                    indexes_ptr, alphas_ptr, betas_ptr)
+                PyThread_acquire_lock(self.lock, WAIT_LOCK)
+                arrayAddAlphaBetaIndexToCache(
+                    &self.cache, points_ptr, missed_ptr, n_missed,
+                    indexes_ptr, alphas_ptr, betas_ptr)
+                PyThread_release_lock(self.lock)
+        return indexes, alphas, betas
+
+    def clear_cache(self):
+        r"""
+        Empty the cache. The hit and miss counts are preserved.
+        """
+        with nogil:
+            PyThread_acquire_lock(self.lock, WAIT_LOCK)
+            clearAlphaBetaCache(&self.cache)
+            PyThread_release_lock(self.lock)
+
+    property n_cache_hits:
+        r"""
+        The number of point lookups that were answered from the cache.
+
+        :type: int
+        """
+        def __get__(self):
+            return self.cache.hits
+
+    property n_cache_misses:
+        r"""
+        The number of point lookups that missed the cache.
+
+        :type: int
+        """
+        def __get__(self):
+            return self.cache.misses
+
+    property n_cached_points:
+        r"""
+        The number of points currently cached.
+
+        :type: int
+        """
+        def __get__(self):
+            return self.cache.nEntries
+
+    def bulk_index_alpha_beta(self, double[:, ::1] points not None):
+        r"""
+        Find the containing triangle and the alpha and beta of every point
+        in a single pass over the grid index, bypassing the cache. Points
+        that are in no triangle have an index of -1.
+        """
+        cdef unsigned int n_points = points.shape[0]
+        cdef cnp.ndarray[double, ndim=1, mode='c'] alphas = \
+            np.zeros(n_points, dtype=np.float64)
         cdef cnp.ndarray[double, ndim=1, mode='c'] betas = \
-            np.zeros(points.shape[0], dtype=np.float64)
+            np.zeros(n_points, dtype=np.float64)
         cdef cnp.ndarray[int, ndim=1, mode='c'] indexes = \
-            np.zeros(points.shape[0], dtype=np.int32)
-        # fill the arrays with the C results
-        arrayCachedAlphaBetaIndexForPoints(&self.hashMap, &self.tris,
-                                          &points[0,0],
-                                     points.shape[0], &indexes[0],
-                                     &alphas[0], &betas[0])
+            np.zeros(n_points, dtype=np.int32)
+        if n_points == 0:
+            return indexes, alphas, betas
+        cdef double *points_ptr = &points[0, 0]
+        cdef int *indexes_ptr = &indexes[0]
+        cdef double *alphas_ptr = &alphas[0]
+        cdef double *betas_ptr = &betas[0]
+        with nogil:
+            arrayAlphaBetaIndexForPoints(&self.tris, points_ptr, n_points,
+                                         indexes_ptr, alphas_ptr, betas_ptr)
         return indexes, alphas, betas
@@ -1,5 +1,6 @@
 #include "pwa.h"
 
+#include <math.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include "uthash.h"
@@ -83,21 +84,160 @@ TriangleCollection initTriangleCollection(double *vertices, unsigned int *trilis
   TriangleCollection tris;
   tris.n_triangles = n_triangles;
   tris.triangles = (Triangle *)malloc(n_triangles * sizeof(Triangle));
+  tris.grid = NULL;
   for (i = 0; i < n_triangles; i++) {
     tris.triangles[i] = initTriangle(&trilist[i * 3], vertices);
   }
   return tris;
 }
 
+static void triangleBounds(Triangle t, Point *min, Point *max)
+{
+  min->x = fmin(t.i.x, fmin(t.j.x, t.k.x));
+  min->y = fmin(t.i.y, fmin(t.j.y, t.k.y));
+  max->x = fmax(t.i.x, fmax(t.j.x, t.k.x));
+  max->y = fmax(t.i.y, fmax(t.j.y, t.k.y));
+}
+
+// the (clamped) grid column and row that a coordinate falls in
+static unsigned int gridColumn(TriangleGrid *grid, double x)
+{
+  double c = floor((x - grid->min.x) / grid->cellWidth);
+  if (c < 0) return 0;
+  if (c >= grid->n_columns) return grid->n_columns - 1;
+  return (unsigned int)c;
+}
+
+static unsigned int gridRow(TriangleGrid *grid, double y)
+{
+  double r = floor((y - grid->min.y) / grid->cellHeight);
+  if (r < 0) return 0;
+  if (r >= grid->n_rows) return grid->n_rows - 1;
+  return (unsigned int)r;
+}
+
+void buildTriangleCollectionGrid(TriangleCollection *tris)
+{
+  unsigned int i, r, c, n_cells, side;
+  unsigned int c0, c1, r0, r1;
+  double width, height, pad;
+  Point min, max, tMin, tMax;
+  TriangleGrid *grid;
+  if (tris->n_triangles == 0 || tris->grid != NULL) {
+    return;
+  }
+  triangleBounds(tris->triangles[0], &min, &max);
+  for (i = 1; i < tris->n_triangles; i++) {
+    triangleBounds(tris->triangles[i], &tMin, &tMax);
+    min.x = fmin(min.x, tMin.x);
+    min.y = fmin(min.y, tMin.y);
+    max.x = fmax(max.x, tMax.x);
+    max.y = fmax(max.y, tMax.y);
+  }
+  width = max.x - min.x;
+  height = max.y - min.y;
+  // pad the bounds so that points that are numerically on a triangle edge at
+  // the edge of the grid still fall inside it
+  pad = 1e-9 * fmax(fmax(width, height), 1.0);
+  min.x -= pad;
+  min.y -= pad;
+  width += 2 * pad;
+  height += 2 * pad;
+  if (!(width < INFINITY && height < INFINITY)) {
+    return;  // non-finite vertices - leave the linear search in place
+  }
+  grid = (TriangleGrid *)malloc(sizeof(TriangleGrid));
+  // roughly one triangle per cell
+  side = (unsigned int)ceil(sqrt((double)tris->n_triangles));
+  grid->min = min;
+  grid->n_columns = side;
+  grid->n_rows = side;
+  grid->cellWidth = width / side;
+  grid->cellHeight = height / side;
+  n_cells = side * side;
+  grid->cellStart = (unsigned int *)calloc(n_cells + 1, sizeof(unsigned int));
+  // first pass - count the triangles overlapping each cell (offset by one so
+  // that the prefix sum gives the start of each cell)
+  for (i = 0; i < tris->n_triangles; i++) {
+    triangleBounds(tris->triangles[i], &tMin, &tMax);
+    c0 = gridColumn(grid, tMin.x - pad);
+    c1 = gridColumn(grid, tMax.x + pad);
+    r0 = gridRow(grid, tMin.y - pad);
+    r1 = gridRow(grid, tMax.y + pad);
+    for (r = r0; r <= r1; r++) {
+      for (c = c0; c <= c1; c++) {
+        grid->cellStart[r * side + c + 1]++;
+      }
+    }
+  }
+  for (i = 0; i < n_cells; i++) {
+    grid->cellStart[i + 1] += grid->cellStart[i];
+  }
+  grid->cellTriangles = (unsigned int *)malloc(
+      (grid->cellStart[n_cells] + 1) * sizeof(unsigned int));
+  // second pass - fill the cells, in ascending triangle order so that a
+  // lookup finds the same (first) containing triangle as a linear search
+  for (i = 0; i < tris->n_triangles; i++) {
+    triangleBounds(tris->triangles[i], &tMin, &tMax);
+    c0 = gridColumn(grid, tMin.x - pad);
+    c1 = gridColumn(grid, tMax.x + pad);
+    r0 = gridRow(grid, tMin.y - pad);
+    r1 = gridRow(grid, tMax.y + pad);
+    for (r = r0; r <= r1; r++) {
+      for (c = c0; c <= c1; c++) {
+        grid->cellTriangles[grid->cellStart[r * side + c]++] = i;
+      }
+    }
+  }
+  // the fill advanced each start to the start of the next cell - shift back
+  for (i = n_cells; i > 0; i--) {
+    grid->cellStart[i] = grid->cellStart[i - 1];
+  }
+  grid->cellStart[0] = 0;
+  tris->grid = grid;
+}
+
 void deleteTriangleCollection(TriangleCollection *tris)
 {
+  if (tris->grid != NULL) {
+    free(tris->grid->cellStart);
+    free(tris->grid->cellTriangles);
+    free(tris->grid);
+    tris->grid = NULL;
+  }
   free(tris->triangles);
 }
 
+static void gridContainingTriangleAndAlphaBetaForPoint(TriangleCollection *tris, Point p,
+                                                       int *index, double *alpha, double *beta)
+{
+  unsigned int c, n, cell;
+  TriangleGrid *grid = tris->grid;
+  *index = -1; // no matching triangle
+  // (written to also reject NaN)
+  if (!(p.x >= grid->min.x && p.x <= grid->min.x + grid->cellWidth * grid->n_columns &&
+        p.y >= grid->min.y && p.y <= grid->min.y + grid->cellHeight * grid->n_rows)) {
+    return;
+  }
+  cell = gridRow(grid, p.y) * grid->n_columns + gridColumn(grid, p.x);
+  for (c = grid->cellStart[cell]; c < grid->cellStart[cell + 1]; c++) {
+    n = grid->cellTriangles[c];
+    alphaBetaForTriangle(tris->triangles[n], p, alpha, beta);
+    if (*alpha >= 0 && *beta >= 0 && *alpha + *beta <= 1.0) {
+      *index = (int)n;
+      return;
+    }
+  }
+}
+
 void containingTriangleAndAlphaBetaForPoint(TriangleCollection *tris, Point p,
                                             int *index, double *alpha, double *beta)
 {
   unsigned int i;
+  if (tris->grid != NULL) {
+    gridContainingTriangleAndAlphaBetaForPoint(tris, p, index, alpha, beta);
+    return;
+  }
   *index = -1; // no matching triangle
   for (i = 0; i < tris->n_triangles; i++) {
     alphaBetaForTriangle(tris->triangles[i], p, alpha, beta);
@@ -119,60 +259,180 @@ void containingTriangleAndAlphaBetaForPoint(TriangleCollection *tris, Point p,
 }
 
 //
-// ----- HASHMAP -----
+// ----- CACHE -----
 //
-AlphaBetaIndex* retrieveAlphaBetaFromCache(AlphaBetaIndex **hash, Point queryPoint)
+void initAlphaBetaCache(AlphaBetaCache *cache, unsigned int maxEntries, int policy)
+{
+  cache->hash = NULL;
+  cache->maxEntries = maxEntries;
+  cache->nEntries = 0;
+  cache->hand = 0;
+  cache->policy = policy;
+  cache->hits = 0;
+  cache->misses = 0;
+  cache->ring = NULL;
+  if (policy == CACHE_POLICY_CLOCK && maxEntries > 0) {
+    cache->ring = (AlphaBetaIndex **)malloc(maxEntries * sizeof(AlphaBetaIndex *));
+  }
+}
+
+void clearAlphaBetaCache(AlphaBetaCache *cache)
+{
+  AlphaBetaIndex *currentResult, *tmp;
+  HASH_ITER(hh, cache->hash, currentResult, tmp) {
+    HASH_DEL(cache->hash, currentResult);  /* delete; users advances to next */
+    free(currentResult);
+  }
+  cache->nEntries = 0;
+  cache->hand = 0;
+}
+
+void deleteAlphaBetaCache(AlphaBetaCache *cache)
+{
+  clearAlphaBetaCache(cache);
+  free(cache->ring);
+  cache->ring = NULL;
+}
+
+AlphaBetaIndex* retrieveAlphaBetaFromCache(AlphaBetaCache *cache, Point queryPoint)
 {
   AlphaBetaIndex *resultInHash = NULL;
   // check to see if there is already this result in the hash
-  HASH_FIND(hh, *hash, &queryPoint, sizeof(Point), resultInHash);
+  HASH_FIND(hh, cache->hash, &queryPoint, sizeof(Point), resultInHash);
+  if (resultInHash) {
+    cache->hits++;
+    if (cache->maxEntries > 0) {
+      if (cache->policy == CACHE_POLICY_CLOCK) {
+        resultInHash->referenced = 1;
+      } else {
+        // move to the back of the (insertion ordered) hash - the front is
+        // then always the least recently used entry
+        HASH_DEL(cache->hash, resultInHash);
+        HASH_ADD(hh, cache->hash, queryPoint, sizeof(Point), resultInHash);
+      }
+    }
+  } else {
+    cache->misses++;
+  }
   return resultInHash;
 }
 
-// should only be called after retrieveAlphaBetaFromCache has returned NULL
-void addAlphaBetaIndexToCache(AlphaBetaIndex **hash, Point queryPoint, int index, double alpha, double beta)
+// a free entry for a new result, evicting an old one if the cache is full
+static AlphaBetaIndex* newCacheEntry(AlphaBetaCache *cache)
+{
+  AlphaBetaIndex *entry;
+  if (cache->maxEntries == 0 || cache->nEntries < cache->maxEntries) {
+    entry = malloc(sizeof(AlphaBetaIndex));
+    memset(entry, 0, sizeof(AlphaBetaIndex));
+    if (cache->ring != NULL) {
+      entry->slot = cache->nEntries;
+      cache->ring[entry->slot] = entry;
+    }
+    cache->nEntries++;
+    return entry;
+  }
+  if (cache->policy == CACHE_POLICY_CLOCK) {
+    // sweep, giving referenced entries a second chance
+    while (cache->ring[cache->hand]->referenced) {
+      cache->ring[cache->hand]->referenced = 0;
+      cache->hand = (cache->hand + 1) % cache->maxEntries;
+    }
+    entry = cache->ring[cache->hand];
+    cache->hand = (cache->hand + 1) % cache->maxEntries;
+  } else {
+    entry = cache->hash;  // the least recently used
+  }
+  HASH_DEL(cache->hash, entry);
+  return entry;
+}
+
+void addAlphaBetaIndexToCache(AlphaBetaCache *cache, Point queryPoint, int index, double alpha, double beta)
 {
-  // dynamically allocate a new result object
-  AlphaBetaIndex *result;
-  result = malloc(sizeof(AlphaBetaIndex));
-  memset(result, 0, sizeof(AlphaBetaIndex));
-  result->queryPoint = queryPoint;
+  AlphaBetaIndex *result = NULL;
+  // the point may have been added since it was looked up
+  HASH_FIND(hh, cache->hash, &queryPoint, sizeof(Point), result);
+  if (result == NULL) {
+    result = newCacheEntry(cache);
+    result->queryPoint = queryPoint;
+    HASH_ADD(hh, cache->hash, queryPoint, sizeof(Point), result);
+  }
   result->index = index;
   result->alpha = alpha;
   result->beta = beta;
-  HASH_ADD(hh, *hash, queryPoint, sizeof(Point), result);
+  result->referenced = 1;
 }
 
-void cachedAlphaBetaIndexForPointInTriangleCollection(AlphaBetaIndex **hash, TriangleCollection *tris, Point point,
+void cachedAlphaBetaIndexForPointInTriangleCollection(AlphaBetaCache *cache, TriangleCollection *tris, Point point,
                                                       int *index, double *alpha, double *beta)
 {
   // check to see if the point is in the hashmap
-  AlphaBetaIndex *cachedResult = retrieveAlphaBetaFromCache(hash, point);
+  AlphaBetaIndex *cachedResult = retrieveAlphaBetaFromCache(cache, point);
   if (cachedResult) {
-    //printf("cache hit\n");
     *alpha = cachedResult->alpha;
     *beta = cachedResult->beta;
     *index = cachedResult->index;
   } else {
-    //printf("cache miss\n");
     // no entry in the cache - calculate the alpha/beta and cache it
     containingTriangleAndAlphaBetaForPoint(tris, point, index, alpha, beta);
-    addAlphaBetaIndexToCache(hash, point, *index, *alpha, *beta);
+    addAlphaBetaIndexToCache(cache, point, *index, *alpha, *beta);
   }
 }
 
-void arrayCachedAlphaBetaIndexForPoints(AlphaBetaIndex **hash, TriangleCollection *tris, double *points, unsigned int n_points,
+void arrayCachedAlphaBetaIndexForPoints(AlphaBetaCache *cache, TriangleCollection *tris, double *points, unsigned int n_points,
                                   int *indexes, double *alphas, double *betas)
 {
   unsigned int i;
   for (i = 0; i < n_points; i++) {
     // build a point object
     Point queryPoint = initPoint(points + i * 2);
-    cachedAlphaBetaIndexForPointInTriangleCollection(hash, tris, queryPoint,
+    cachedAlphaBetaIndexForPointInTriangleCollection(cache, tris, queryPoint,
                                                      indexes + i, alphas + i, betas + i);
   }
 }
 
+unsigned int arrayRetrieveAlphaBetaIndexFromCache(AlphaBetaCache *cache, double *points, unsigned int n_points,
+                                                  int *indexes, double *alphas, double *betas,
+                                                  unsigned int *missed)
+{
+  unsigned int i, n_missed = 0;
+  AlphaBetaIndex *cachedResult;
+  for (i = 0; i < n_points; i++) {
+    cachedResult = retrieveAlphaBetaFromCache(cache, initPoint(points + i * 2));
+    if (cachedResult) {
+      indexes[i] = cachedResult->index;
+      alphas[i] = cachedResult->alpha;
+      betas[i] = cachedResult->beta;
+    } else {
+      missed[n_missed++] = i;
+    }
+  }
+  return n_missed;
+}
+
+void arrayAlphaBetaIndexForMissedPoints(TriangleCollection *tris, double *points,
+                                        unsigned int *missed, unsigned int n_missed,
+                                        int *indexes, double *alphas, double *betas)
+{
+  unsigned int i, m;
+  for (i = 0; i < n_missed; i++) {
+    m = missed[i];
+    containingTriangleAndAlphaBetaForPoint(tris, initPoint(points + m * 2),
+                                           indexes + m, alphas + m, betas + m);
+  }
+}
+
+void arrayAddAlphaBetaIndexToCache(AlphaBetaCache *cache, double *points,
+                                   unsigned int *missed, unsigned int n_missed,
+                                   int *indexes, double *alphas, double *betas)
+{
+  unsigned int i, m;
+  for (i = 0; i < n_missed; i++) {
+    m = missed[i];
+    addAlphaBetaIndexToCache(cache, initPoint(points + m * 2),
+                             indexes[m], alphas[m], betas[m]);
+  }
+}
+
 void arrayAlphaBetaIndexForPoints(TriangleCollection *tris, double *points, unsigned int n_points,
                                   int *indexes, double *alphas, double *betas)
 {
@@ -183,13 +443,3 @@ void arrayAlphaBetaIndexForPoints(TriangleCollection *tris, double *points, unsi
     containingTriangleAndAlphaBetaForPoint(tris, queryPoint, indexes + i, alphas + i, betas + i);
   }
 }
-
-void clearCacheAndDelete(AlphaBetaIndex **hash)
-{
-  AlphaBetaIndex *currentResult, *tmp;
-  HASH_ITER(hh, *hash, currentResult, tmp) {
-    HASH_DEL(*hash, currentResult);  /* delete; users advances to next */
-    free(currentResult);            /* optional- if you want to free  */
-  }
-}
-
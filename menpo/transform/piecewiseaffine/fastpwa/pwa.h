@@ -22,13 +22,28 @@ Triangle initTriangle(unsigned int *indices, double *vertices);
 void trianglePrint(Triangle t);
 void alphaBetaForTriangle(Triangle t, Point p, double *alpha, double *beta);
 
+// A uniform grid over the bounding box of a TriangleCollection. Each cell
+// lists (in ascending order) the triangles whose bounding box overlaps it, so
+// only those need testing for containment of a point in the cell.
+typedef struct {
+  Point min;
+  double cellWidth;
+  double cellHeight;
+  unsigned int n_columns;
+  unsigned int n_rows;
+  unsigned int *cellStart;  // n_columns * n_rows + 1 offsets into cellTriangles
+  unsigned int *cellTriangles;
+} TriangleGrid;
+
 typedef struct {
   Triangle *triangles;
   unsigned int n_triangles;
+  TriangleGrid *grid;  // NULL unless buildTriangleCollectionGrid is called
 } TriangleCollection;
 
 TriangleCollection initTriangleCollection(double *vertices, unsigned int *trilist,
                                           unsigned int n_triangles);
+void buildTriangleCollectionGrid(TriangleCollection *tris);
 void deleteTriangleCollection(TriangleCollection *tris);
 void containingTriangleAndAlphaBetaForPoint(TriangleCollection *tris, Point p,
                                            int *index, double *alpha, double *beta);
@@ -38,22 +53,53 @@ typedef struct {
   double alpha;
   double beta;
   int index;
+  unsigned int slot;         // position in the clock ring
+  unsigned char referenced;  // clock reference bit
   UT_hash_handle hh;
 } AlphaBetaIndex;
 
-AlphaBetaIndex* retrieveAlphaBetaFromCache(AlphaBetaIndex **hash, Point queryPoint);
-// should only be called after retrieveAlphaBetaFromCache has returned NULL
-void addAlphaBetaIndexToCache(AlphaBetaIndex **hash, Point queryPoint, int index, double alpha, double beta);
-void cachedAlphaBetaIndexForPointInTriangleCollection(AlphaBetaIndex **hash, TriangleCollection *tris, Point point,
+#define CACHE_POLICY_LRU 0
+#define CACHE_POLICY_CLOCK 1
+
+// A cache of the results of containment lookups keyed by the query point.
+// If maxEntries is 0 the cache is unbounded, else entries are evicted
+// according to the policy (least recently used or clock/second chance).
+// The functions on the cache are not synchronised - callers that share a
+// cache between threads must serialise access to it.
+typedef struct {
+  AlphaBetaIndex *hash;
+  AlphaBetaIndex **ring;  // the entries in clock order (clock policy only)
+  unsigned int maxEntries;
+  unsigned int nEntries;
+  unsigned int hand;
+  int policy;
+  unsigned long long hits;
+  unsigned long long misses;
+} AlphaBetaCache;
+
+void initAlphaBetaCache(AlphaBetaCache *cache, unsigned int maxEntries, int policy);
+void clearAlphaBetaCache(AlphaBetaCache *cache);
+void deleteAlphaBetaCache(AlphaBetaCache *cache);
+AlphaBetaIndex* retrieveAlphaBetaFromCache(AlphaBetaCache *cache, Point queryPoint);
+void addAlphaBetaIndexToCache(AlphaBetaCache *cache, Point queryPoint, int index, double alpha, double beta);
+void cachedAlphaBetaIndexForPointInTriangleCollection(AlphaBetaCache *cache, TriangleCollection *tris, Point point,
                                                       int *index, double *alpha, double *beta);
-void arrayCachedAlphaBetaIndexForPoints(AlphaBetaIndex **hash, TriangleCollection *tris,
+void arrayCachedAlphaBetaIndexForPoints(AlphaBetaCache *cache, TriangleCollection *tris,
                                   double *points, unsigned int n_points,
                                   int *indexes, double *alphas, double *betas);
+// the three stages of arrayCachedAlphaBetaIndexForPoints, so that the
+// (read only) containment search can be done without holding a lock on the
+// cache. Returns the number of points that were missed, whose indices into
+// points are written to missed.
+unsigned int arrayRetrieveAlphaBetaIndexFromCache(AlphaBetaCache *cache, double *points, unsigned int n_points,
+                                                  int *indexes, double *alphas, double *betas,
+                                                  unsigned int *missed);
+void arrayAlphaBetaIndexForMissedPoints(TriangleCollection *tris, double *points,
+                                        unsigned int *missed, unsigned int n_missed,
+                                        int *indexes, double *alphas, double *betas);
+void arrayAddAlphaBetaIndexToCache(AlphaBetaCache *cache, double *points,
+                                   unsigned int *missed, unsigned int n_missed,
+                                   int *indexes, double *alphas, double *betas);
 void arrayAlphaBetaIndexForPoints(TriangleCollection *tris,
                                   double *points, unsigned int n_points,
                                   int *indexes, double *alphas, double *betas);
-void arrayMapForPointsAndTargetPoints(AlphaBetaIndex **hash, TriangleCollection *sourceTris,
-                                  TriangleCollection *targetTris, double *points, unsigned int n_points,
-                                  double *mappedPoints);
-void clearCacheAndDelete(AlphaBetaIndex **hash);
-
@@ -1,6 +1,7 @@
 import numpy as np
 from scipy.spatial.distance import cdist
 from .base import Transform
+from .fastrbf import rbf_dot, R2LOGR2, R2LOGR
 
 
 class RadialBasisFunction(Transform):
@@ -38,6 +39,47 @@ class RadialBasisFunction(Transform):
         """
         return self.n_centres
 
+    def apply_dot(self, x, weights, n_threads=1, block_size=4096):
+        r"""
+        Apply the basis function and take the dot product of the result with
+        a set of weights - ``self.apply(x).dot(weights)`` - without holding
+        the whole (n_points, n_centres) result in memory.
+
+        Parameters
+        ----------
+        x : (n_points, n_dims) ndarray
+            Set of points to apply the basis to.
+        weights : (n_centres, n_outputs) ndarray
+            The weight of each centre.
+        n_threads : `int`, optional
+            The number of threads to use (where supported).
+        block_size : `int`, optional
+            The number of points whose basis is evaluated at once.
+
+        Returns
+        -------
+        result : (n_points, n_outputs) ndarray
+            The weighted sum of the basis functions at each point.
+        """
+        result = np.empty((x.shape[0], weights.shape[1]))
+        for i in xrange(0, x.shape[0], block_size):
+            block = slice(i, i + block_size)
+            result[block] = self.apply(x[block]).dot(weights)
+        return result
+
+    def _fused_apply_dot(self, x, weights, function, n_threads):
+        r"""
+        :meth:`apply_dot` evaluated by the fused (and optionally threaded)
+        kernel, which never builds a block of basis function values.
+        """
+        if n_threads < 1:
+            raise ValueError("n_threads must be at least 1 - {} given".format(
+                n_threads))
+        x = np.require(x, dtype=np.float64, requirements=['C'])
+        c = np.require(self.c, dtype=np.float64, requirements=['C'])
+        weights = np.require(weights, dtype=np.float64, requirements=['C'])
+        return rbf_dot(x, c, weights, function, n_threads=n_threads)
+
 
 class R2LogR2RBF(RadialBasisFunction):
     r"""
@@ -87,6 +129,30 @@ class R2LogR2RBF(RadialBasisFunction):
         u[mask] = 0
         return u
 
+    def apply_dot(self, x, weights, n_threads=1, block_size=None):
+        r"""
+        Apply the basis function and take the dot product of the result with
+        a set of weights - ``self.apply(x).dot(weights)`` - in a single
+        fused pass that never builds the (n_points, n_centres) result.
+
+        Parameters
+        ----------
+        x : (n_points, n_dims) ndarray
+            Set of points to apply the basis to.
+        weights : (n_centres, n_outputs) ndarray
+            The weight of each centre.
+        n_threads : `int`, optional
+            The number of threads to split the points between.
+        block_size : `int`, optional
+            Ignored - no intermediate blocks are built.
+
+        Returns
+        -------
+        result : (n_points, n_outputs) ndarray
+            The weighted sum of the basis functions at each point.
+        """
+        return self._fused_apply_dot(x, weights, R2LOGR2, n_threads)
+
 
 class R2LogRRBF(RadialBasisFunction):
     r"""
@@ -130,3 +196,27 @@ class R2LogRRBF(RadialBasisFunction):
         # reset singularities to 0
         u[mask] = 0
         return u
+
+    def apply_dot(self, points, weights, n_threads=1, block_size=None):
+        r"""
+        Apply the basis function and take the dot product of the result with
+        a set of weights - ``self.apply(points).dot(weights)`` - in a single
+        fused pass that never builds the (n_points, n_centres) result.
+
+        Parameters
+        ----------
+        points : (n_points, n_dims) ndarray
+            Set of points to apply the basis to.
+        weights : (n_centres, n_outputs) ndarray
+            The weight of each centre.
+        n_threads : `int`, optional
+            The number of threads to split the points between.
+        block_size : `int`, optional
+            Ignored - no intermediate blocks are built.
+
+        Returns
+        -------
+        result : (n_points, n_outputs) ndarray
+            The weighted sum of the basis functions at each point.
+        """
+        return self._fused_apply_dot(points, weights, R2LOGR, n_threads)
@@ -1,7 +1,10 @@
+import numpy as np
 import menpo
 from numpy.testing import assert_equal
+from nose.tools import raises
 from menpo.transform.piecewiseaffine.base import (CythonPWA, CachedPWA,
                                                   PythonPWA)
+from menpo.transform.piecewiseaffine import TriangleContainmentError
 
 b = menpo.io.import_builtin_asset('breakingbad.jpg').as_masked()
 b.crop_to_landmarks_proportion_inplace(0.1)
@@ -40,3 +43,97 @@ def test_cached_pwa_forgets_cache():
     # should clear cache and be fine
     r2 = cached_pwa.apply(points)
     assert_equal(r1, r2)
+
+
+def test_cython_pwa_bulk_index_alpha_beta_same_as_cached():
+    cython = CythonPWA(src, tgt)
+    points_c = np.require(points, dtype=np.float64, requirements=['C'])
+    outside = np.array([[-1000., -1000.], [np.nan, 0.]])
+    points_c = np.vstack([points_c, outside])
+    i, a, b = cython._fastpwa.index_alpha_beta(points_c)
+    bulk_i, bulk_a, bulk_b = cython._fastpwa.bulk_index_alpha_beta(points_c)
+    assert_equal(bulk_i, i)
+    assert_equal(bulk_i[-2:], [-1, -1])
+    assert_equal(bulk_a[:-2], a[:-2])
+    assert_equal(bulk_b[:-2], b[:-2])
+
+
+def test_pwa_lookup_map_same_as_search():
+    for pwa_cls in (PythonPWA, CachedPWA, CythonPWA):
+        pwa = pwa_cls(src, tgt)
+        expected = pwa.apply(points)
+        pwa.rasterise(b.mask)
+        assert_equal(pwa.apply(points), expected)
+
+
+def test_pwa_lookup_map_survives_set_target_and_is_shared_by_copies():
+    pwa = CythonPWA(src, tgt)
+    lookup_map = pwa.rasterise(b.mask)
+    new_tgt = tgt.copy()
+    new_tgt.points += 1.5
+    pwa_copy = pwa.copy()
+    pwa_copy.set_target(new_tgt)
+    assert(pwa_copy.lookup_map is lookup_map)
+    assert_equal(pwa_copy.apply(points), CythonPWA(src, new_tgt).apply(points))
+
+
+@raises(TriangleContainmentError)
+def test_pwa_lookup_map_outside_raises_triangle_containment_error():
+    pwa = PythonPWA(src, tgt)
+    lookup_map = pwa.rasterise(b.shape)
+    pwa.apply(lookup_map.points)
+
+
+@raises(ValueError)
+def test_pwa_lookup_map_different_source_raises_value_error():
+    new_src = src.copy()
+    new_src.points += 1.5
+    lookup_map = PythonPWA(src, tgt).rasterise(b.mask)
+    PythonPWA(new_src, tgt).lookup_map = lookup_map
+
+
+def test_cython_pwa_bounded_cache():
+    python = PythonPWA(src, tgt)
+    for policy in ('lru', 'clock'):
+        cython = CythonPWA(src, tgt, cache_size=100, cache_policy=policy)
+        assert_equal(python.apply(points), cython.apply(points))
+        assert_equal(cython.n_cached_points, 100)
+        assert_equal(cython.n_cache_misses, points.shape[0])
+        # the most recent points are still cached
+        cython.apply(points[-50:])
+        assert_equal(cython.n_cache_hits, 50)
+
+
+def test_cython_pwa_clear_cache():
+    cython = CythonPWA(src, tgt)
+    cython.apply(points)
+    assert_equal(cython.n_cached_points, points.shape[0])
+    cython.clear_cache()
+    assert_equal(cython.n_cached_points, 0)
+    cython.apply(points)
+    assert_equal(cython.n_cache_hits, 0)
+    assert_equal(cython.n_cache_misses, 2 * points.shape[0])
+
+
+def test_cython_pwa_no_cache():
+    cython = CythonPWA(src, tgt, cache_size=0)
+    assert_equal(PythonPWA(src, tgt).apply(points), cython.apply(points))
+    assert_equal(cython.n_cached_points, 0)
+
+
+@raises(ValueError)
+def test_cython_pwa_invalid_cache_policy_raises_value_error():
+    CythonPWA(src, tgt, cache_policy='fifo')
+
+
+def test_python_pwa_chunked_same_as_unchunked():
+    unchunked = PythonPWA(src, tgt, max_memory=None)
+    chunked = PythonPWA(src, tgt, max_memory=2 ** 16)
+    assert_equal(chunked.apply(points), unchunked.apply(points))
+    assert_equal(chunked.pseudoinverse().max_memory, 2 ** 16)
+
+
+@raises(TriangleContainmentError)
+def test_python_pwa_chunked_outside_raises_triangle_containment_error():
+    pwa = PythonPWA(src, tgt, max_memory=2 ** 16)
+    pwa.apply(np.vstack([points, [[-1000., -1000.]]]))
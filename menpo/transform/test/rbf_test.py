@@ -22,3 +22,13 @@ def test_rbf_r2logr_apply():
                          [0.87625673, 11.86079176, 0.53696079, 11.20008815],
                          [15.9269609, 13.83726877, 2.05820995, 0.84946412]])
     assert_allclose(result, expected)
+
+
+def test_rbf_apply_dot_same_as_apply():
+    weights = np.array([[0.5, -1.], [2., 0.3], [-0.7, 1.1], [0.2, 0.9]])
+    # include a point on a centre (the singularity)
+    x = np.vstack([points, centers[:1]])
+    for rbf in (R2LogR2RBF(centers), R2LogRRBF(centers)):
+        expected = rbf.apply(x).dot(weights)
+        assert_allclose(rbf.apply_dot(x, weights), expected)
+        assert_allclose(rbf.apply_dot(x, weights, n_threads=2), expected)
@@ -1,3 +1,4 @@
+import cPickle
 import numpy as np
 from numpy.testing import assert_allclose
 
@@ -57,3 +58,27 @@ def test_tps_apply():
     result = tps.apply(pts)
     expected = np.array([[-0.2, -2.], [-1., 2.], [4.2, -5.]])
     assert_allclose(result.points, expected)
+
+
+def test_tps_set_target_reuses_factorisation():
+    tps = ThinPlateSplines(src, tgt)
+    lu = tps._l_lu
+    tps.set_target(tgt_perturbed)
+    assert(tps._l_lu is lu)
+    assert_allclose(tps.coefficients,
+                    ThinPlateSplines(src, tgt_perturbed).coefficients)
+    assert_allclose(tps.apply(square_src_landmarks), perturbed_tgt_landmarks)
+
+
+def test_tps_copy_and_pickle_keep_factorisation():
+    tps = ThinPlateSplines(src, tgt)
+    tps_copy = tps.copy()
+    assert(tps_copy._l_lu is tps._l_lu)
+    tps_copy.set_target(tgt_perturbed)
+    assert_allclose(tps_copy.apply(square_src_landmarks),
+                    perturbed_tgt_landmarks)
+    tps_pickled = cPickle.loads(cPickle.dumps(tps, protocol=2))
+    assert_allclose(tps_pickled._l_lu[0], tps._l_lu[0])
+    tps_pickled.set_target(tgt_perturbed)
+    assert_allclose(tps_pickled.apply(square_src_landmarks),
+                    perturbed_tgt_landmarks)
@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.linalg import lu_factor, lu_solve
 from .base import Transform, Alignment, Invertible
 from .rbf import R2LogR2RBF
 
@@ -23,6 +24,9 @@ class ThinPlateSplines(Alignment, Transform, Invertible):
         The kernel to apply.
 
         Default: :class:`menpo.basis.rbf.R2LogR2`
+    n_threads : `int`, optional
+        The number of threads the kernel is evaluated on when applying the
+        transform.
 
     Raises
     ------
@@ -30,10 +34,14 @@ class ThinPlateSplines(Alignment, Transform, Invertible):
         TPS is only with on 2-dimensional data
     """
 
-    def __init__(self, source, target, kernel=None):
+    def __init__(self, source, target, kernel=None, n_threads=1):
         Alignment.__init__(self, source, target)
         if self.n_dims != 2:
             raise ValueError('TPS can only be used on 2D data.')
+        if n_threads < 1:
+            raise ValueError('n_threads must be at least 1 - {} given'.format(
+                n_threads))
+        self.n_threads = n_threads
         if kernel is None:
             kernel = R2LogR2RBF(source.points)
         self.kernel = kernel
@@ -47,13 +55,18 @@ class ThinPlateSplines(Alignment, Transform, Invertible):
         top_l = np.concatenate([self.k, self.p], axis=1)
         bot_l = np.concatenate([self.p.T, o], axis=1)
         self.l = np.concatenate([top_l, bot_l], axis=0)
+        # l only depends on the source, so factorise it once - every target
+        # update is then just a pair of O(n^2) triangular solves. Note that
+        # l is symmetric but indefinite (the affine block), so we use LU.
+        # The factorisation is a tuple, and so is shared between copies.
+        self._l_lu = lu_factor(self.l)
         self.v, self.y, self.coefficients = None, None, None
         self._build_coefficients()
 
     def _build_coefficients(self):
         self.v = self.target.points.T.copy()
         self.y = np.hstack([self.v, np.zeros([2, 3])])
-        self.coefficients = np.linalg.solve(self.l, self.y.T)
+        self.coefficients = lu_solve(self._l_lu, self.y.T)
 
     def _sync_state_from_target(self):
         # now the target is updated, we only have to rebuild the
@@ -85,13 +98,13 @@ class ThinPlateSplines(Alignment, Transform, Invertible):
         c_affine_y = self.coefficients[-1]
         # the affine warp component
         f_affine = c_affine_c + c_affine_x * x + c_affine_y * y
-        # calculate a distance matrix (for L2 Norm) between every source
-        # and the target
-        kernel_dist = self.kernel.apply(points)
         # grab the affine free components of the warp
         c_affine_free = self.coefficients[:-3]
-        # build the affine free warp component
-        f_affine_free = kernel_dist.dot(c_affine_free)
+        # build the affine free warp component - the kernel evaluated on the
+        # distance between every source and point, dotted with the affine
+        # free coefficients (without building the full distance matrix)
+        f_affine_free = self.kernel.apply_dot(points, c_affine_free,
+                                              n_threads=self.n_threads)
         return f_affine + f_affine_free
 
     @property
@@ -99,4 +112,5 @@ class ThinPlateSplines(Alignment, Transform, Invertible):
         return False
 
     def pseudoinverse(self):
-        return ThinPlateSplines(self.target, self.source, kernel=self.kernel)
+        return ThinPlateSplines(self.target, self.source, kernel=self.kernel,
+                                n_threads=self.n_threads)
@@ -18,11 +18,26 @@ else:
     # ---- C/C++ EXTENSIONS ---- #
     cython_modules = ['menpo/shape/mesh/normals.pyx',
                       'menpo/transform/piecewiseaffine/fastpwa.pyx',
+                      'menpo/transform/fastrbf.pyx',
                       'menpo/feature/windowiterator.pyx',
                       'menpo/external/skimage/_warps_cy.pyx',
-                      'menpo/image/extract_patches.pyx']
+                      'menpo/image/extract_patches.pyx',
+                      'menpo/image/fastinterpolation.pyx']
 
     cython_exts = cythonize(cython_modules, quiet=True)
+
+    # The window iterator and the RBF kernel split their work between
+    # threads with OpenMP, which the default compiler on OS X does not
+    # support (the pragmas are then ignored and a single thread is used)
+    openmp_exts = ['menpo.feature.windowiterator', 'menpo.transform.fastrbf']
+    if sys.platform != 'darwin':
+        openmp_flag = '/openmp' if sys.platform == 'win32' else '-fopenmp'
+        for ext in cython_exts:
+            if ext.name in openmp_exts:
+                ext.extra_compile_args.append(openmp_flag)
+                if sys.platform != 'win32':
+                    ext.extra_link_args.append(openmp_flag)
+
     include_dirs = [np.get_include()]
     install_requires = ['numpy==1.9.0',
                         'scipy==0.14.0',